@@ -6,7 +6,8 @@ from django.urls import reverse
 from django.conf import settings
 from django.http import HttpResponse
 from django.template.loader import render_to_string
-from django.db.models import Count, Q
+from django.db.models import Count, F, Q
+from django.db.models.functions import Coalesce
 from datetime import datetime, time, timedelta
 import csv
 import io
@@ -17,7 +18,6 @@ import traceback
 admin_diag_logger = logging.getLogger('config.admin_errors')
 from django.shortcuts import redirect
 from django.contrib import messages
-from django.core.mail import send_mail
 from django.utils import timezone
 from .time_display import format_display_datetime
 from .models import Client, CaseNote, CityBuildFileChecklist, Document, PitStopApplication
@@ -31,9 +31,14 @@ from .models_extensions import (
     StaffTicket,
     StaffTicketAttachment,
 )
+from .class_scheduler import generate_sessions
+from .dashboard_stats import refresh_client_totals
 from .models_classes import ClassTemplate, ClassSession, ClassEnrollment
 from .models_partners import Partner, PartnerReferral, PartnerApiAuditLog
+from .client_search import filter_clients
 from .phone_utils import default_worker_pin_from_phone, normalize_login_phone
+from .worker_sessions import forget_accounts_sessions
+from .worker_hours import ALL_TIME, empty_totals, hours_by_worker, hours_for_worker
 from .citybuild_docs import (
     CITYBUILD_PROGRAMS,
     CITYBUILD_CHECKLIST_DOC_TYPES,
@@ -96,30 +101,26 @@ def _format_hours(hours):
     return f'{hours:.2f} hrs'
 
 
-def _punch_duration_hours(punch):
-    if not punch.clock_in_at or not punch.clock_out_at:
-        return 0
-    seconds = max((punch.clock_out_at - punch.clock_in_at).total_seconds(), 0)
-    return seconds / 3600
+def _worker_hours_windows():
+    return {'week': _current_week_bounds(), 'total': ALL_TIME}
 
 
-def _weekly_hours_for_worker(account):
+def _worker_hours(account):
+    """This week's and all-time totals; changelist rows arrive with them batched in."""
     if not account or not account.pk:
-        return 0
-    week_start, week_end = _current_week_bounds()
-    punches = WorkerTimePunch.objects.filter(
-        worker_account=account,
-        clock_in_at__gte=week_start,
-        clock_in_at__lt=week_end,
-    ).exclude(clock_out_at__isnull=True)
-    return sum(_punch_duration_hours(punch) for punch in punches)
+        return {name: empty_totals() for name in _worker_hours_windows()}
+    hours = getattr(account, '_worker_hours', None)
+    if hours is None:
+        hours = account._worker_hours = hours_for_worker(account, _worker_hours_windows())
+    return hours
+
+
+def _weekly_hours_for_worker(account):
+    return _worker_hours(account)['week']['gross_hours']
 
 
 def _total_hours_for_worker(account):
-    if not account or not account.pk:
-        return 0
-    punches = WorkerTimePunch.objects.filter(worker_account=account).exclude(clock_out_at__isnull=True)
-    return sum(_punch_duration_hours(punch) for punch in punches)
+    return _worker_hours(account)['total']['gross_hours']
 
 
 def _last_assignment_for_worker(account):
@@ -326,8 +327,14 @@ class ClientAdmin(admin.ModelAdmin):
     show_full_result_count = False
 
     def get_search_results(self, request, queryset, search_term):
-        """Autocomplete from PitStop worker/application forms: PitStop clients only."""
-        queryset, use_distinct = super().get_search_results(request, queryset, search_term)
+        """
+        Ranked, typo-tolerant match on name/email/staff name plus phone digits
+        (see clients.client_search) instead of an icontains OR across columns.
+        Autocomplete from PitStop worker/application forms: PitStop clients only.
+        """
+        use_distinct = False
+        if search_term.strip():
+            queryset = filter_clients(queryset, search_term)
         model_name = (request.GET.get('model_name') or '').lower()
         field_name = (request.GET.get('field_name') or '').lower()
         if field_name == 'client' and model_name in ('workeraccount', 'pitstopapplication'):
@@ -904,10 +911,8 @@ class ClientAdmin(admin.ModelAdmin):
         return TemplateResponse(request, 'admin/clients/client_documents.html', context)
     
     def case_notes_count(self, obj):
-        # Uses queryset annotation to avoid per-row COUNT queries on changelist.
-        count = getattr(obj, 'case_notes_total', None)
-        if count is None:
-            count = obj.casenotes.count()
+        # Reads the select_related rollup, so the changelist runs no per-row COUNT.
+        count = obj.case_notes_count
         if count > 0:
             url = reverse('admin:clients_casenote_changelist') + f'?client__id__exact={obj.id}'
             return format_html('<a href="{}">{} notes</a>', url, count)
@@ -1003,7 +1008,7 @@ class ClientAdmin(admin.ModelAdmin):
         return super().get_fields(request, obj)
     
     def get_queryset(self, request):
-        return super().get_queryset(request).annotate(case_notes_total=Count('casenotes'))
+        return super().get_queryset(request).select_related('rollup')
     
     actions = [
         'mark_active',
@@ -1077,8 +1082,9 @@ class ClientAdmin(admin.ModelAdmin):
 
     @admin.action(description='Text selected clients about missing documents')
     def text_missing_documents(self, request, queryset):
-        from .notifications import send_text_message
+        from .mailer import build_email, send_emails
         from .models_extensions import ClientTextMessage
+        from .sms_dispatch import send_batch_text_messages
 
         if not getattr(settings, 'AZURE_COMMUNICATION_CONNECTION_STRING', ''):
             self.message_user(
@@ -1108,9 +1114,9 @@ class ClientAdmin(admin.ModelAdmin):
             return
 
         label_by_code = dict(Document.DOC_TYPE_CHOICES)
-        sent = 0
+        texts = []
+        backup_emails = []
         skipped = 0
-        failed = 0
         email_backup_sent = 0
         email_backup_failed = 0
         reason_counts = {}
@@ -1138,39 +1144,38 @@ class ClientAdmin(admin.ModelAdmin):
                 f"we are still missing your documents: {docs_text}. "
                 "Please upload or bring them in as soon as possible. Thank you."
             )
-            dedupe_key = f'client:{client.pk}:missing-docs:{"-".join(sorted(missing_codes))}'
-            log, attempted = send_text_message(
+            texts.append(ClientTextMessage(
                 client=client,
-                body=body[:480],
                 purpose=ClientTextMessage.PURPOSE_GENERAL,
-                dedupe_key=dedupe_key,
-                require_enabled_flag=False,
-            )
-            if not attempted:
-                skipped += 1
-            elif log.status == ClientTextMessage.STATUS_SENT:
-                sent += 1
-            else:
-                failed += 1
-                reason = (log.error_message or 'Unknown send error')[:80]
-                reason_counts[reason] = reason_counts.get(reason, 0) + 1
+                dedupe_key=f'client:{client.pk}:missing-docs:{"-".join(sorted(missing_codes))}',
+                body=body[:480],
+            ))
 
             if getattr(settings, 'SMS_FORCE_EMAIL_BACKUP', True):
                 email = (client.email or '').strip()
                 if email:
-                    try:
-                        send_mail(
-                            subject='Mission Hiring Hall: Missing documents reminder',
-                            message=body[:480],
-                            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@missionhiringhall.org'),
-                            recipient_list=[email],
-                            fail_silently=False,
-                        )
-                        email_backup_sent += 1
-                    except Exception as exc:
-                        email_backup_failed += 1
-                        reason = f'Email backup failed: {exc}'
-                        reason_counts[reason] = reason_counts.get(reason, 0) + 1
+                    backup_emails.append(
+                        build_email('Mission Hiring Hall: Missing documents reminder', body[:480], None, email)
+                    )
+
+        # Every email backup goes out over one mail connection.
+        for error in send_emails(backup_emails):
+            if error is None:
+                email_backup_sent += 1
+            else:
+                email_backup_failed += 1
+                reason = f'Email backup failed: {error}'
+                reason_counts[reason] = reason_counts.get(reason, 0) + 1
+
+        # Reminders with the same wording go out as one multi-recipient send.
+        result = send_batch_text_messages(texts)
+        sent = result['sent']
+        failed = result['failed']
+        skipped += result['skipped']
+        for log in result['logs']:
+            if log.status != ClientTextMessage.STATUS_SENT:
+                reason = (log.error_message or 'Unknown send error')[:80]
+                reason_counts[reason] = reason_counts.get(reason, 0) + 1
 
         level = messages.SUCCESS if failed == 0 else messages.WARNING
         reason_text = ''
@@ -1188,12 +1193,14 @@ class ClientAdmin(admin.ModelAdmin):
     
     def mark_active(self, request, queryset):
         updated = queryset.update(status='active')
+        refresh_client_totals()
         self.message_user(request, f'{updated} clients marked as active.')
     mark_active.short_description = "Mark selected clients as active"
     
     def mark_completed(self, request, queryset):
         from django.utils import timezone
         updated = queryset.update(status='completed', program_completed_date=timezone.now().date())
+        refresh_client_totals()
         self.message_user(request, f'{updated} clients marked as completed with today\'s date.')
     mark_completed.short_description = "Mark selected clients as completed"
     
@@ -1273,8 +1280,8 @@ class CityBuildFileChecklistAdmin(admin.ModelAdmin):
                 Q(training_interest__in=CITYBUILD_PROGRAMS) |
                 Q(training_interest='capsa')
             )
-            .annotate(casenotes_count=Count('casenotes'))
-            .prefetch_related('documents')
+            .select_related('rollup')
+            .annotate(casenotes_count=Coalesce(F('rollup__case_notes_count'), 0))
         )
 
     def has_add_permission(self, request):
@@ -1410,84 +1417,70 @@ class DocumentAdmin(admin.ModelAdmin):
     actions = ['safe_delete_selected', 'verify_blob_exists', 'list_all_blobs', 'check_storage_config']
     
     def verify_blob_exists(self, request, queryset):
-        """Verify that selected documents exist in Azure Blob Storage"""
-        from .storage import get_azure_container_client
-        
-        container_client = get_azure_container_client()
-        if not container_client:
-            messages.error(request, "Azure storage not configured")
+        """Verify selected documents against the blob inventory (no per-file Azure calls)"""
+        from .blob_inventory import inventory_blob_names, resolve_blob_path
+        from .storage import _candidate_blob_paths, _container_name
+
+        names = inventory_blob_names()
+        if names is None:
+            messages.error(request, "Blob inventory is empty. Run: python manage.py sync_blob_inventory")
             return
-        
+
         verified = 0
         missing = 0
         errors = []
-        
+
         for doc in queryset:
             if not doc.file:
                 errors.append(f"{doc.title}: No file attached")
                 missing += 1
                 continue
-            
+
             blob_name = doc.file.name
-            try:
-                # Check if blob exists
-                blob_client = container_client.get_blob_client(blob_name)
-                exists = blob_client.exists()
-                
-                if exists:
-                    verified += 1
-                    messages.success(request, f"✓ {doc.title}: Blob exists ({blob_name})")
-                else:
-                    missing += 1
-                    # Try alternative path
-                    alt_blob_name = blob_name.replace('documents/', 'resumes/', 1) if 'documents/' in blob_name else None
-                    if alt_blob_name:
-                        alt_blob_client = container_client.get_blob_client(alt_blob_name)
-                        if alt_blob_client.exists():
-                            messages.warning(request, f"⚠ {doc.title}: Found at alternative path ({alt_blob_name})")
-                            verified += 1
-                            missing -= 1
-                        else:
-                            errors.append(f"{doc.title}: Not found at {blob_name} or {alt_blob_name}")
-                    else:
-                        errors.append(f"{doc.title}: Not found at {blob_name}")
-            except Exception as e:
-                errors.append(f"{doc.title}: Error checking - {str(e)}")
+            found = resolve_blob_path(blob_name, names)
+            if found == blob_name:
+                verified += 1
+                messages.success(request, f"✓ {doc.title}: Blob exists ({blob_name})")
+            elif found:
+                verified += 1
+                messages.warning(request, f"⚠ {doc.title}: Found at alternative path ({found})")
+            else:
                 missing += 1
-        
+                tried = ' or '.join(_candidate_blob_paths(blob_name, _container_name()))
+                errors.append(f"{doc.title}: Not found at {tried}")
+
         if errors:
             for error in errors[:10]:  # Show first 10 errors
                 messages.error(request, error)
             if len(errors) > 10:
                 messages.warning(request, f"... and {len(errors) - 10} more errors")
-        
+
         messages.info(request, f"Verified: {verified} found, {missing} missing")
     verify_blob_exists.short_description = "Verify blobs exist in Azure Storage"
-    
+
     def list_all_blobs(self, request, queryset):
-        """List all blobs in Azure container for comparison"""
-        from .storage import get_azure_container_client
-        
-        container_client = get_azure_container_client()
-        if not container_client:
-            messages.error(request, "Azure storage not configured")
+        """Summarize the blob inventory and reconcile it against stored file names"""
+        from .blob_inventory import reconcile_blob_inventory
+        from .models import BlobInventoryItem
+
+        report = reconcile_blob_inventory()
+        if report is None:
+            messages.warning(request, "Blob inventory is empty. Run: python manage.py sync_blob_inventory")
             return
-        
-        try:
-            blobs = list(container_client.list_blobs())
-            blob_names = [blob.name for blob in blobs]
-            
-            # Show in a message (limited to avoid overwhelming)
-            if blob_names:
-                messages.info(request, f"Found {len(blob_names)} blobs in Azure:")
-                for name in blob_names[:20]:  # Show first 20
-                    messages.info(request, f"  - {name}")
-                if len(blob_names) > 20:
-                    messages.info(request, f"  ... and {len(blob_names) - 20} more")
-            else:
-                messages.warning(request, "No blobs found in Azure container")
-        except Exception as e:
-            messages.error(request, f"Error listing blobs: {str(e)}")
+
+        messages.info(request, f"Found {report['blobs']} blobs in Azure:")
+        for name in BlobInventoryItem.objects.values_list('name', flat=True)[:20]:  # Show first 20
+            messages.info(request, f"  - {name}")
+        if report['blobs'] > 20:
+            messages.info(request, f"  ... and {report['blobs'] - 20} more")
+        if report['missing']:
+            messages.error(request, f"{len(report['missing'])} file(s) point at missing blobs:")
+            for label, pk, name in report['missing'][:10]:
+                messages.error(request, f"  - {label} {pk}: {name}")
+        if report['orphaned']:
+            messages.warning(request, f"{len(report['orphaned'])} orphaned blob(s) not referenced by any record:")
+            for name in report['orphaned'][:10]:
+                messages.warning(request, f"  - {name}")
     list_all_blobs.short_description = "List all blobs in Azure Storage"
     
     def check_storage_config(self, request, queryset):
@@ -1891,11 +1884,14 @@ class PitStopApplicationAdmin(admin.ModelAdmin):
     def mark_as_exited_program(self, request, queryset):
         client_ids = list(queryset.values_list('client_id', flat=True))
         updated = Client.objects.filter(pk__in=client_ids).update(pit_stop_stage=Client.PIT_STOP_STAGE_EXITED)
-        WorkerAccount.objects.filter(client_id__in=client_ids).update(
+        accounts = WorkerAccount.objects.filter(client_id__in=client_ids)
+        account_ids = list(accounts.values_list('pk', flat=True))
+        accounts.update(
             is_active=False,
             is_approved=False,
             worker_status=WorkerAccount.STATUS_INACTIVE,
         )
+        forget_accounts_sessions(account_ids)
         self.message_user(request, f'{updated} Pit Stop client(s) marked exited and portal access disabled.')
 
 
@@ -1981,6 +1977,14 @@ class WorkerAccountAdmin(admin.ModelAdmin):
             return []
         return list(self.readonly_fields)
 
+    def get_changelist_instance(self, request):
+        # One grouped query for the page's hours columns instead of one per row.
+        changelist = super().get_changelist_instance(request)
+        hours = hours_by_worker(_worker_hours_windows(), [account.pk for account in changelist.result_list])
+        for account in changelist.result_list:
+            account._worker_hours = hours[account.pk]
+        return changelist
+
     def save_model(self, request, obj, form, change):
         if obj.client_id:
             normalized = normalize_login_phone(obj.client.phone)
@@ -2063,18 +2067,21 @@ class WorkerAccountAdmin(admin.ModelAdmin):
 
     def enable_portal_welcome(self, request, queryset):
         """Turn portal on and send welcome emails."""
-        from .notifications import send_worker_welcome_email
+        from .mailer import send_emails
+        from .notifications import worker_welcome_message
 
         approved = 0
-        emailed = 0
+        welcome_emails = []
         for account in queryset.filter(is_active=False):
             account.is_active = True
             account.worker_status = WorkerAccount.STATUS_ACTIVE
             account.save()
             Client.objects.filter(pk=account.client_id).update(pit_stop_stage=Client.PIT_STOP_STAGE_WORKER)
             approved += 1
-            if send_worker_welcome_email(account):
-                emailed += 1
+            message = worker_welcome_message(account)
+            if message is not None:
+                welcome_emails.append(message)
+        emailed = send_emails(welcome_emails).count(None)
 
         msg = f'{approved} account(s) enabled for portal.'
         if emailed:
@@ -2085,21 +2092,27 @@ class WorkerAccountAdmin(admin.ModelAdmin):
     enable_portal_welcome.short_description = 'Enable portal + welcome email'
 
     def disable_portal(self, request, queryset):
-        updated = queryset.update(
+        account_ids = list(queryset.values_list('pk', flat=True))
+        updated = WorkerAccount.objects.filter(pk__in=account_ids).update(
             is_active=False,
             worker_status=WorkerAccount.STATUS_INACTIVE,
         )
+        forget_accounts_sessions(account_ids)
         self.message_user(request, f'Portal login disabled for {updated} account(s).')
     disable_portal.short_description = 'Disable portal login'
 
     @admin.action(description='Mark as exited program')
     def mark_as_exited_program(self, request, queryset):
-        client_ids = list(queryset.values_list('client_id', flat=True))
-        updated = queryset.update(
+        account_ids, client_ids = [], []
+        for account_id, client_id in queryset.values_list('pk', 'client_id'):
+            account_ids.append(account_id)
+            client_ids.append(client_id)
+        updated = WorkerAccount.objects.filter(pk__in=account_ids).update(
             is_active=False,
             is_approved=False,
             worker_status=WorkerAccount.STATUS_INACTIVE,
         )
+        forget_accounts_sessions(account_ids)
         Client.objects.filter(pk__in=client_ids).update(pit_stop_stage=Client.PIT_STOP_STAGE_EXITED)
         self.message_user(request, f'{updated} worker account(s) marked exited and portal access disabled.')
 
@@ -2495,14 +2508,9 @@ class ClassTemplateAdmin(admin.ModelAdmin):
 
     @admin.action(description='Generate upcoming sessions (next 60 days)')
     def generate_sessions_action(self, request, queryset):
-        total_created = 0
-        skipped_one_time = 0
-        for template in queryset:
-            if template.recurrence == 'none':
-                skipped_one_time += 1
-                continue
-            created = template.generate_upcoming_sessions(horizon_days=60)
-            total_created += len(created)
+        templates = list(queryset)
+        skipped_one_time = sum(1 for template in templates if template.recurrence == 'none')
+        total_created = len(generate_sessions(templates, horizon_days=60))
         if total_created:
             self.message_user(request, f'Created {total_created} upcoming session(s).', messages.SUCCESS)
         if skipped_one_time:
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class ClientsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'clients'
+
+    def ready(self):
+        # Keep ClientRollup current as notes, documents and punches change.
+        from . import rollups  # noqa: F401
+        # Per-day dashboard counters, bumped as clients, documents and notes are written.
+        from . import dashboard_stats  # noqa: F401
+        # Keeps the in-process client search index in step with client writes.
+        from . import client_search  # noqa: F401
+        # Drops cached worker sessions and ticker payloads as accounts and punches change.
+        from . import worker_sessions  # noqa: F401
+        # Re-rolls the worker's day in WorkerDailyTimesheet whenever a punch is written.
+        from . import timesheets  # noqa: F401
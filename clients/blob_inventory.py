@@ -0,0 +1,149 @@
+"""
+Local inventory of the blob container (BlobInventoryItem rows).
+
+A paged list_blobs sweep (`manage.py sync_blob_inventory`, nightly) records
+name, size, etag and last-modified for every blob; uploads and deletes through
+AzurePrivateStorage adjust single rows in between. Existence checks, admin
+verification and the reconciliation report read the table and compare name
+sets in memory instead of sending a HEAD request per file.
+"""
+import logging
+
+from django.utils import timezone
+
+from .models import BlobInventoryItem, Client, Document
+from .models_extensions import MapSnapshotAsset, StaffTicketAttachment, WorkerTimePunch
+from .storage import _candidate_blob_paths, _container_name, _get_blob_service
+
+logger = logging.getLogger('clients')
+
+
+def sync_blob_inventory(page_size=5000):
+    """
+    Sweep the container page by page, upserting each page into the inventory.
+
+    Rows not seen by this sweep (and not re-recorded by an upload while it
+    ran) are deleted at the end. Returns (blobs_seen, rows_removed), or None
+    when Azure storage is not configured.
+    """
+    service, _account_name, container_name = _get_blob_service()
+    if not service:
+        return None
+    sweep_started = timezone.now()
+    container = service.get_container_client(container_name)
+    seen = 0
+    for page in container.list_blobs(results_per_page=page_size).by_page():
+        items = [
+            BlobInventoryItem(
+                name=blob.name,
+                size=blob.size,
+                etag=(blob.etag or '').strip('"'),
+                last_modified=blob.last_modified,
+                seen_at=timezone.now(),
+            )
+            for blob in page
+        ]
+        if not items:
+            continue
+        BlobInventoryItem.objects.bulk_create(
+            items,
+            update_conflicts=True,
+            unique_fields=['name'],
+            update_fields=['size', 'etag', 'last_modified', 'seen_at'],
+        )
+        seen += len(items)
+    removed, _ = BlobInventoryItem.objects.filter(seen_at__lt=sweep_started).delete()
+    return seen, removed
+
+
+def record_blob(name, size=None):
+    """Upsert one blob right after it is written, so other processes see it without a sweep."""
+    now = timezone.now()
+    try:
+        BlobInventoryItem.objects.update_or_create(
+            name=name,
+            defaults={'size': size, 'etag': '', 'last_modified': now, 'seen_at': now},
+        )
+    except Exception as exc:
+        # The upload itself succeeded; the next sweep will pick the blob up.
+        logger.warning('Blob inventory update failed for %s: %s', name, exc)
+
+
+def forget_blob_record(name):
+    try:
+        BlobInventoryItem.objects.filter(name=name).delete()
+    except Exception as exc:
+        logger.warning('Blob inventory delete failed for %s: %s', name, exc)
+
+
+def inventory_blob_names():
+    """Every inventoried blob name, or None before the first sweep has run."""
+    # record_blob rows carry no etag; until a sweep has stored one, the table
+    # only lists recent uploads, not the container.
+    if not BlobInventoryItem.objects.exclude(etag='').exists():
+        return None
+    return set(BlobInventoryItem.objects.values_list('name', flat=True).iterator(chunk_size=5000))
+
+
+def recorded_blob_path(paths):
+    """First of `paths` with an inventory row (one indexed query), else None."""
+    found = set(BlobInventoryItem.objects.filter(name__in=paths).values_list('name', flat=True))
+    return next((path for path in paths if path in found), None)
+
+
+def resolve_blob_path(blob_name, names):
+    """First of the exact/alternate paths for `blob_name` present in `names`, else None."""
+    for path in _candidate_blob_paths(blob_name, _container_name()):
+        if path in names:
+            return path
+    return None
+
+
+def _referenced_file_names():
+    """(model, pk, stored name) for every FileField value that should have a blob."""
+    sources = [
+        (Document, 'file'),
+        (Client, 'resume'),
+        (StaffTicketAttachment, 'file'),
+        (WorkerTimePunch, 'clock_in_map_image'),
+        (WorkerTimePunch, 'clock_out_map_image'),
+        (MapSnapshotAsset, 'image'),
+    ]
+    for model, field in sources:
+        rows = (
+            model.objects.exclude(**{field: ''})
+            .exclude(**{f'{field}__isnull': True})
+            .order_by()
+            .values_list('pk', field)
+            .iterator(chunk_size=5000)
+        )
+        for pk, name in rows:
+            yield model, pk, name
+
+
+def reconcile_blob_inventory():
+    """
+    Compare stored file names with the inventory using set operations.
+
+    Returns {'blobs': int, 'missing': [(model label, pk, name)], 'orphaned': [name]}:
+    `missing` are rows whose file resolves to no inventoried blob (alternate
+    documents/ and resumes/ paths included), `orphaned` are blobs no row
+    references. None when the inventory has never been built.
+    """
+    names = inventory_blob_names()
+    if names is None:
+        return None
+    referenced = set()
+    missing = []
+    for model, pk, name in _referenced_file_names():
+        path = resolve_blob_path(name, names)
+        if path is None:
+            missing.append((model._meta.label, pk, name))
+        else:
+            referenced.add(path)
+    return {
+        'blobs': len(names),
+        'missing': missing,
+        'orphaned': sorted(names - referenced),
+    }
+
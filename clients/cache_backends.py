@@ -0,0 +1,131 @@
+"""
+SQLite cache backend shared by every process on one box.
+
+Used as CACHES['default'] when REDIS_URL is not set (config/simple_settings.py):
+the gunicorn workers and the job worker open the same file, so throttles and
+cached reads are shared instead of living in one worker's LocMem. add(), incr()
+and set() are single SQL statements on an autocommit connection, so they are
+atomic across processes the way Redis SETNX / INCRBY are; integers are stored
+as SQLite integers (everything else pickled) so incr() can be done in SQL.
+"""
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_SCHEMA = 'CREATE TABLE IF NOT EXISTS cache_entry (key TEXT PRIMARY KEY, value, expires REAL)'
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = os.path.abspath(location)
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread and per process; a forked child opens its own.
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        conn = sqlite3.connect(self._path, timeout=10, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(_SCHEMA)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _encode(self, value):
+        if type(value) is int:
+            return value
+        return pickle.dumps(value, self.pickle_protocol)
+
+    @staticmethod
+    def _decode(stored):
+        if isinstance(stored, int):
+            return stored
+        return pickle.loads(stored)
+
+    def _key(self, key, version):
+        return self.make_and_validate_key(key, version=version)
+
+    def get(self, key, default=None, version=None):
+        row = self._connection().execute(
+            'SELECT value FROM cache_entry WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self._key(key, version), time.time()),
+        ).fetchone()
+        return default if row is None else self._decode(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO cache_entry (key, value, expires) VALUES (?, ?, ?)',
+            (self._key(key, version), self._encode(value), self.get_backend_timeout(timeout)),
+        )
+        self._maybe_cull()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # Insert, or take over a row that has expired; a live row is left alone.
+        cursor = self._connection().execute(
+            'INSERT INTO cache_entry (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+            'WHERE cache_entry.expires IS NOT NULL AND cache_entry.expires <= ?',
+            (self._key(key, version), self._encode(value), self.get_backend_timeout(timeout), time.time()),
+        )
+        self._maybe_cull()
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        row = self._connection().execute(
+            "UPDATE cache_entry SET value = value + ? "
+            "WHERE key = ? AND typeof(value) = 'integer' AND (expires IS NULL OR expires > ?) "
+            'RETURNING value',
+            (delta, self._key(key, version), time.time()),
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Key '{key}' not found")
+        return row[0]
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._connection().execute(
+            'UPDATE cache_entry SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), self._key(key, version), time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        cursor = self._connection().execute(
+            'DELETE FROM cache_entry WHERE key = ?', (self._key(key, version),)
+        )
+        return cursor.rowcount == 1
+
+    def has_key(self, key, version=None):
+        return self.get(key, self, version=version) is not self
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache_entry')
+
+    def _maybe_cull(self):
+        # Expired rows are skipped on read; sweep them on roughly one write in
+        # a hundred, and trim the soonest-to-expire rows past MAX_ENTRIES.
+        if random.random() > 0.01:
+            return
+        conn = self._connection()
+        conn.execute('DELETE FROM cache_entry WHERE expires IS NOT NULL AND expires <= ?', (time.time(),))
+        (count,) = conn.execute('SELECT COUNT(*) FROM cache_entry').fetchone()
+        if count > self._max_entries:
+            conn.execute(
+                'DELETE FROM cache_entry WHERE key IN ('
+                'SELECT key FROM cache_entry ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
+
+    def close(self, **kwargs):
+        # Keep the per-thread connection open across requests; SQLite opens are not free.
+        pass
@@ -123,8 +123,9 @@ def citybuild_item_present(code, source, present_doc_types, has_resume, case_not
 
 
 def present_doc_types_for_client(client):
-    """Doc types on file for one client (DB only, no blob calls)."""
-    present = set(client.documents.exclude(file='').values_list('doc_type', flat=True))
+    """Doc types on file for one client (DB only, no blob calls; read from its rollup)."""
+    rollup = client.rollup_or_none
+    present = set(rollup.doc_types) if rollup is not None else set()
     if client.resume or 'resume' in present:
         present.add('resume')
     return present
@@ -0,0 +1,101 @@
+"""
+Bulk session generation for recurring classes.
+
+Recurrence rules are expanded once per distinct rule (weekly on X, monthly on
+the Nth X) over the horizon, and templates sharing a rule share the dates.
+Every missing (template, date) session across all templates is then inserted
+with one bulk_create: the sessions that already exist in the window are read
+in one query, and the unique (template, date, start time) constraint with
+ignore_conflicts keeps a concurrent run from double-booking a slot.
+
+`manage.py generate_class_sessions` runs it daily for all active recurring
+classes with a rolling horizon; the admin action and the staff "extend
+schedule" button call it for the chosen templates.
+"""
+from calendar import monthrange
+from datetime import date, timedelta
+from functools import lru_cache
+
+from django.utils import timezone
+
+from .models_classes import ClassSession, ClassTemplate
+
+DEFAULT_HORIZON_DAYS = 60
+BULK_BATCH_SIZE = 500
+
+
+@lru_cache(maxsize=256)
+def _expand_rule(recurrence, weekday, week_of_month, start, end):
+    if weekday is None:
+        return ()
+    if recurrence == 'weekly':
+        first = start + timedelta(days=(weekday - start.weekday()) % 7)
+        return tuple(first + timedelta(days=7 * n) for n in range(((end - first).days // 7) + 1))
+    if recurrence != 'monthly' or not week_of_month:
+        return ()
+    dates = []
+    year, month = start.year, start.month
+    while date(year, month, 1) <= end:
+        offset = (weekday - date(year, month, 1).weekday()) % 7
+        day_number = 1 + offset + (week_of_month - 1) * 7
+        if day_number <= monthrange(year, month)[1]:
+            candidate = date(year, month, day_number)
+            if start <= candidate <= end:
+                dates.append(candidate)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return tuple(dates)
+
+
+def recurrence_dates(template, start, end):
+    """Dates in [start, end] that the template's recurrence rule lands on."""
+    if start > end:
+        return ()
+    return _expand_rule(
+        template.recurrence,
+        template.recurrence_weekday,
+        template.recurrence_week_of_month,
+        start,
+        end,
+    )
+
+
+def generate_sessions(templates=None, horizon_days=DEFAULT_HORIZON_DAYS, today=None):
+    """
+    Insert the missing sessions from today through today + horizon_days for
+    `templates` (default: every active recurring template); inactive and
+    one-time templates are ignored. Returns the new ClassSession objects in
+    date order.
+    """
+    today = today or timezone.localdate()
+    end = today + timedelta(days=horizon_days)
+    if templates is None:
+        templates = ClassTemplate.objects.filter(is_active=True).exclude(recurrence='none')
+    templates = [t for t in templates if t.is_active and t.recurrence != 'none']
+    if not templates:
+        return []
+
+    existing = set(
+        ClassSession.objects.filter(
+            template__in=templates,
+            session_date__gte=today,
+            session_date__lte=end,
+        ).values_list('template_id', 'session_date')
+    )
+    sessions = [
+        ClassSession(
+            template=template,
+            session_date=session_date,
+            start_time=template.start_time,
+            end_time=template.end_time,
+            location=template.location,
+            facilitator=template.facilitator,
+            capacity=template.capacity,
+        )
+        for template in templates
+        for session_date in recurrence_dates(template, today, end)
+        if (template.pk, session_date) not in existing
+    ]
+    if sessions:
+        ClassSession.objects.bulk_create(sessions, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+    sessions.sort(key=lambda session: (session.session_date, session.start_time))
+    return sessions
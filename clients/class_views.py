@@ -22,6 +22,7 @@ from rest_framework.response import Response
 from .dashboard_views import _staff_guard
 from .models import Client
 from .models_classes import ClassEnrollment, ClassSession, ClassTemplate
+from .pagination import InvalidCursor, keyset_page, page_params
 from .staff_auth import StaffSessionAuthentication
 from .staff_utils import staff_display_name
 
@@ -31,6 +32,7 @@ WEEKDAY_VALUES = {value for value, _ in ClassTemplate.WEEKDAY_CHOICES}
 WEEK_OF_MONTH_VALUES = {value for value, _ in ClassTemplate.WEEK_OF_MONTH_CHOICES}
 ENROLLMENT_STATUS_VALUES = {value for value, _ in ClassEnrollment.STATUS_CHOICES}
 SESSION_STATUS_VALUES = {value for value, _ in ClassSession.STATUS_CHOICES}
+UPCOMING_SESSION_ORDERING = ('session_date', 'start_time', 'id')
 
 
 def _template_summary(template):
@@ -99,14 +101,18 @@ def staff_upcoming_classes(request):
                 'enrollments', filter=Q(enrollments__status__in=['registered', 'attended'])
             )
         )
-        .order_by('session_date', 'start_time')
     )
 
     category = (request.GET.get('category') or '').strip()
     if category:
         sessions = sessions.filter(template__category=category)
 
-    return Response({'results': [_session_summary(s) for s in sessions]})
+    cursor, limit = page_params(request, 200, 500)
+    try:
+        sessions, next_cursor = keyset_page(sessions, UPCOMING_SESSION_ORDERING, cursor, limit)
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'results': [_session_summary(s) for s in sessions], 'next_cursor': next_cursor})
 
 
 @api_view(['GET'])
@@ -246,11 +252,11 @@ def staff_class_enroll(request, session_id):
             session=session, client=client, registered_by=staff_display_name(request.user)
         )
 
-    from .notifications import send_class_confirmation
+    from .notifications import queue_class_confirmation
 
-    text_outcome, text_detail = send_class_confirmation(client, session, enrollment)
+    text_outcome, text_detail = queue_class_confirmation(client, session, enrollment)
     message = f'Added {client.full_name} to {session.template.name} on {session.session_date}.'
-    if text_outcome == 'sent':
+    if text_outcome in ('sent', 'queued'):
         message = f'{message} {text_detail}'
 
     return Response(
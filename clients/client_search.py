@@ -0,0 +1,423 @@
+"""
+Ranked, typo-tolerant client search for the staff client list and the admin.
+
+Client.search_text holds the normalized words of first/last name, email and
+staff name (kept in sync on save, like phone_digits). Both backends require
+every query word to match some word of the client, score each match, and sort
+by total score, then most recently updated:
+
+- PostgreSQL: `search_text %> word` per word, answered from a pg_trgm GIN
+  index (migration 0055), ranked by trigram word similarity plus a
+  SearchVector rank.
+- SQLite: a per-process n-gram index (trigram -> words -> clients) built on
+  first search, updated by the save/delete signals below, and caught up from
+  the database when another process bumps the shared-cache generation.
+
+A word matches exactly, as a prefix, as a substring, by trigram similarity,
+or (four letters and up) within one typo ("Jonh" -> "john"). Digits in the
+query filter on phone_digits instead.
+"""
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Client
+
+SEARCH_SOURCE_FIELDS = ('first_name', 'last_name', 'email', 'staff_name')
+TRIGRAM_THRESHOLD = 0.3
+GENERATION_KEY = 'client-search:generation'
+# Ranked ids checked per query against program/stage filters in the database.
+CANDIDATE_CHUNK = 500
+WORD_MEMO_SIZE = 2048
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def _words(text):
+    text = unicodedata.normalize('NFKD', str(text or '')).encode('ascii', 'ignore').decode('ascii')
+    return _WORD_RE.findall(text.lower())
+
+
+def search_text_for(client):
+    words = []
+    for field in SEARCH_SOURCE_FIELDS:
+        words.extend(word for word in _words(getattr(client, field)) if not word.isdigit())
+    return ' '.join(words)
+
+
+def sync_search_text(instance, save_kwargs):
+    """Refresh `instance.search_text` ahead of save(); widens update_fields like sync_phone_digits."""
+    instance.search_text = search_text_for(instance)
+    update_fields = save_kwargs.get('update_fields')
+    if update_fields and set(update_fields) & set(SEARCH_SOURCE_FIELDS):
+        save_kwargs['update_fields'] = set(update_fields) | {'search_text'}
+
+
+def parse_query(q):
+    """(words, digits) from a search box value."""
+    words = [word for word in _words(q) if not word.isdigit()]
+    digits = ''.join(character for character in str(q or '') if character.isdigit())
+    return words, digits
+
+
+def search_clients(queryset, q, limit):
+    """Clients from `queryset` matching `q`, best match first, at most `limit`."""
+    words, digits = parse_query(q)
+    if digits:
+        queryset = queryset.filter(phone_digits__contains=digits)
+    if not words:
+        return list(queryset.order_by('-updated_at')[:limit])
+    if connection.vendor == 'postgresql':
+        return list(_postgres_ranked(queryset, words)[:limit])
+
+    filtered = queryset.query.has_filters()
+    while True:
+        page = _filtered_page(queryset, words, limit) if filtered else client_index.ranked_ids(words, limit)[:limit]
+        found = queryset.in_bulk(page)
+        missing = [pk for pk in page if pk not in found]
+        if filtered or not missing:
+            return [found[pk] for pk in page if pk in found]
+        # Removed without a delete signal (raw SQL, a rolled-back transaction): drop and refill.
+        for pk in missing:
+            client_index.note_deleted(pk)
+
+
+def _filtered_page(queryset, words, limit):
+    """Best `limit` ranked ids that also pass the caller's filters, checked a chunk at a time."""
+    wanted = max(limit, CANDIDATE_CHUNK)
+    checked = 0
+    page = []
+    while True:
+        ranked = client_index.ranked_ids(words, limit=wanted)
+        for start in range(checked, len(ranked), CANDIDATE_CHUNK):
+            chunk = ranked[start:start + CANDIDATE_CHUNK]
+            allowed = set(queryset.filter(pk__in=chunk).values_list('pk', flat=True))
+            page.extend(pk for pk in chunk if pk in allowed)
+            if len(page) >= limit:
+                return page[:limit]
+        if len(ranked) < wanted:
+            return page
+        checked, wanted = len(ranked), wanted * 8
+
+
+def filter_clients(queryset, q):
+    """`queryset` narrowed to clients matching `q`, in whatever order the caller uses (admin)."""
+    words, digits = parse_query(q)
+    if digits:
+        queryset = queryset.filter(phone_digits__contains=digits)
+    if not words:
+        return queryset
+    if connection.vendor == 'postgresql':
+        return queryset.filter(_postgres_match(words))
+    return queryset.filter(pk__in=client_index.ranked_ids(words))
+
+
+def _postgres_match(words):
+    from django.contrib.postgres.lookups import TrigramWordSimilar
+
+    # Session-level, so it also holds when the caller evaluates the queryset later.
+    with connection.cursor() as cursor:
+        cursor.execute('SET pg_trgm.word_similarity_threshold = %s', [TRIGRAM_THRESHOLD])
+    match = Q()
+    for word in words:
+        match &= Q(TrigramWordSimilar(F('search_text'), Value(word)))
+    return match
+
+
+def _postgres_ranked(queryset, words):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+
+    text = ' '.join(words)
+    return (
+        queryset.filter(_postgres_match(words))
+        .annotate(
+            search_score=TrigramWordSimilarity(Value(text), 'search_text')
+            + SearchRank(
+                SearchVector('search_text', config='simple'),
+                SearchQuery(text, config='simple'),
+                output_field=FloatField(),
+            )
+        )
+        .order_by('-search_score', '-updated_at')
+    )
+
+
+def _trigrams(word):
+    padded = f'  {word} '
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+def _deletes(word):
+    return {word[:index] + word[index + 1:] for index in range(len(word))}
+
+
+def _within_one_edit(a, b):
+    """True when one insert, delete, substitution or adjacent swap turns `a` into `b`."""
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > 1:
+        return False
+    start = 0
+    while start < len(a) and a[start] == b[start]:
+        start += 1
+    if len(a) < len(b):
+        return a[start:] == b[start + 1:]
+    if a[start + 1:] == b[start + 1:]:
+        return True
+    return (
+        start + 1 < len(a)
+        and a[start] == b[start + 1]
+        and a[start + 1] == b[start]
+        and a[start + 2:] == b[start + 2:]
+    )
+
+
+# Per-word scores, in thousandths so totals group exactly; trigram similarity
+# scores fall in between.
+EXACT, PREFIX, ONE_TYPO, SUBSTRING = 1000, 900, 750, 600
+
+
+class ClientNgramIndex:
+    """
+    In-process index over Client.search_text (the non-PostgreSQL backend).
+
+    Words map to clients; trigrams map to words, for prefix/substring and
+    similarity matches; one-letter deletions map to words, so one-edit typos
+    are found by lookup (symmetric delete) rather than by comparing against
+    the whole vocabulary.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.built = False
+        self._token_ids = {}
+        self._tokens = []
+        self._token_gram_counts = []
+        self._token_clients = []
+        self._gram_tokens = defaultdict(set)
+        self._delete_tokens = defaultdict(set)
+        self._client_tokens = {}
+        self._client_updated = {}
+        self._generation = None
+        self._watermark = None
+        # Token scores depend only on the vocabulary, which only grows.
+        self._memo = {}
+        self._memo_vocabulary = 0
+
+    def clear(self):
+        """Forget everything; the next search rebuilds from the database."""
+        with self._lock:
+            self._reset()
+
+    def _token_id(self, token):
+        token_id = self._token_ids.get(token)
+        if token_id is None:
+            token_id = len(self._tokens)
+            self._token_ids[token] = token_id
+            self._tokens.append(token)
+            self._token_clients.append(set())
+            grams = _trigrams(token)
+            self._token_gram_counts.append(len(grams))
+            for gram in grams:
+                self._gram_tokens[gram].add(token_id)
+            if len(token) >= 3:
+                for deleted in _deletes(token) | {token}:
+                    self._delete_tokens[deleted].add(token_id)
+        return token_id
+
+    def _put(self, client_id, search_text, updated_at):
+        self._discard(client_id)
+        token_ids = {self._token_id(token) for token in search_text.split()}
+        for token_id in token_ids:
+            self._token_clients[token_id].add(client_id)
+        self._client_tokens[client_id] = token_ids
+        self._client_updated[client_id] = updated_at.timestamp() if updated_at else 0.0
+        if updated_at and (self._watermark is None or updated_at > self._watermark):
+            self._watermark = updated_at
+
+    def _discard(self, client_id):
+        for token_id in self._client_tokens.pop(client_id, ()):
+            self._token_clients[token_id].discard(client_id)
+        self._client_updated.pop(client_id, None)
+
+    def build(self):
+        with self._lock:
+            self._reset()
+            self._generation = _current_generation()
+            rows = Client.objects.order_by().values_list('pk', 'search_text', 'updated_at')
+            for client_id, search_text, updated_at in rows.iterator(chunk_size=5000):
+                self._put(client_id, search_text, updated_at)
+            self.built = True
+
+    def _catch_up(self):
+        """Apply writes made by other processes since this index last looked."""
+        generation = _current_generation()
+        if generation == self._generation:
+            return
+        changed = Client.objects.order_by().values_list('pk', 'search_text', 'updated_at')
+        if self._watermark is not None:
+            changed = changed.filter(updated_at__gte=self._watermark)
+        for client_id, search_text, updated_at in changed.iterator(chunk_size=5000):
+            self._put(client_id, search_text, updated_at)
+        if Client.objects.count() != len(self._client_tokens):
+            live = set(Client.objects.values_list('pk', flat=True).iterator(chunk_size=5000))
+            for client_id in set(self._client_tokens) - live:
+                self._discard(client_id)
+        self._generation = generation
+
+    def note_saved(self, client):
+        with self._lock:
+            if self.built:
+                self._put(client.pk, client.search_text, client.updated_at)
+
+    def note_deleted(self, client_id):
+        with self._lock:
+            if self.built:
+                self._discard(client_id)
+
+    def note_generation(self, previous, current):
+        # Our own bump needs no catch-up unless another process bumped in between.
+        with self._lock:
+            if self._generation == previous:
+                self._generation = current
+
+    def _token_scores(self, word):
+        """{token id: score} for every indexed word that `word` matches (memoized per vocabulary)."""
+        if self._memo_vocabulary != len(self._tokens) or len(self._memo) >= WORD_MEMO_SIZE:
+            self._memo = {}
+            self._memo_vocabulary = len(self._tokens)
+        if word not in self._memo:
+            self._memo[word] = self._score_tokens(word)
+        return self._memo[word]
+
+    def _score_tokens(self, word):
+        grams = _trigrams(word)
+        shared_counts = Counter()
+        for gram in grams:
+            shared_counts.update(self._gram_tokens.get(gram, ()))
+        # Fewer shared trigrams than this rules out a substring and the similarity threshold.
+        min_shared = max(1, min(len(grams) - 3, math.ceil(TRIGRAM_THRESHOLD * len(grams))))
+        token_scores = {}
+        tokens, gram_counts = self._tokens, self._token_gram_counts
+        for token_id, shared in shared_counts.items():
+            if shared < min_shared:
+                continue
+            token = tokens[token_id]
+            if token == word:
+                token_scores[token_id] = EXACT
+            elif token.startswith(word):
+                token_scores[token_id] = PREFIX
+            elif len(word) >= 3 and word in token:
+                token_scores[token_id] = SUBSTRING
+            else:
+                similarity = shared / (len(grams) + gram_counts[token_id] - shared)
+                if similarity >= TRIGRAM_THRESHOLD:
+                    token_scores[token_id] = int(similarity * 1000)
+        if len(word) >= 4:
+            for deleted in _deletes(word) | {word}:
+                for token_id in self._delete_tokens.get(deleted, ()):
+                    if token_scores.get(token_id, 0) < ONE_TYPO and _within_one_edit(word, self._tokens[token_id]):
+                        token_scores[token_id] = ONE_TYPO
+        return token_scores
+
+    def _levels(self, token_scores):
+        """(score, client ids) best-first; each client at the best score any of its words got."""
+        by_score = defaultdict(list)
+        for token_id, score in token_scores.items():
+            by_score[score].append(token_id)
+        seen = set()
+        for score in sorted(by_score, reverse=True):
+            level = set().union(*(self._token_clients[token_id] for token_id in by_score[score]))
+            level.difference_update(seen)
+            seen.update(level)
+            yield score, level
+
+    def _ranked(self, levels, limit):
+        ranked = []
+        recency = self._client_updated.__getitem__
+        for _, level in levels:
+            if limit is not None and len(level) > 4 * (limit - len(ranked)):
+                ranked.extend(heapq.nlargest(limit - len(ranked), level, key=recency))
+                return ranked
+            ranked.extend(sorted(level, key=recency, reverse=True))
+            if limit is not None and len(ranked) >= limit:
+                break
+        return ranked
+
+    def ranked_ids(self, words, limit=None):
+        """
+        Client ids matching every word, best total score first, then most
+        recently updated; with `limit`, at least the best `limit` (fewer only
+        when that is every match).
+        """
+        with self._lock:
+            if not self.built:
+                self.build()
+            else:
+                self._catch_up()
+            token_scores = [self._token_scores(word) for word in words]
+            if len(words) == 1:
+                return self._ranked(self._levels(token_scores[0]), limit)
+
+            # Start from the word matching the fewest clients and only carry forward
+            # clients every later word also matches (set intersections, level by level).
+            token_scores.sort(key=lambda scores: sum(len(self._token_clients[token_id]) for token_id in scores))
+            totals = {}
+            for score, level in self._levels(token_scores[0]):
+                totals.update(dict.fromkeys(level, score))
+            for scores in token_scores[1:]:
+                candidates = set(totals)
+                narrowed = {}
+                for score, level in self._levels(scores):
+                    for client_id in level & candidates:
+                        narrowed[client_id] = totals[client_id] + score
+                totals = narrowed
+            by_total = defaultdict(set)
+            for client_id, total in totals.items():
+                by_total[total].add(client_id)
+            return self._ranked(sorted(by_total.items(), reverse=True), limit)
+
+
+client_index = ClientNgramIndex()
+
+
+def _current_generation():
+    return cache.get(GENERATION_KEY, 0)
+
+
+def _bump_generation():
+    previous = _current_generation()
+    cache.add(GENERATION_KEY, 0, None)
+    try:
+        current = cache.incr(GENERATION_KEY)
+    except ValueError:
+        return
+    client_index.note_generation(previous, current)
+
+
+@receiver(post_save, sender=Client, dispatch_uid='client_search_client_saved')
+def _client_saved(sender, instance, **kwargs):
+    if connection.vendor == 'postgresql':
+        return
+    client_index.note_saved(instance)
+    _bump_generation()
+
+
+@receiver(post_delete, sender=Client, dispatch_uid='client_search_client_deleted')
+def _client_deleted(sender, instance, **kwargs):
+    if connection.vendor == 'postgresql':
+        return
+    client_index.note_deleted(instance.pk)
+    _bump_generation()
@@ -0,0 +1,369 @@
+"""
+Materialized dashboard numbers.
+
+Writes bump per-day buckets as they happen: DashboardDailyCounter holds clients
+created, documents uploaded and notes written per local day, and
+DashboardDailyMember records which clients were updated and which staff signed
+in, so those windows count each person once. The running totals (clients by
+status, clients with a resume, notes, documents) are counter rows too, filed
+under TOTALS_DAY and adjusted by the same signals. A snapshot is built from
+one read of the totals plus at most 30 days of buckets, and cached in the
+shared cache under a version that only writes changing a dashboard number
+bump; saving a client whose status and resume are unchanged, already counted
+as updated today, leaves it cached. A polling tab gets a 304 or a cache hit
+instead of fourteen COUNT(*)s.
+
+`manage.py compact_dashboard_stats` (nightly) drops member rows older than the
+30-day window and old counters and recounts the totals; --rebuild also
+recomputes buckets from the source timestamps after bulk imports, which skip
+the signals.
+"""
+import time
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Greatest, TruncDate
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import CaseNote, Client, DashboardDailyCounter, DashboardDailyMember, Document
+
+CLIENTS_CREATED = 'clients_created'
+DOCUMENTS_UPLOADED = 'documents_uploaded'
+CASE_NOTES_WRITTEN = 'case_notes_written'
+CLIENTS_UPDATED = 'clients_updated'
+STAFF_ACTIVE = 'staff_active'
+
+TOTAL_CLIENTS = 'total_clients'
+ACTIVE_CLIENTS = 'active_clients'
+PENDING_CLIENTS = 'pending_clients'
+COMPLETED_CLIENTS = 'completed_clients'
+CLIENTS_WITH_RESUME = 'clients_with_resume'
+TOTAL_CASE_NOTES = 'total_case_notes'
+TOTAL_DOCUMENTS = 'total_documents'
+
+EVENT_METRICS = (CLIENTS_CREATED, DOCUMENTS_UPLOADED, CASE_NOTES_WRITTEN)
+MEMBER_METRICS = (CLIENTS_UPDATED, STAFF_ACTIVE)
+STATUS_METRICS = {'active': ACTIVE_CLIENTS, 'pending': PENDING_CLIENTS, 'completed': COMPLETED_CLIENTS}
+CLIENT_TOTAL_METRICS = (TOTAL_CLIENTS, *STATUS_METRICS.values(), CLIENTS_WITH_RESUME)
+TOTAL_METRICS = (*CLIENT_TOTAL_METRICS, TOTAL_CASE_NOTES, TOTAL_DOCUMENTS)
+WINDOW_DAYS = (7, 30)
+# Counter rows holding running totals rather than one day's events.
+TOTALS_DAY = date(1970, 1, 1)
+# Client fields a dashboard total depends on.
+CLIENT_TOTAL_FIELDS = ('status', 'resume')
+
+VERSION_KEY = 'dashboard-stats:version'
+# Bulk writes skip the signals, so no snapshot outlives this many seconds.
+SNAPSHOT_TTL = 300
+
+
+def bump_counter(metric, day=None, amount=1):
+    day = day or timezone.localdate()
+    # Floored at zero: a total that drifted (bulk deletes) must not go negative.
+    value = Greatest(F('value') + amount, Value(0)) if amount < 0 else F('value') + amount
+    if DashboardDailyCounter.objects.filter(day=day, metric=metric).update(value=value):
+        return
+    try:
+        with transaction.atomic():
+            DashboardDailyCounter.objects.create(day=day, metric=metric, value=max(amount, 0))
+    except IntegrityError:
+        # Another request created today's bucket first.
+        DashboardDailyCounter.objects.filter(day=day, metric=metric).update(value=value)
+
+
+def adjust_totals(changes):
+    """Apply {metric: delta} to the running totals; returns True if any changed."""
+    changed = False
+    for metric, delta in changes.items():
+        if delta:
+            bump_counter(metric, TOTALS_DAY, delta)
+            changed = True
+    return changed
+
+
+def _client_totals_counts():
+    return Client.objects.aggregate(
+        **{TOTAL_CLIENTS: Count('pk')},
+        **{metric: Count('pk', filter=Q(status=status)) for status, metric in STATUS_METRICS.items()},
+        **{CLIENTS_WITH_RESUME: Count('pk', filter=~Q(resume=''))},
+    )
+
+
+def _store_totals(counts):
+    DashboardDailyCounter.objects.bulk_create(
+        [DashboardDailyCounter(day=TOTALS_DAY, metric=metric, value=value) for metric, value in counts.items()],
+        update_conflicts=True,
+        unique_fields=['day', 'metric'],
+        update_fields=['value'],
+    )
+
+
+def refresh_client_totals():
+    """Recount the client totals (one aggregate), e.g. after a QuerySet.update() of status."""
+    _store_totals(_client_totals_counts())
+    invalidate_snapshot()
+
+
+def rebuild_totals():
+    """Recount every running total from the source tables. Returns {metric: value}."""
+    counts = {
+        **_client_totals_counts(),
+        TOTAL_CASE_NOTES: CaseNote.objects.count(),
+        TOTAL_DOCUMENTS: Document.objects.count(),
+    }
+    _store_totals(counts)
+    return counts
+
+
+def record_member(metric, member_id, day=None):
+    """
+    Note `member_id` as active today; the day's counter goes up only the
+    first time. Returns True when this was the first time.
+    """
+    day = day or timezone.localdate()
+    # The shared cache answers repeat saves; the unique constraint still decides after an eviction.
+    if not cache.add(f'dashboard-member:{metric}:{day:%Y%m%d}:{member_id}', 1, 2 * 24 * 3600):
+        return False
+    try:
+        with transaction.atomic():
+            DashboardDailyMember.objects.create(day=day, metric=metric, member_id=member_id)
+    except IntegrityError:
+        return False
+    bump_counter(metric, day)
+    return True
+
+
+def invalidate_snapshot():
+    _snapshot_version()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Evicted between the two calls; a fresh time-based version is just as new.
+        _snapshot_version()
+
+
+def _snapshot_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seeded from the clock so a version lost to eviction never reuses an old number.
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _snapshot_tag():
+    # Write version, local day (windows roll at midnight) and TTL slot.
+    slot = int(time.time() // SNAPSHOT_TTL)
+    return f'dash-{_snapshot_version()}-{timezone.localdate():%Y%m%d}-{slot}'
+
+
+def stats_etag():
+    return f'"{_snapshot_tag()}"'
+
+
+def etag_matches(request, etag):
+    candidates = [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]
+    return etag in candidates or '*' in candidates
+
+
+def window_counts(today=None):
+    """{'<metric>_7d': n, '<metric>_30d': n} for every metric, from the daily buckets."""
+    today = today or timezone.localdate()
+    starts = {days: today - timedelta(days=days - 1) for days in WINDOW_DAYS}
+    oldest = starts[max(WINDOW_DAYS)]
+    counts = {f'{metric}_{days}d': 0 for metric in EVENT_METRICS + MEMBER_METRICS for days in WINDOW_DAYS}
+
+    events = (
+        DashboardDailyCounter.objects.filter(day__gte=oldest, metric__in=EVENT_METRICS)
+        .order_by()
+        .values('metric')
+        .annotate(**{f'd{days}': Sum('value', filter=Q(day__gte=start)) for days, start in starts.items()})
+    )
+    members = (
+        DashboardDailyMember.objects.filter(day__gte=oldest)
+        .order_by()
+        .values('metric')
+        .annotate(
+            **{
+                f'd{days}': Count('member_id', distinct=True, filter=Q(day__gte=start))
+                for days, start in starts.items()
+            }
+        )
+    )
+    for row in [*events, *members]:
+        for days in WINDOW_DAYS:
+            counts[f"{row['metric']}_{days}d"] = row[f'd{days}'] or 0
+    return counts
+
+
+def build_snapshot():
+    totals = dict(
+        DashboardDailyCounter.objects.filter(day=TOTALS_DAY, metric__in=TOTAL_METRICS).values_list('metric', 'value')
+    )
+    return {
+        **{metric: totals.get(metric, 0) for metric in TOTAL_METRICS},
+        **window_counts(),
+    }
+
+
+def dashboard_snapshot():
+    """(payload, etag): the cached dashboard numbers, built on a miss."""
+    tag = _snapshot_tag()
+    key = f'dashboard-stats:{tag}'
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_snapshot()
+        cache.set(key, payload, SNAPSHOT_TTL)
+    return payload, f'"{tag}"'
+
+
+def rebuild_daily_stats(days=30):
+    """
+    Recompute the last `days` of buckets from created_at / updated_at /
+    last_login. Only the latest client update and staff login are stored on
+    the source rows, so rebuilt member buckets hold one day per client or
+    staff member.
+    """
+    since_day = timezone.localdate() - timedelta(days=days - 1)
+    since = timezone.make_aware(datetime.combine(since_day, datetime.min.time()))
+
+    counters = {}
+    for metric, model in ((CLIENTS_CREATED, Client), (DOCUMENTS_UPLOADED, Document), (CASE_NOTES_WRITTEN, CaseNote)):
+        rows = (
+            model.objects.filter(created_at__gte=since)
+            .annotate(day=TruncDate('created_at'))
+            .order_by()
+            .values('day')
+            .annotate(total=Count('pk'))
+        )
+        for row in rows:
+            counters[(row['day'], metric)] = row['total']
+
+    members = []
+    member_sources = [
+        (CLIENTS_UPDATED, Client.objects.filter(updated_at__gte=since), 'updated_at'),
+        (STAFF_ACTIVE, get_user_model().objects.filter(is_staff=True, last_login__gte=since), 'last_login'),
+    ]
+    for metric, queryset, field in member_sources:
+        for pk, day in queryset.annotate(day=TruncDate(field)).order_by().values_list('pk', 'day').iterator():
+            members.append(DashboardDailyMember(day=day, metric=metric, member_id=pk))
+            counters[(day, metric)] = counters.get((day, metric), 0) + 1
+
+    with transaction.atomic():
+        DashboardDailyCounter.objects.filter(day__gte=since_day).delete()
+        DashboardDailyMember.objects.filter(day__gte=since_day).delete()
+        DashboardDailyCounter.objects.bulk_create(
+            [DashboardDailyCounter(day=day, metric=metric, value=value) for (day, metric), value in counters.items()],
+            batch_size=1000,
+        )
+        DashboardDailyMember.objects.bulk_create(members, batch_size=1000)
+    return len(counters), len(members)
+
+
+def compact_daily_stats(keep_days=400):
+    """Drop member rows outside the widest window and counters older than `keep_days`."""
+    today = timezone.localdate()
+    members, _ = DashboardDailyMember.objects.filter(
+        day__lt=today - timedelta(days=max(WINDOW_DAYS) - 1)
+    ).delete()
+    counters, _ = (
+        DashboardDailyCounter.objects.filter(day__lt=today - timedelta(days=keep_days))
+        .exclude(day=TOTALS_DAY)
+        .delete()
+    )
+    return members, counters
+
+
+def _loaded_total_fields(client):
+    # Read from __dict__ so deferred fields are not fetched.
+    return {field: client.__dict__[field] for field in CLIENT_TOTAL_FIELDS if field in client.__dict__}
+
+
+def _client_metrics(field, value):
+    if field == 'status':
+        return {STATUS_METRICS[value]} if value in STATUS_METRICS else set()
+    return {CLIENTS_WITH_RESUME} if value else set()
+
+
+@receiver(post_init, sender=Client, dispatch_uid='dashboard_stats_client_loaded')
+def _client_loaded(sender, instance, **kwargs):
+    # Remember what the client counts towards, so a save only touches totals it moved.
+    instance._dashboard_fields = _loaded_total_fields(instance)
+
+
+@receiver(post_save, sender=Client, dispatch_uid='dashboard_stats_client_saved')
+def _client_saved(sender, instance, created, update_fields=None, **kwargs):
+    previous = {} if created else getattr(instance, '_dashboard_fields', {})
+    current = _loaded_total_fields(instance)
+    changes = {TOTAL_CLIENTS: 1} if created else {}
+    unknown = False
+    for field, value in current.items():
+        if update_fields is not None and field not in update_fields:
+            continue
+        if not created and field not in previous:
+            # Deferred when loaded, then assigned: the old value is unknown.
+            unknown = True
+            continue
+        for metric in _client_metrics(field, previous.get(field)):
+            changes[metric] = changes.get(metric, 0) - 1
+        for metric in _client_metrics(field, value):
+            changes[metric] = changes.get(metric, 0) + 1
+    instance._dashboard_fields = {**previous, **current}
+
+    if created:
+        bump_counter(CLIENTS_CREATED)
+    if unknown:
+        _store_totals(_client_totals_counts())
+    newly_updated = record_member(CLIENTS_UPDATED, instance.pk)
+    if adjust_totals(changes) or unknown or newly_updated or created:
+        invalidate_snapshot()
+
+
+@receiver(post_delete, sender=Client, dispatch_uid='dashboard_stats_client_deleted')
+def _client_deleted(sender, instance, **kwargs):
+    loaded = _loaded_total_fields(instance)
+    if len(loaded) < len(CLIENT_TOTAL_FIELDS):
+        _store_totals(_client_totals_counts())
+    else:
+        changes = {TOTAL_CLIENTS: -1}
+        for field, value in loaded.items():
+            for metric in _client_metrics(field, value):
+                changes[metric] = -1
+        adjust_totals(changes)
+    invalidate_snapshot()
+
+
+@receiver(post_save, sender=Document, dispatch_uid='dashboard_stats_document_saved')
+def _document_saved(sender, instance, created, **kwargs):
+    if created:
+        bump_counter(DOCUMENTS_UPLOADED)
+        adjust_totals({TOTAL_DOCUMENTS: 1})
+        invalidate_snapshot()
+
+
+@receiver(post_save, sender=CaseNote, dispatch_uid='dashboard_stats_note_saved')
+def _note_saved(sender, instance, created, **kwargs):
+    if created:
+        bump_counter(CASE_NOTES_WRITTEN)
+        adjust_totals({TOTAL_CASE_NOTES: 1})
+        invalidate_snapshot()
+
+
+@receiver(post_delete, sender=Document, dispatch_uid='dashboard_stats_document_deleted')
+@receiver(post_delete, sender=CaseNote, dispatch_uid='dashboard_stats_note_deleted')
+def _counted_row_deleted(sender, **kwargs):
+    adjust_totals({TOTAL_DOCUMENTS if sender is Document else TOTAL_CASE_NOTES: -1})
+    invalidate_snapshot()
+
+
+@receiver(user_logged_in, dispatch_uid='dashboard_stats_staff_login')
+def _staff_logged_in(sender, user, **kwargs):
+    if user.is_staff:
+        record_member(STAFF_ACTIVE, user.pk)
+        invalidate_snapshot()
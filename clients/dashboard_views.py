@@ -7,11 +7,9 @@ business logic.
 """
 import io
 import logging
-from datetime import timedelta
 from pathlib import Path
 
 from django.contrib.admin.models import LogEntry
-from django.contrib.auth import get_user_model
 from django.core.files.base import ContentFile
 from django.db.models import Count
 from django.utils import timezone
@@ -21,7 +19,9 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from .dashboard_stats import dashboard_snapshot, etag_matches, stats_etag
 from .models import Client, Document, PitStopApplication
+from .pagination import InvalidCursor, keyset_page, page_params
 from .staff_auth import StaffSessionAuthentication
 from .staff_utils import staff_display_name
 from .views import (
@@ -31,7 +31,6 @@ from .views import (
 )
 
 logger = logging.getLogger('clients')
-User = get_user_model()
 
 # Conservative image compression: only resize when clearly larger than needed for
 # on-screen/print review, keep quality high so IDs and consent forms stay legible.
@@ -39,6 +38,8 @@ IMAGE_MAX_DIMENSION = 2000
 IMAGE_JPEG_QUALITY = 85
 COMPRESSIBLE_IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
 
+ACTIVITY_FEED_ORDERING = ('-action_time', '-id')
+
 
 def _staff_guard(request):
     """Return an error Response if the caller is not authenticated staff, else None."""
@@ -206,12 +207,14 @@ def dashboard_activity_feed(request):
     if err:
         return err
 
-    limit = min(int(request.GET.get('limit') or 15), 50)
+    cursor, limit = page_params(request, 15, 50)
     action_labels = {1: 'Added', 2: 'Changed', 3: 'Deleted'}
-    entries = list(
-        LogEntry.objects.select_related('user', 'content_type')
-        .order_by('-action_time')[:limit]
-    )
+    try:
+        entries, next_cursor = keyset_page(
+            LogEntry.objects.select_related('user', 'content_type'), ACTIVITY_FEED_ORDERING, cursor, limit
+        )
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
     client_ids = _client_ids_for_log_entries(entries)
     data = [
         {
@@ -228,6 +231,7 @@ def dashboard_activity_feed(request):
     ]
     return Response({
         'results': data,
+        'next_cursor': next_cursor,
         'source': 'admin_log_entry',
         'caveat': 'Admin panel activity only — Staff SPA, API, and kiosk changes are not captured.',
     })
@@ -237,25 +241,28 @@ def dashboard_activity_feed(request):
 @authentication_classes([StaffSessionAuthentication])
 @permission_classes([IsAuthenticated])
 def dashboard_usage_stats(request):
-    """Lightweight usage stats, sourced from existing timestamps (no second logging system)."""
+    """
+    Usage stats from the materialized daily counters (clients.dashboard_stats),
+    with an ETag so polling tabs get a 304 until something is written.
+    """
     err = _staff_guard(request)
     if err:
         return err
 
-    now = timezone.now()
-    since_7d = now - timedelta(days=7)
-    since_30d = now - timedelta(days=30)
-
+    etag = stats_etag()
+    if etag_matches(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    snapshot, etag = dashboard_snapshot()
     data = {
-        'total_active_clients': Client.objects.filter(status='active').count(),
-        'clients_updated_7d': Client.objects.filter(updated_at__gte=since_7d).count(),
-        'clients_updated_30d': Client.objects.filter(updated_at__gte=since_30d).count(),
-        'documents_uploaded_7d': Document.objects.filter(created_at__gte=since_7d).count(),
-        'documents_uploaded_30d': Document.objects.filter(created_at__gte=since_30d).count(),
-        'staff_active_7d': User.objects.filter(is_staff=True, last_login__gte=since_7d).count(),
-        'staff_active_30d': User.objects.filter(is_staff=True, last_login__gte=since_30d).count(),
+        'total_active_clients': snapshot['active_clients'],
+        'clients_updated_7d': snapshot['clients_updated_7d'],
+        'clients_updated_30d': snapshot['clients_updated_30d'],
+        'documents_uploaded_7d': snapshot['documents_uploaded_7d'],
+        'documents_uploaded_30d': snapshot['documents_uploaded_30d'],
+        'staff_active_7d': snapshot['staff_active_7d'],
+        'staff_active_30d': snapshot['staff_active_30d'],
     }
-    return Response(data)
+    return Response(data, headers={'ETag': etag})
 
 
 @api_view(['GET'])
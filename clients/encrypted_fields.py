@@ -1,36 +1,51 @@
 """Application-level encrypted model fields for sensitive client data."""
 
+from functools import lru_cache
+
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.db import models
+from django.db.models.query_utils import DeferredAttribute
 
 
 ENCRYPTED_PREFIX = "enc:"
 
 
-def _configured_fernet_keys():
-    """Return configured Fernet instances keyed by rotation id."""
+@lru_cache(maxsize=8)
+def _build_keyring(key_items):
     from cryptography.fernet import Fernet
 
+    return {key_id: Fernet(value.encode("ascii")) for key_id, value in key_items}
+
+
+def _configured_fernet_keys():
+    """
+    Return configured Fernet instances keyed by rotation id.
+
+    The keyring is parsed once per distinct SSN_ENCRYPTION_KEYS value and
+    reused by every encrypt/decrypt in the process; a changed setting (key
+    rotation, override_settings in tests) simply keys a fresh entry.
+    """
     configured = getattr(settings, "SSN_ENCRYPTION_KEYS", {})
     if not configured:
         return {}
     try:
-        return {str(key_id): Fernet(value.encode("ascii")) for key_id, value in configured.items()}
+        return _build_keyring(tuple(sorted((str(key_id), value) for key_id, value in configured.items())))
     except (AttributeError, TypeError, ValueError) as exc:
         raise ImproperlyConfigured(
             "SSN_ENCRYPTION_KEYS must map key ids to valid Fernet keys."
         ) from exc
 
 
-def encrypt_sensitive_value(value):
+def encrypt_sensitive_value(value, key_id=None):
+    """Encrypt under `key_id`, defaulting to SSN_ACTIVE_KEY_ID."""
     if value in (None, ""):
         return value
     if isinstance(value, str) and value.startswith(ENCRYPTED_PREFIX):
         return value
 
     keys = _configured_fernet_keys()
-    active_key_id = str(getattr(settings, "SSN_ACTIVE_KEY_ID", "v1"))
+    active_key_id = str(key_id or getattr(settings, "SSN_ACTIVE_KEY_ID", "v1"))
     if active_key_id not in keys:
         raise ImproperlyConfigured(
             f"SSN_ACTIVE_KEY_ID {active_key_id!r} is not configured in SSN_ENCRYPTION_KEYS."
@@ -62,13 +77,44 @@ def decrypt_sensitive_value(value):
         raise ValueError("Encrypted SSN could not be authenticated.") from exc
 
 
+class _SealedValue(str):
+    """Encrypted envelope as loaded from the database, not yet decrypted."""
+
+
+class _LazyDecryptAttribute(DeferredAttribute):
+    """Decrypt on first read of the attribute and keep the plaintext on the instance."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, _SealedValue):
+            value = decrypt_sensitive_value(str(value))
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        # A data descriptor, so __get__ runs even once the value is in __dict__.
+        instance.__dict__[self.field.attname] = value
+
+
 class EncryptedSSNField(models.TextField):
-    """Transparently encrypt SSNs before database persistence."""
+    """
+    Transparently encrypt SSNs before database persistence.
+
+    Loaded rows keep the ciphertext until `.ssn` is read, so exports and
+    changelists that never show the SSN skip decryption entirely.
+    values()/values_list() return the stored envelope; pass it through
+    decrypt_sensitive_value() when the plaintext is needed.
+    """
 
     description = "SSN encrypted with the configured application key"
+    descriptor_class = _LazyDecryptAttribute
 
     def from_db_value(self, value, expression, connection):
-        return decrypt_sensitive_value(value)
+        if isinstance(value, str) and value.startswith(ENCRYPTED_PREFIX):
+            return _SealedValue(value)
+        return value
 
     def to_python(self, value):
         return decrypt_sensitive_value(value)
@@ -0,0 +1,161 @@
+"""
+Database-backed background jobs.
+
+Request handlers call `enqueue()` for slow side effects (alert emails, SMS,
+static map downloads) and return straight away; `manage.py run_jobs`, started
+next to gunicorn in startup.sh, claims due BackgroundJob rows and runs them.
+There is no broker: the queue is a table, so it runs on the App Service box
+against the same database as the site.
+
+- A task is a plain function in this app, addressed by dotted path and called
+  with the JSON payload as keyword arguments. Raising schedules a retry with
+  exponential backoff until max_attempts; the return value is stored.
+- Enqueuing an idempotency key that already exists returns that job (a job
+  that failed for good is re-armed), so double submits queue one send.
+- Claims are conditional UPDATEs that take a lease (`locked_until`), so more
+  than one worker can run and a crashed worker's job is retried once its
+  lease runs out.
+- JOB_QUEUE_EAGER=True runs each job inline at enqueue time, for tests and
+  local development without a worker.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import BackgroundJob
+
+logger = logging.getLogger('clients')
+
+TASK_PREFIX = 'clients.'
+DEFAULT_LEASE_SECONDS = 300
+
+
+def retry_delay(attempts):
+    """Backoff before retry number `attempts` + 1: base, 2x base, 4x base ... capped."""
+    base = getattr(settings, 'JOB_RETRY_BASE_SECONDS', 30)
+    cap = getattr(settings, 'JOB_RETRY_MAX_SECONDS', 3600)
+    return timedelta(seconds=min(cap, base * 2 ** max(0, attempts - 1)))
+
+
+def enqueue(task, payload=None, *, idempotency_key=None, delay_seconds=0, max_attempts=5):
+    """
+    Queue `task(**payload)` and return (job, created).
+
+    `created` is False when `idempotency_key` already names a pending, running
+    or finished job; that job is returned untouched.
+    """
+    if not task.startswith(TASK_PREFIX):
+        raise ValueError(f'Background tasks must live in this app ({TASK_PREFIX}...), got {task!r}')
+    fields = {
+        'task': task,
+        'payload': payload or {},
+        'run_at': timezone.now() + timedelta(seconds=delay_seconds),
+        'max_attempts': max_attempts,
+    }
+
+    if idempotency_key:
+        try:
+            with transaction.atomic():
+                job, created = BackgroundJob.objects.get_or_create(
+                    idempotency_key=idempotency_key,
+                    defaults=fields,
+                )
+        except IntegrityError:
+            # Lost an insert race with a concurrent request for the same key.
+            job, created = BackgroundJob.objects.get(idempotency_key=idempotency_key), False
+        if not created and job.status == BackgroundJob.STATUS_FAILED:
+            created = bool(
+                BackgroundJob.objects.filter(pk=job.pk, status=BackgroundJob.STATUS_FAILED).update(
+                    **fields, status=BackgroundJob.STATUS_PENDING, attempts=0, last_error='', finished_at=None,
+                )
+            )
+            job.refresh_from_db()
+    else:
+        job, created = BackgroundJob.objects.create(**fields), True
+
+    if created and getattr(settings, 'JOB_QUEUE_EAGER', False):
+        if _claim(job, DEFAULT_LEASE_SECONDS):
+            run_job(job)
+    return job, created
+
+
+def _claim(job, lease_seconds):
+    """Take the lease on `job` if it is still pending (or its lease expired). True if we got it."""
+    now = timezone.now()
+    locked_until = now + timedelta(seconds=lease_seconds)
+    claimable = Q(status=BackgroundJob.STATUS_PENDING) | Q(
+        status=BackgroundJob.STATUS_RUNNING, locked_until__lt=now
+    )
+    claimed = BackgroundJob.objects.filter(claimable, pk=job.pk).update(
+        status=BackgroundJob.STATUS_RUNNING,
+        locked_until=locked_until,
+        attempts=F('attempts') + 1,
+    )
+    if not claimed:
+        return False
+    job.status = BackgroundJob.STATUS_RUNNING
+    job.locked_until = locked_until
+    job.attempts += 1
+    return True
+
+
+def run_job(job):
+    """Run one claimed job and record the outcome. Returns True on success."""
+    try:
+        result = import_string(job.task)(**job.payload)
+    except Exception as exc:
+        job.last_error = f'{type(exc).__name__}: {exc}'[:2000]
+        job.locked_until = None
+        if job.attempts >= job.max_attempts:
+            job.status = BackgroundJob.STATUS_FAILED
+            job.finished_at = timezone.now()
+            logger.error('Job %s (%s) failed for good after %s attempts: %s', job.pk, job.task, job.attempts, exc)
+        else:
+            job.status = BackgroundJob.STATUS_PENDING
+            job.run_at = timezone.now() + retry_delay(job.attempts)
+            logger.warning('Job %s (%s) attempt %s failed, retrying at %s: %s', job.pk, job.task, job.attempts, job.run_at, exc)
+        job.save(update_fields=['status', 'run_at', 'locked_until', 'last_error', 'finished_at'])
+        return False
+
+    job.status = BackgroundJob.STATUS_SUCCEEDED
+    job.result = result
+    job.last_error = ''
+    job.locked_until = None
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'last_error', 'locked_until', 'finished_at'])
+    return True
+
+
+def run_due_jobs(limit=20, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Claim and run up to `limit` due jobs, oldest first. Returns how many ran."""
+    now = timezone.now()
+    due = (
+        BackgroundJob.objects.filter(
+            Q(status=BackgroundJob.STATUS_PENDING)
+            | Q(status=BackgroundJob.STATUS_RUNNING, locked_until__lt=now),
+            run_at__lte=now,
+        )
+        .order_by('run_at', 'id')[:limit]
+    )
+    ran = 0
+    for job in list(due):
+        # Another worker may have claimed it since the SELECT; skip it if so.
+        if _claim(job, lease_seconds):
+            run_job(job)
+            ran += 1
+    return ran
+
+
+def purge_finished_jobs(keep_days=14):
+    """Delete succeeded jobs older than `keep_days`; failed ones stay for inspection."""
+    cutoff = timezone.now() - timedelta(days=keep_days)
+    deleted, _ = BackgroundJob.objects.filter(
+        status=BackgroundJob.STATUS_SUCCEEDED,
+        finished_at__lt=cutoff,
+    ).delete()
+    return deleted
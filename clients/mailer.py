@@ -0,0 +1,90 @@
+"""
+Notification mail layer: build messages up front, send a batch over one
+connection.
+
+django.core.mail.send_mail opens and closes a mail connection (an SMTP
+handshake and login) for every message. send_emails opens one connection for
+the whole batch and sends each message on it, so a bulk admin action that
+emails a hundred clients logs in once. Messages still go out one per
+send_messages call on that connection, so a rejected address fails only its
+own message.
+
+Transient failures (dropped connection, timeout, 4xx reply) close the
+connection, back off EMAIL_RETRY_BACKOFF_SECONDS (doubling), reconnect and
+retry the message, up to EMAIL_SEND_ATTEMPTS tries in all; permanent ones
+(5xx, refused recipient) are not retried.
+"""
+import logging
+import smtplib
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+logger = logging.getLogger('clients')
+
+DEFAULT_SEND_ATTEMPTS = 3
+DEFAULT_RETRY_BACKOFF_SECONDS = 1.0
+
+
+def _from_email():
+    return getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@missionhiringhall.org')
+
+
+def build_email(subject, plain, html, recipient):
+    """One EmailMultiAlternatives to a single recipient, with an HTML part when `html` is given."""
+    message = EmailMultiAlternatives(subject=subject, body=plain, from_email=_from_email(), to=[recipient])
+    if html:
+        message.attach_alternative(html, 'text/html')
+    return message
+
+
+def is_transient(exc):
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return False
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    return isinstance(exc, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError))
+
+
+def send_emails(messages, connection=None):
+    """
+    Send prepared EmailMessages over one connection (opened here unless one
+    is passed in). Returns one entry per message: None if it was sent, else
+    the exception that stopped it. Never raises for a send failure.
+    """
+    messages = list(messages)
+    if not messages:
+        return []
+    attempts = max(1, int(getattr(settings, 'EMAIL_SEND_ATTEMPTS', DEFAULT_SEND_ATTEMPTS)))
+    backoff = float(getattr(settings, 'EMAIL_RETRY_BACKOFF_SECONDS', DEFAULT_RETRY_BACKOFF_SECONDS))
+    owns_connection = connection is None
+    connection = connection or get_connection(fail_silently=False)
+
+    outcomes = []
+    try:
+        for message in messages:
+            message.connection = connection
+            error = None
+            for attempt in range(attempts):
+                try:
+                    connection.open()
+                    connection.send_messages([message])
+                    error = None
+                    break
+                except Exception as exc:
+                    error = exc
+                    if attempt + 1 == attempts or not is_transient(exc):
+                        break
+                    logger.warning('Email to %s failed (%s); retrying', ', '.join(message.to), exc)
+                    connection.close()
+                    time.sleep(backoff * 2 ** attempt)
+            if error is None:
+                logger.info('Email sent to %s: %s', ', '.join(message.to), message.subject)
+            else:
+                logger.error('Email failed to %s: %s', ', '.join(message.to), error, exc_info=error)
+            outcomes.append(error)
+    finally:
+        if owns_connection:
+            connection.close()
+    return outcomes
@@ -0,0 +1,28 @@
+"""
+Recompute the indexed phone_digits column on Client, WorkerAccount and StaffUser.
+
+save() keeps the column current and the migrations backfill existing rows; run
+this after bulk imports or raw SQL edits to `phone`. Safe to run repeatedly:
+    python manage.py backfill_phone_digits
+"""
+from django.core.management.base import BaseCommand
+
+from clients.models import Client
+from clients.models_extensions import WorkerAccount
+from clients.phone_utils import backfill_phone_digits
+from users.models import StaffUser
+
+
+class Command(BaseCommand):
+    help = 'Recompute normalized phone_digits for clients, worker accounts and staff users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        for model in (Client, WorkerAccount, StaffUser):
+            updated = backfill_phone_digits(model, batch_size=batch_size)
+            self.stdout.write(
+                self.style.SUCCESS(f'{model._meta.verbose_name_plural}: updated {updated} phone_digits values.')
+            )
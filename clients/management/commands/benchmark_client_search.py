@@ -0,0 +1,110 @@
+"""
+Measure staff client search latency.
+
+Seeds --clients temporary clients with generated names inside a transaction
+that is rolled back, then reports p50/p95 per query for:
+  - icontains OR across name/email/staff-name columns (previous staff search)
+  - clients.client_search (trigram index; typo-tolerant)
+Queries mix exact names, prefixes and one-typo names ("Jonh").
+
+    python manage.py benchmark_client_search --clients 200000 --queries 200
+"""
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from clients.client_search import client_index, search_clients, search_text_for
+from clients.models import Client
+
+FIRST_NAMES = [
+    'john', 'maria', 'james', 'linda', 'robert', 'patricia', 'michael', 'jennifer', 'david', 'elizabeth',
+    'william', 'barbara', 'richard', 'susan', 'joseph', 'jessica', 'thomas', 'sarah', 'carlos', 'karen',
+    'daniel', 'nancy', 'matthew', 'lisa', 'anthony', 'betty', 'mark', 'sandra', 'donald', 'ashley',
+    'luis', 'rosa', 'jose', 'ana', 'miguel', 'carmen', 'kevin', 'angela', 'brian', 'tamika',
+]
+# About two thousand distinct surnames, shaped like real ones (shared stems and endings).
+SURNAME_PARTS = (
+    ['and', 'bar', 'car', 'del', 'esp', 'fer', 'gal', 'har', 'jen', 'kow', 'lam', 'mar',
+     'nak', 'ols', 'pet', 'ram', 'sch', 'tan', 'vas', 'wil', 'yam', 'zim'],
+    ['a', 'e', 'i', 'o', 'u', 'ar', 'en', 'in', 'ol'],
+    ['son', 'ez', 'ski', 'man', 'berg', 'ton', 'ley', 'ini', 'ova', 'ard'],
+)
+SURNAMES = [start + middle + end for start in SURNAME_PARTS[0] for middle in SURNAME_PARTS[1] for end in SURNAME_PARTS[2]]
+EMAIL_DOMAINS = ['gmail.com', 'yahoo.com', 'hotmail.com', 'icloud.com', 'outlook.com']
+
+
+def _typo(word, rng):
+    index = rng.randrange(len(word) - 1)
+    return word[:index] + word[index + 1] + word[index] + word[index + 2:]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark staff client search (seeds and rolls back temporary rows)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=200000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=40)
+
+    def handle(self, *args, **options):
+        rng = random.Random(13)
+        rows = max(1, options['clients'])
+        limit = options['limit']
+        queries = []
+        for _ in range(max(1, options['queries'])):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(SURNAMES)
+            queries.append(
+                rng.choice([first, last, f'{first} {last}', last[:4], _typo(first, rng), f'{_typo(first, rng)} {last}'])
+            )
+
+        with transaction.atomic():
+            self._seed(rows, rng)
+            started = time.perf_counter()
+            client_index.build()
+            build_seconds = time.perf_counter() - started
+            results = [
+                ('icontains OR (previous)', self._time(queries, lambda q: self._icontains(q, limit))),
+                ('trigram index', self._time(queries, lambda q: search_clients(Client.objects.all(), q, limit))),
+            ]
+            transaction.set_rollback(True)
+        client_index.clear()
+
+        self.stdout.write(f'Index built over {rows:,} clients in {build_seconds:.2f}s')
+        for label, timings in results:
+            p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+            self.stdout.write(f'{label:<26} p50 {statistics.median(timings):>8.1f} ms   p95 {p95:>8.1f} ms')
+
+    def _seed(self, rows, rng):
+        batch = []
+        for index in range(rows):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(SURNAMES)
+            client = Client(
+                first_name=first.title(),
+                last_name=last.title(),
+                email=f'{first[0]}{last}{rng.randrange(100)}@{rng.choice(EMAIL_DOMAINS)}' if index % 2 else None,
+                phone=f'415555{index % 10000:04d}',
+                phone_digits=f'415555{index % 10000:04d}',
+                gender='P',
+            )
+            client.search_text = search_text_for(client)
+            batch.append(client)
+            if len(batch) == 5000:
+                Client.objects.bulk_create(batch)
+                batch = []
+        Client.objects.bulk_create(batch)
+
+    def _icontains(self, q, limit):
+        filters = Q(first_name__icontains=q) | Q(last_name__icontains=q) | Q(email__icontains=q) | Q(staff_name__icontains=q)
+        return list(Client.objects.filter(filters).order_by('-updated_at')[:limit])
+
+    def _time(self, queries, run):
+        timings = []
+        for q in queries:
+            started = time.perf_counter()
+            run(q)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
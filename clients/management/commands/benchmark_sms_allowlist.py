@@ -0,0 +1,98 @@
+"""
+Measure the SMS_INTERNAL_ONLY allowlist check for a batch of texts.
+
+Seeds --clients temporary clients inside a transaction that is rolled back,
+then times a --texts batch of checks (nine in ten to known numbers):
+  - full phone scan per check (previous behaviour; timed on --scan-sample
+    checks and extrapolated, since the full batch takes minutes)
+  - indexed phone_digits lookups per check (single sends)
+  - allowlist set built once for the batch (bulk sends)
+
+    python manage.py benchmark_sms_allowlist --clients 100000 --texts 1000
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from clients.models import Client
+from clients.models_extensions import WorkerAccount
+from clients.notifications import _is_internal_phone_allowed, _normalize_us_digits, internal_phone_allowlist
+from users.models import StaffUser
+
+
+def _scan_allowed(to_phone):
+    """The previous check: normalize every stored phone in Python."""
+    target_digits = _normalize_us_digits(to_phone)
+    if not target_digits:
+        return False
+    for model, queryset in (
+        (Client, Client.objects.exclude(phone__isnull=True).exclude(phone='')),
+        (WorkerAccount, WorkerAccount.objects.exclude(phone='')),
+        (StaffUser, StaffUser.objects.exclude(phone__isnull=True).exclude(phone='')),
+    ):
+        for raw_phone in queryset.values_list('phone', flat=True):
+            if _normalize_us_digits(raw_phone) == target_digits:
+                return True
+    return False
+
+
+class Command(BaseCommand):
+    help = 'Benchmark SMS internal-only allowlist checks (seeds and rolls back temporary rows)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=100000)
+        parser.add_argument('--texts', type=int, default=1000)
+        parser.add_argument('--scan-sample', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rng = random.Random(23)
+        rows = max(1, options['clients'])
+        texts = max(1, options['texts'])
+        numbers = [
+            f'+1628{rng.randrange(rows):07d}' if rng.random() < 0.9 else f'+1707{rng.randrange(10**7):07d}'
+            for _ in range(texts)
+        ]
+        sample = numbers[:max(1, min(options['scan_sample'], texts))]
+
+        with override_settings(SMS_INTERNAL_ONLY=True), transaction.atomic():
+            self._seed(rows)
+            scan_seconds = self._time(lambda: [_scan_allowed(n) for n in sample]) * texts / len(sample)
+            indexed_seconds = self._time(lambda: [_is_internal_phone_allowed(n) for n in numbers])
+            allowlist_box = {}
+            build_seconds = self._time(lambda: allowlist_box.update(allowlist=internal_phone_allowlist()))
+            allowlist = allowlist_box['allowlist']
+            lookup_seconds = self._time(lambda: [_is_internal_phone_allowed(n, allowlist) for n in numbers])
+            allowed = sum(1 for n in numbers if _is_internal_phone_allowed(n, allowlist))
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'{texts:,} checks against {rows:,} clients ({allowed:,} allowed)')
+        self.stdout.write(f'{"full scan per check (previous)":<34} {scan_seconds:>10.2f} s  (from {len(sample)} checks)')
+        self.stdout.write(f'{"indexed lookup per check":<34} {indexed_seconds:>10.2f} s')
+        self.stdout.write(
+            f'{"allowlist set per batch":<34} {build_seconds + lookup_seconds:>10.2f} s  '
+            f'(build {build_seconds:.2f} s, {len(allowlist):,} numbers)'
+        )
+
+    def _seed(self, rows):
+        batch = []
+        for index in range(rows):
+            phone = f'(628) {index // 10000:03d}-{index % 10000:04d}'
+            batch.append(Client(
+                first_name='Bench',
+                last_name=f'Client{index}',
+                phone=phone,
+                phone_digits=f'628{index:07d}',
+                gender='P',
+            ))
+            if len(batch) == 5000:
+                Client.objects.bulk_create(batch)
+                batch = []
+        Client.objects.bulk_create(batch)
+
+    def _time(self, run):
+        started = time.perf_counter()
+        run()
+        return time.perf_counter() - started
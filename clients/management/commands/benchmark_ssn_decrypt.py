@@ -0,0 +1,77 @@
+"""
+Measure per-row cost of loading clients with encrypted SSNs.
+
+Seeds --rows temporary clients inside a transaction that is rolled back, then
+reports rows/sec for:
+  - per-row keyring (how every row used to be decrypted on load)
+  - cached keyring, reading .ssn on every row
+  - lazy load that never reads .ssn (exports, changelists)
+
+    python manage.py benchmark_ssn_decrypt --rows 50000
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from clients.encrypted_fields import _build_keyring, decrypt_sensitive_value
+from clients.models import Client
+
+
+class Command(BaseCommand):
+    help = 'Benchmark Client loads with encrypted SSNs (seeds and rolls back temporary rows)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000)
+
+    def handle(self, *args, **options):
+        rows = max(1, options['rows'])
+        if str(getattr(settings, 'SSN_ACTIVE_KEY_ID', 'v1')) not in getattr(settings, 'SSN_ENCRYPTION_KEYS', {}):
+            raise CommandError('Configure SSN_ENCRYPTION_KEYS / SSN_ACTIVE_KEY_ID before benchmarking.')
+
+        with transaction.atomic():
+            first_pk = self._seed(rows)
+            queryset = Client.objects.filter(pk__gte=first_pk).order_by('pk')
+            self._time(queryset, lambda client: None)  # warm the page cache before timing
+            results = [
+                ('per-row keyring (previous)', self._time(queryset, self._per_row_keyring)),
+                ('cached keyring, .ssn read', self._time(queryset, lambda client: client.ssn)),
+                ('lazy, .ssn never read', self._time(queryset, lambda client: client.last_name)),
+            ]
+            transaction.set_rollback(True)
+
+        for label, seconds in results:
+            self.stdout.write(f'{label:<30} {rows / seconds:>12,.0f} rows/sec ({seconds:.2f}s)')
+
+    def _seed(self, rows):
+        template = Client.objects.create(
+            first_name='Bench', last_name='Mark', phone='4155550000', gender='P', ssn='123-45-6789',
+        )
+        Client.objects.bulk_create(
+            [
+                Client(first_name='Bench', last_name=f'Mark{index}', phone='4155550000', gender='P')
+                for index in range(rows - 1)
+            ],
+            batch_size=1000,
+        )
+        # Copy the template's ciphertext with one UPDATE so encryption does not dominate seeding.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE clients_client SET ssn = (SELECT ssn FROM clients_client WHERE id = %s), ssn_last4 = %s '
+                'WHERE id > %s',
+                [template.pk, '6789', template.pk],
+            )
+        return template.pk
+
+    def _per_row_keyring(self, client):
+        # Rebuild the keyring for every row, then decrypt, as from_db_value used to.
+        keys = settings.SSN_ENCRYPTION_KEYS
+        _build_keyring.__wrapped__(tuple(sorted((str(key_id), value) for key_id, value in keys.items())))
+        return decrypt_sensitive_value(client.__dict__['ssn'])
+
+    def _time(self, queryset, touch):
+        started = time.perf_counter()
+        for client in queryset.iterator(chunk_size=2000):
+            touch(client)
+        return time.perf_counter() - started
@@ -0,0 +1,32 @@
+"""
+Nightly maintenance for the materialized dashboard counters.
+
+Drops per-member rows once they fall out of the 30-day window (the daily
+counters keep their totals) and counters older than --keep-days, and recounts
+the running totals, which bulk writes skip. --rebuild also recomputes the last
+30 days from source timestamps, e.g. after a bulk import:
+    python manage.py compact_dashboard_stats
+    python manage.py compact_dashboard_stats --rebuild
+"""
+from django.core.management.base import BaseCommand
+
+from clients.dashboard_stats import compact_daily_stats, invalidate_snapshot, rebuild_daily_stats, rebuild_totals
+
+
+class Command(BaseCommand):
+    help = 'Compact the per-day dashboard counters, or rebuild the last 30 days from source rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-days', type=int, default=400, help='Days of daily counters to keep')
+        parser.add_argument('--rebuild', action='store_true', help='Recompute the last 30 days before compacting')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            counters, members = rebuild_daily_stats()
+            self.stdout.write(f'Rebuilt {counters} daily counters and {members} member rows.')
+        members, counters = compact_daily_stats(keep_days=max(30, options['keep_days']))
+        rebuild_totals()
+        invalidate_snapshot()
+        self.stdout.write(
+            self.style.SUCCESS(f'Compacted dashboard stats: removed {members} member rows and {counters} old counters.')
+        )
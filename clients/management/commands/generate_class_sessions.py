@@ -0,0 +1,41 @@
+"""
+Keep every active recurring class scheduled through a rolling horizon.
+
+Run daily from Azure WebJob/Cron:
+    python manage.py generate_class_sessions
+    python manage.py generate_class_sessions --horizon-days 365
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clients.class_scheduler import DEFAULT_HORIZON_DAYS, generate_sessions
+
+
+class Command(BaseCommand):
+    help = 'Create the missing sessions for all active recurring classes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horizon-days',
+            type=int,
+            default=DEFAULT_HORIZON_DAYS,
+            help=f'Schedule this many days ahead (default {DEFAULT_HORIZON_DAYS})',
+        )
+        parser.add_argument(
+            '--today',
+            type=str,
+            help='Override today for testing, format YYYY-MM-DD',
+        )
+
+    def handle(self, *args, **options):
+        horizon_days = options['horizon_days']
+        if horizon_days < 0:
+            raise CommandError('--horizon-days must be zero or more.')
+        today = date.fromisoformat(options['today']) if options.get('today') else None
+
+        created = generate_sessions(horizon_days=horizon_days, today=today)
+        templates = len({session.template_id for session in created})
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(created)} class session(s) across {templates} class(es).'
+        ))
@@ -0,0 +1,83 @@
+"""
+Rebuild ClientRollup rows from the source tables, or report drift.
+
+The signal handlers in clients.rollups keep rows current on every save and
+delete; run this after bulk imports or raw SQL fixes, or nightly with --check:
+    python manage.py rebuild_client_rollups
+    python manage.py rebuild_client_rollups --check
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from clients.models import Client, ClientRollup
+from clients.rollups import ROLLUP_FIELDS, compute_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-client rollups (note/document counts, doc types, last punch) or check them for drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Report clients whose rollup differs from the source tables without writing',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        check_only = options['check']
+        inspected = 0
+        drifted = []
+        last_pk = 0
+
+        while True:
+            client_ids = list(
+                Client.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not client_ids:
+                break
+            last_pk = client_ids[-1]
+            inspected += len(client_ids)
+
+            fresh = compute_rollups(client_ids)
+            stored = ClientRollup.objects.in_bulk(client_ids)
+            to_create = []
+            to_update = []
+            for client_id, values in fresh.items():
+                rollup = stored.get(client_id)
+                if rollup is None:
+                    rollup = ClientRollup(client_id=client_id)
+                    # A client with no activity is correctly represented by no row.
+                    if all(getattr(rollup, field) == values[field] for field in ROLLUP_FIELDS):
+                        continue
+                    to_create.append(rollup)
+                elif all(getattr(rollup, field) == values[field] for field in ROLLUP_FIELDS):
+                    continue
+                else:
+                    to_update.append(rollup)
+                drifted.append(client_id)
+                for field, value in values.items():
+                    setattr(rollup, field, value)
+                rollup.refreshed_at = timezone.now()
+
+            if check_only:
+                continue
+            with transaction.atomic():
+                ClientRollup.objects.bulk_create(to_create)
+                ClientRollup.objects.bulk_update(to_update, [*ROLLUP_FIELDS, 'refreshed_at'])
+
+        if check_only:
+            if drifted:
+                sample = ', '.join(str(client_id) for client_id in drifted[:20])
+                raise CommandError(
+                    f'{len(drifted)} of {inspected} client rollups drifted (client ids: {sample}'
+                    f'{", ..." if len(drifted) > 20 else ""}). Run without --check to rebuild.'
+                )
+            self.stdout.write(self.style.SUCCESS(f'Checked {inspected} clients; no rollup drift.'))
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Inspected {inspected} clients; rebuilt {len(drifted)} rollups.')
+        )
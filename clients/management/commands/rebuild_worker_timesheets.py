@@ -0,0 +1,38 @@
+"""
+Recompute WorkerDailyTimesheet rows from the punches.
+
+Punch writes keep the timesheets current; run this after imports or raw SQL
+fixes that bypass the ORM. Without dates it rebuilds all history:
+    python manage.py rebuild_worker_timesheets
+    python manage.py rebuild_worker_timesheets --start 2026-07-01 --end 2026-09-30
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clients.timesheets import rebuild_timesheets
+
+
+def _parse_date(value, option):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'{option} must be YYYY-MM-DD.')
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-worker daily timesheets from time punches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First local date to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last local date to rebuild (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        start = _parse_date(options['start'], '--start')
+        end = _parse_date(options['end'], '--end')
+        if start and end and start > end:
+            raise CommandError('--start must be on or before --end.')
+        rows = rebuild_timesheets(start, end)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} worker timesheet days.'))
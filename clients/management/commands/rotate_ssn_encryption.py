@@ -0,0 +1,93 @@
+"""
+Re-encrypt every Client.ssn under one key (default SSN_ACTIVE_KEY_ID).
+
+Rotation steps: add the new key to SSN_ENCRYPTION_KEYS, point SSN_ACTIVE_KEY_ID
+at it, run this command, then retire the old key once it reports 0 remaining.
+Finished id ranges are checkpointed (by default in the system temp
+directory), so rerunning after an interruption skips them; a run that gets
+through every range deletes its checkpoint, so the next rotation starts over:
+    python manage.py rotate_ssn_encryption --workers 4
+    python manage.py rotate_ssn_encryption --key v2 --restart
+"""
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Max, Min
+
+from clients.encrypted_fields import _configured_fernet_keys
+from clients.models import Client
+from clients.ssn_rotation import (
+    clear_checkpoint,
+    load_checkpoint,
+    plan_id_ranges,
+    rotate_id_range,
+    save_checkpoint,
+)
+
+
+class Command(BaseCommand):
+    help = 'Re-encrypt client SSNs under one key in parallel batches, with a resumable checkpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--key', help='Target key id (default: SSN_ACTIVE_KEY_ID)')
+        parser.add_argument('--workers', type=int, default=1, help='Processes to split id ranges across')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per UPDATE statement')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Client ids per checkpointed range')
+        parser.add_argument('--checkpoint', help='Checkpoint file (default: <temp dir>/mhh-ssn-rotation-<key>.json)')
+        parser.add_argument('--restart', action='store_true', help='Ignore any existing checkpoint')
+
+    def handle(self, *args, **options):
+        key_id = str(options['key'] or getattr(settings, 'SSN_ACTIVE_KEY_ID', 'v1'))
+        if key_id not in _configured_fernet_keys():
+            raise CommandError(f'Key {key_id!r} is not configured in SSN_ENCRYPTION_KEYS.')
+        workers = max(1, options['workers'])
+        batch_size = max(1, options['batch_size'])
+        checkpoint = options['checkpoint'] or os.path.join(tempfile.gettempdir(), f'mhh-ssn-rotation-{key_id}.json')
+
+        bounds = Client.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        ranges = plan_id_ranges(bounds['low'], bounds['high'], max(1, options['chunk_size']))
+        done = set() if options['restart'] else load_checkpoint(checkpoint, key_id)
+        pending = [id_range for id_range in ranges if id_range not in done]
+        if len(pending) < len(ranges):
+            self.stdout.write(f'Resuming: {len(ranges) - len(pending)} of {len(ranges)} id ranges already done.')
+
+        started = time.perf_counter()
+        inspected = 0
+        rotated = 0
+        for start, end, range_inspected, range_rotated in self._run(pending, key_id, batch_size, workers):
+            inspected += range_inspected
+            rotated += range_rotated
+            done.add((start, end))
+            save_checkpoint(checkpoint, key_id, done)
+            if options['verbosity'] >= 2:
+                self.stdout.write(f'ids {start}-{end - 1}: rotated {range_rotated} of {range_inspected}')
+        # Every range is done; a later rotation to this key must not resume from this run.
+        clear_checkpoint(checkpoint)
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        remaining = Client.objects.exclude(ssn__isnull=True).exclude(ssn='').exclude(ssn_key_id=key_id).count()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rotated {rotated} of {inspected} SSNs to key {key_id!r} in {elapsed:.1f}s '
+                f'({rotated / elapsed:,.0f} rows/sec, {workers} worker(s)); {remaining} remaining.'
+            )
+        )
+
+    def _run(self, pending, key_id, batch_size, workers):
+        if workers == 1 or len(pending) < 2:
+            for start, end in pending:
+                yield rotate_id_range(start, end, key_id, batch_size)
+            return
+        # Children must open their own connections, never reuse the parent's socket.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(rotate_id_range, start, end, key_id, batch_size) for start, end in pending]
+            for future in as_completed(futures):
+                yield future.result()
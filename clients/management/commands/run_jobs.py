@@ -0,0 +1,54 @@
+"""
+Run queued background jobs (clients.jobs).
+
+startup.sh runs the long-lived worker next to gunicorn; --once drains what is
+due and exits, for cron or a manual catch-up:
+    python manage.py run_jobs
+    python manage.py run_jobs --once
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from clients.jobs import DEFAULT_LEASE_SECONDS, purge_finished_jobs, run_due_jobs
+
+PURGE_EVERY_SECONDS = 3600
+
+
+class Command(BaseCommand):
+    help = 'Run due background jobs (emails, SMS, map snapshots) with retries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run every due job, then exit')
+        parser.add_argument('--batch-size', type=int, default=20)
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to sleep when the queue is idle')
+        parser.add_argument('--lease-seconds', type=int, default=DEFAULT_LEASE_SECONDS)
+        parser.add_argument('--keep-days', type=int, default=14, help='Days to keep succeeded jobs')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        lease_seconds = max(1, options['lease_seconds'])
+
+        if options['once']:
+            total = 0
+            while True:
+                ran = run_due_jobs(limit=batch_size, lease_seconds=lease_seconds)
+                total += ran
+                if ran < batch_size:
+                    break
+            self.stdout.write(self.style.SUCCESS(f'Ran {total} jobs.'))
+            return
+
+        self.stdout.write('Job worker started.')
+        next_purge = 0.0
+        try:
+            while True:
+                close_old_connections()
+                if time.monotonic() >= next_purge:
+                    purge_finished_jobs(keep_days=options['keep_days'])
+                    next_purge = time.monotonic() + PURGE_EVERY_SECONDS
+                if run_due_jobs(limit=batch_size, lease_seconds=lease_seconds) < batch_size:
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Job worker stopped.')
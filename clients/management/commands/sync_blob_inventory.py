@@ -0,0 +1,45 @@
+"""
+Rebuild the blob inventory from a paged list_blobs sweep of the container.
+
+Run nightly (uploads keep it current in between); --report prints the
+reconciliation of stored file names against the inventory:
+    python manage.py sync_blob_inventory
+    python manage.py sync_blob_inventory --report
+    python manage.py sync_blob_inventory --report-only
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from clients.blob_inventory import reconcile_blob_inventory, sync_blob_inventory
+
+
+class Command(BaseCommand):
+    help = 'Sweep the blob container into the local inventory and optionally report missing/orphaned blobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=5000)
+        parser.add_argument('--report', action='store_true', help='Print the reconciliation report after the sweep')
+        parser.add_argument('--report-only', action='store_true', help='Report from the existing inventory; no sweep')
+        parser.add_argument('--limit', type=int, default=50, help='Max names listed per report section')
+
+    def handle(self, *args, **options):
+        if not options['report_only']:
+            result = sync_blob_inventory(page_size=max(1, options['page_size']))
+            if result is None:
+                raise CommandError('Azure storage is not configured (AZURE_ACCOUNT_NAME / AZURE_ACCOUNT_KEY).')
+            seen, removed = result
+            self.stdout.write(self.style.SUCCESS(f'Inventoried {seen} blobs; removed {removed} stale rows.'))
+        if options['report'] or options['report_only']:
+            self._report(max(0, options['limit']))
+
+    def _report(self, limit):
+        report = reconcile_blob_inventory()
+        if report is None:
+            raise CommandError('The blob inventory is empty; run sync_blob_inventory first.')
+        self.stdout.write(
+            f"{report['blobs']} blobs; {len(report['missing'])} rows with missing blobs; "
+            f"{len(report['orphaned'])} orphaned blobs."
+        )
+        for label, pk, name in report['missing'][:limit]:
+            self.stdout.write(f'  missing  {label} {pk}: {name}')
+        for name in report['orphaned'][:limit]:
+            self.stdout.write(f'  orphaned {name}')
@@ -0,0 +1,65 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def backfill_client_rollups(apps, schema_editor):
+    CaseNote = apps.get_model('clients', 'CaseNote')
+    ClientRollup = apps.get_model('clients', 'ClientRollup')
+    Document = apps.get_model('clients', 'Document')
+    WorkerTimePunch = apps.get_model('clients', 'WorkerTimePunch')
+
+    rollups = {}
+
+    def row(client_id):
+        return rollups.setdefault(client_id, ClientRollup(client_id=client_id, doc_types=[]))
+
+    notes = CaseNote.objects.order_by().values('client_id').annotate(total=Count('pk'), last_date=Max('note_date'))
+    for values in notes:
+        rollup = row(values['client_id'])
+        rollup.case_notes_count = values['total']
+        rollup.last_note_date = values['last_date']
+    for values in Document.objects.order_by().values('client_id').annotate(total=Count('pk')):
+        row(values['client_id']).documents_count = values['total']
+    typed = Document.objects.exclude(file='').order_by().values_list('client_id', 'doc_type').distinct()
+    for client_id, doc_type in typed:
+        row(client_id).doc_types.append(doc_type)
+    punches = (
+        WorkerTimePunch.objects.order_by()
+        .values('worker_account__client_id')
+        .annotate(last_in=Max('clock_in_at'), last_out=Max('clock_out_at'))
+    )
+    for values in punches:
+        row(values['worker_account__client_id']).last_punch_at = max(
+            value for value in (values['last_in'], values['last_out']) if value
+        )
+    for rollup in rollups.values():
+        rollup.doc_types.sort()
+    ClientRollup.objects.bulk_create(rollups.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0049_rename_clients_cli_client__94003a_idx_clients_cli_client__8136b7_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientRollup',
+            fields=[
+                ('client', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='clients.client')),
+                ('case_notes_count', models.PositiveIntegerField(default=0)),
+                ('documents_count', models.PositiveIntegerField(default=0)),
+                ('last_note_date', models.DateField(blank=True, null=True)),
+                ('doc_types', models.JSONField(blank=True, default=list, help_text='Sorted doc_type codes with an uploaded file.')),
+                ('last_punch_at', models.DateTimeField(blank=True, null=True)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Client rollup',
+                'verbose_name_plural': 'Client rollups',
+            },
+        ),
+        migrations.RunPython(backfill_client_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+import re
+
+from django.db import migrations, models
+
+
+def normalize_login_phone(phone):
+    # Frozen copy of clients.phone_utils.normalize_login_phone as of this migration.
+    if phone is None:
+        return ''
+    raw = re.split(r'(?i)\b(?:ext\.?|x|#)\b', str(phone).strip())[0]
+    digits = re.sub(r'\D', '', raw)
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    return digits
+
+
+def backfill_phone_digits(model, batch_size=1000):
+    manager = model._default_manager
+    last_pk = 0
+    while True:
+        rows = list(
+            manager.filter(pk__gt=last_pk).order_by('pk').only('pk', 'phone', 'phone_digits')[:batch_size]
+        )
+        if not rows:
+            return
+        last_pk = rows[-1].pk
+        stale = []
+        for row in rows:
+            digits = normalize_login_phone(row.phone)
+            if row.phone_digits != digits:
+                row.phone_digits = digits
+                stale.append(row)
+        manager.bulk_update(stale, ['phone_digits'])
+
+
+def backfill(apps, schema_editor):
+    backfill_phone_digits(apps.get_model('clients', 'Client'))
+    backfill_phone_digits(apps.get_model('clients', 'WorkerAccount'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0050_client_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='phone_digits',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                editable=False,
+                help_text='Phone normalized to digits on save; indexed for kiosk and duplicate lookups.',
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name='workeraccount',
+            name='phone_digits',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                editable=False,
+                help_text='Login phone normalized to digits on save; indexed for login lookups.',
+                max_length=20,
+            ),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-16 23:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0051_phone_digits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlobInventoryItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=1024, unique=True)),
+                ('size', models.BigIntegerField(blank=True, null=True)),
+                ('etag', models.CharField(blank=True, default='', max_length=128)),
+                ('last_modified', models.DateTimeField(blank=True, null=True)),
+                ('seen_at', models.DateTimeField(help_text='When a sweep or upload last confirmed this blob.')),
+            ],
+            options={
+                'verbose_name': 'Blob inventory item',
+                'verbose_name_plural': 'Blob inventory',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.1.15 on 2026-10-16 23:40
+
+from datetime import datetime, timedelta
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill(apps, schema_editor, days=30):
+    # Frozen copy of clients.dashboard_stats.rebuild_daily_stats as of this migration.
+    counter_model = apps.get_model('clients', 'DashboardDailyCounter')
+    member_model = apps.get_model('clients', 'DashboardDailyMember')
+    client_model = apps.get_model('clients', 'Client')
+    since_day = timezone.localdate() - timedelta(days=days - 1)
+    since = timezone.make_aware(datetime.combine(since_day, datetime.min.time()))
+
+    counters = {}
+    sources = [
+        ('clients_created', client_model),
+        ('documents_uploaded', apps.get_model('clients', 'Document')),
+        ('case_notes_written', apps.get_model('clients', 'CaseNote')),
+    ]
+    for metric, model in sources:
+        rows = (
+            model.objects.filter(created_at__gte=since)
+            .annotate(day=TruncDate('created_at'))
+            .order_by()
+            .values('day')
+            .annotate(total=Count('pk'))
+        )
+        for row in rows:
+            counters[(row['day'], metric)] = row['total']
+
+    members = []
+    member_sources = [
+        ('clients_updated', client_model.objects.filter(updated_at__gte=since), 'updated_at'),
+        (
+            'staff_active',
+            apps.get_model('users', 'StaffUser').objects.filter(is_staff=True, last_login__gte=since),
+            'last_login',
+        ),
+    ]
+    for metric, queryset, field in member_sources:
+        for pk, day in queryset.annotate(day=TruncDate(field)).order_by().values_list('pk', 'day').iterator():
+            members.append(member_model(day=day, metric=metric, member_id=pk))
+            counters[(day, metric)] = counters.get((day, metric), 0) + 1
+
+    counter_model.objects.bulk_create(
+        [counter_model(day=day, metric=metric, value=value) for (day, metric), value in counters.items()],
+        batch_size=1000,
+    )
+    member_model.objects.bulk_create(members, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0053_background_job'),
+        ('users', '0005_staffuser_phone_digits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardDailyCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('metric', models.CharField(max_length=40)),
+                ('value', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Dashboard daily counter',
+                'verbose_name_plural': 'Dashboard daily counters',
+                'ordering': ['-day', 'metric'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'metric'), name='unique_dashboard_counter_per_day')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DashboardDailyMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('metric', models.CharField(max_length=40)),
+                ('member_id', models.BigIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Dashboard daily member',
+                'verbose_name_plural': 'Dashboard daily members',
+                'ordering': ['-day', 'metric'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'metric', 'member_id'), name='unique_dashboard_member_per_day')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
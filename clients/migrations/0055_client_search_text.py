@@ -0,0 +1,75 @@
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# Frozen copy of clients.client_search normalization as of this migration.
+SEARCH_SOURCE_FIELDS = ('first_name', 'last_name', 'email', 'staff_name')
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def search_text_for(client):
+    words = []
+    for field in SEARCH_SOURCE_FIELDS:
+        text = unicodedata.normalize('NFKD', str(getattr(client, field) or '')).encode('ascii', 'ignore').decode('ascii')
+        words.extend(word for word in WORD_RE.findall(text.lower()) if not word.isdigit())
+    return ' '.join(words)
+
+
+def backfill(apps, schema_editor, batch_size=1000):
+    Client = apps.get_model('clients', 'Client')
+    last_pk = 0
+    while True:
+        rows = list(
+            Client.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', 'search_text', *SEARCH_SOURCE_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return
+        last_pk = rows[-1].pk
+        stale = []
+        for row in rows:
+            text = search_text_for(row)
+            if row.search_text != text:
+                row.search_text = text
+                stale.append(row)
+        if stale:
+            Client.objects.bulk_update(stale, ['search_text'], batch_size=batch_size)
+
+
+def create_trigram_index(apps, schema_editor):
+    # pg_trgm must be allow-listed on Azure Database for PostgreSQL (azure.extensions).
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS clients_client_search_text_trgm '
+        'ON clients_client USING gin (search_text gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS clients_client_search_text_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0054_dashboard_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='search_text',
+            field=models.TextField(
+                blank=True,
+                default='',
+                editable=False,
+                help_text='Lowercased name, email and staff-name words, kept on save for staff search (trigram-indexed on PostgreSQL).',
+            ),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-17 00:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0055_client_search_text'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['-updated_at', '-id'], name='client_updated_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['-created_at', '-id'], name='client_created_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clienttextmessage',
+            index=models.Index(fields=['client', '-created_at'], name='textmsg_client_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffticket',
+            index=models.Index(fields=['-updated_at', '-id'], name='ticket_updated_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.1.15 on 2026-10-17 00:38
+
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Count, DurationField, ExpressionWrapper, F, Q, Sum, Value, When
+from django.db.models.functions import Greatest, TruncDate
+
+
+def _hours(duration):
+    return round(duration.total_seconds() / 3600, 2) if duration else 0
+
+
+def backfill(apps, schema_editor):
+    # Frozen copy of the clients.worker_hours per-day aggregation as of this migration.
+    WorkerTimePunch = apps.get_model('clients', 'WorkerTimePunch')
+    WorkerDailyTimesheet = apps.get_model('clients', 'WorkerDailyTimesheet')
+    zero = Value(timedelta(0), output_field=DurationField())
+    gross = Greatest(
+        ExpressionWrapper(F('clock_out_at') - F('clock_in_at'), output_field=DurationField()),
+        zero,
+        output_field=DurationField(),
+    )
+    lunch = Case(
+        When(
+            lunch_start_at__isnull=False,
+            lunch_end_at__isnull=False,
+            then=Greatest(
+                ExpressionWrapper(F('lunch_end_at') - F('lunch_start_at'), output_field=DurationField()),
+                zero,
+                output_field=DurationField(),
+            ),
+        ),
+        default=zero,
+        output_field=DurationField(),
+    )
+    net = Greatest(ExpressionWrapper(gross - lunch, output_field=DurationField()), zero, output_field=DurationField())
+    done = Q(clock_out_at__isnull=False)
+    rows = (
+        WorkerTimePunch.objects.annotate(work_date=TruncDate('clock_in_at', tzinfo=ZoneInfo(settings.TIME_ZONE)))
+        .order_by()
+        .values('worker_account_id', 'work_date')
+        .annotate(
+            gross=Sum(gross, filter=done),
+            lunch=Sum(lunch, filter=done),
+            net=Sum(net, filter=done),
+            shifts=Count('pk', filter=done),
+            open_shifts=Count('pk', filter=~done),
+        )
+    )
+    WorkerDailyTimesheet.objects.bulk_create(
+        (
+            WorkerDailyTimesheet(
+                worker_account_id=row['worker_account_id'],
+                work_date=row['work_date'],
+                shifts=row['shifts'],
+                open_shifts=row['open_shifts'],
+                gross_hours=_hours(row['gross']),
+                lunch_minutes=int(row['lunch'].total_seconds() // 60) if row['lunch'] else 0,
+                net_hours=_hours(row['net']),
+            )
+            for row in rows
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0056_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkerDailyTimesheet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('work_date', models.DateField()),
+                ('shifts', models.PositiveIntegerField(default=0)),
+                ('open_shifts', models.PositiveIntegerField(default=0)),
+                ('gross_hours', models.DecimalField(decimal_places=2, default=0, max_digits=6)),
+                ('lunch_minutes', models.PositiveIntegerField(default=0)),
+                ('net_hours', models.DecimalField(decimal_places=2, default=0, max_digits=6)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('worker_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_timesheets', to='clients.workeraccount')),
+            ],
+            options={
+                'verbose_name': 'Worker daily timesheet',
+                'verbose_name_plural': 'Worker daily timesheets',
+                'ordering': ['-work_date', 'worker_account'],
+                'indexes': [models.Index(fields=['work_date', 'worker_account'], name='timesheet_date_worker_idx')],
+                'constraints': [models.UniqueConstraint(fields=('worker_account', 'work_date'), name='unique_timesheet_per_worker_day')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
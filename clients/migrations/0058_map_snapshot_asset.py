@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-17 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0057_worker_daily_timesheet'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MapSnapshotAsset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell_key', models.CharField(max_length=100, unique=True)),
+                ('content_hash', models.CharField(db_index=True, max_length=64)),
+                ('image', models.ImageField(upload_to='worker_maps/cells/')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Map snapshot asset',
+                'verbose_name_plural': 'Map snapshot assets',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
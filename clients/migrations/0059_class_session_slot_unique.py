@@ -0,0 +1,42 @@
+# Generated by Django 5.1.15 on 2026-10-17 00:46
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_slots(apps, schema_editor):
+    """Fold sessions booked twice in one slot into the oldest, keeping their rosters."""
+    ClassSession = apps.get_model('clients', 'ClassSession')
+    ClassEnrollment = apps.get_model('clients', 'ClassEnrollment')
+    duplicates = (
+        ClassSession.objects.values('template_id', 'session_date', 'start_time')
+        .annotate(keep_id=Min('id'), copies=Count('id'))
+        .filter(copies__gt=1)
+    )
+    for slot in duplicates:
+        extras = ClassSession.objects.filter(
+            template_id=slot['template_id'],
+            session_date=slot['session_date'],
+            start_time=slot['start_time'],
+        ).exclude(pk=slot['keep_id'])
+        enrolled = ClassEnrollment.objects.filter(session_id=slot['keep_id']).values('client_id')
+        for extra_id in extras.values_list('id', flat=True):
+            ClassEnrollment.objects.filter(session_id=extra_id).exclude(client_id__in=enrolled).update(
+                session_id=slot['keep_id']
+            )
+        extras.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0058_map_snapshot_asset'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_slots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='classsession',
+            constraint=models.UniqueConstraint(fields=('template', 'session_date', 'start_time'), name='uniq_class_session_slot'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from datetime import date
+
+from django.db import migrations
+from django.db.models import Count, Q
+
+# Counter rows filed under this day hold running totals (clients.dashboard_stats.TOTALS_DAY).
+TOTALS_DAY = date(1970, 1, 1)
+
+
+def seed_totals(apps, schema_editor):
+    Client = apps.get_model('clients', 'Client')
+    DashboardDailyCounter = apps.get_model('clients', 'DashboardDailyCounter')
+    totals = Client.objects.aggregate(
+        total_clients=Count('pk'),
+        active_clients=Count('pk', filter=Q(status='active')),
+        pending_clients=Count('pk', filter=Q(status='pending')),
+        completed_clients=Count('pk', filter=Q(status='completed')),
+        clients_with_resume=Count('pk', filter=~Q(resume='')),
+    )
+    totals['total_case_notes'] = apps.get_model('clients', 'CaseNote').objects.count()
+    totals['total_documents'] = apps.get_model('clients', 'Document').objects.count()
+    DashboardDailyCounter.objects.filter(day=TOTALS_DAY).delete()
+    DashboardDailyCounter.objects.bulk_create(
+        [DashboardDailyCounter(day=TOTALS_DAY, metric=metric, value=value) for metric, value in totals.items()]
+    )
+
+
+def drop_totals(apps, schema_editor):
+    apps.get_model('clients', 'DashboardDailyCounter').objects.filter(day=TOTALS_DAY).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0059_class_session_slot_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_totals, drop_totals),
+    ]
@@ -7,10 +7,12 @@ from django.db import models
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
 from django.utils import timezone
 import logging
 
 from .encrypted_fields import EncryptedSSNField
+from .phone_utils import sync_phone_digits
 
 User = get_user_model()
 
@@ -119,7 +121,21 @@ class Client(models.Model):
     ssn_last4 = models.CharField(max_length=4, blank=True, default='', db_index=True)
     ssn_key_id = models.CharField(max_length=32, blank=True, default='')
     phone = models.CharField(max_length=20)
+    phone_digits = models.CharField(
+        max_length=20,
+        blank=True,
+        default='',
+        db_index=True,
+        editable=False,
+        help_text='Phone normalized to digits on save; indexed for kiosk and duplicate lookups.',
+    )
     email = models.EmailField(blank=True, null=True)
+    search_text = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        help_text='Lowercased name, email and staff-name words, kept on save for staff search (trigram-indexed on PostgreSQL).',
+    )
     gender = models.CharField(max_length=10, choices=GENDER_CHOICES)
 
     # Address
@@ -194,6 +210,11 @@ class Client(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Client'
         verbose_name_plural = 'Clients'
+        indexes = [
+            # Keyset pagination (clients.pagination) for the staff list and the API.
+            models.Index(fields=['-updated_at', '-id'], name='client_updated_keyset_idx'),
+            models.Index(fields=['-created_at', '-id'], name='client_created_keyset_idx'),
+        ]
 
     def __str__(self):
         parts = [self.first_name]
@@ -213,6 +234,9 @@ class Client(models.Model):
         else:
             self.ssn_last4 = ''
             self.ssn_key_id = ''
+        sync_phone_digits(self, kwargs)
+        from .client_search import sync_search_text
+        sync_search_text(self, kwargs)
         return super().save(*args, **kwargs)
     
     @property
@@ -239,9 +263,21 @@ class Client(models.Model):
     def has_resume(self):
         return bool(self.resume)
     
+    @property
+    def rollup_or_none(self):
+        """
+        ClientRollup row, or None for a client with no notes/documents/punches
+        yet; callers read a missing rollup as all-empty rather than counting.
+        """
+        try:
+            return self.rollup
+        except ObjectDoesNotExist:
+            return None
+
     @property
     def case_notes_count(self):
-        return self.casenotes.count()
+        rollup = self.rollup_or_none
+        return rollup.case_notes_count if rollup is not None else 0
 
     @property
     def case_notes(self):
@@ -249,7 +285,8 @@ class Client(models.Model):
     
     @property
     def documents_count(self):
-        return self.documents.count()
+        rollup = self.rollup_or_none
+        return rollup.documents_count if rollup is not None else 0
     
     def generate_resume_sas_url(self, expiry_minutes=15):
         """Generate a signed Azure SAS URL for resume download.
@@ -498,6 +535,167 @@ class Document(models.Model):
             return 'other'
 
 
+class ClientRollup(models.Model):
+    """
+    Per-client totals kept current by the signal handlers in clients.rollups.
+
+    List pages and exports read this one row instead of counting notes,
+    documents and punches across joins. `manage.py rebuild_client_rollups`
+    rebuilds it from scratch or reports drift.
+    """
+
+    client = models.OneToOneField(
+        Client,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rollup',
+    )
+    case_notes_count = models.PositiveIntegerField(default=0)
+    documents_count = models.PositiveIntegerField(default=0)
+    last_note_date = models.DateField(blank=True, null=True)
+    doc_types = models.JSONField(
+        default=list,
+        blank=True,
+        help_text='Sorted doc_type codes with an uploaded file.',
+    )
+    last_punch_at = models.DateTimeField(blank=True, null=True)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Client rollup'
+        verbose_name_plural = 'Client rollups'
+
+    def __str__(self):
+        return f'Rollup for client {self.client_id}'
+
+
+class BlobInventoryItem(models.Model):
+    """
+    One blob in the storage container, as of the last inventory sweep or upload.
+
+    Built by `manage.py sync_blob_inventory` (a paged list_blobs sweep) and kept
+    current by uploads/deletes through AzurePrivateStorage, so existence checks
+    and reconciliation reports never need per-file HEAD requests.
+    """
+
+    name = models.CharField(max_length=1024, unique=True)
+    size = models.BigIntegerField(blank=True, null=True)
+    etag = models.CharField(max_length=128, blank=True, default='')
+    last_modified = models.DateTimeField(blank=True, null=True)
+    seen_at = models.DateTimeField(help_text='When a sweep or upload last confirmed this blob.')
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Blob inventory item'
+        verbose_name_plural = 'Blob inventory'
+
+    def __str__(self):
+        return self.name
+
+
+class BackgroundJob(models.Model):
+    """
+    A slow side effect (email, SMS, map download) queued by a request handler.
+
+    `manage.py run_jobs` claims due rows, calls `task` (a dotted path to a
+    function in this app) with `payload` as keyword arguments, and retries
+    failures with exponential backoff. See clients.jobs.
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict, blank=True)
+    idempotency_key = models.CharField(
+        max_length=200,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text='Enqueuing the same key again returns the existing job instead of adding another.',
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now, help_text='Not claimed before this time.')
+    locked_until = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text='Lease of the worker running it; an expired lease makes the job claimable again.',
+    )
+    result = models.JSONField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['run_at', 'id']
+        verbose_name = 'Background job'
+        verbose_name_plural = 'Background jobs'
+        indexes = [
+            models.Index(fields=['status', 'run_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.task} #{self.pk} ({self.status})'
+
+
+class DashboardDailyCounter(models.Model):
+    """
+    One dashboard metric for one local day (clients created, documents
+    uploaded, ...), incremented as the writes happen. See clients.dashboard_stats.
+    """
+
+    day = models.DateField()
+    metric = models.CharField(max_length=40)
+    value = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day', 'metric']
+        verbose_name = 'Dashboard daily counter'
+        verbose_name_plural = 'Dashboard daily counters'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'metric'], name='unique_dashboard_counter_per_day'),
+        ]
+
+    def __str__(self):
+        return f'{self.metric} {self.day}: {self.value}'
+
+
+class DashboardDailyMember(models.Model):
+    """
+    Who counted towards a distinct-per-window metric on a day (a client that
+    was updated, a staff member that signed in), so 7/30-day windows count
+    each once. Rows older than 30 days are compacted away nightly.
+    """
+
+    day = models.DateField()
+    metric = models.CharField(max_length=40)
+    member_id = models.BigIntegerField()
+
+    class Meta:
+        ordering = ['-day', 'metric']
+        verbose_name = 'Dashboard daily member'
+        verbose_name_plural = 'Dashboard daily members'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'metric', 'member_id'],
+                name='unique_dashboard_member_per_day',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.metric} {self.day}: #{self.member_id}'
+
+
 class DocumentUploadInvite(models.Model):
     """Revocable, document-scoped bearer link for client self-upload."""
 
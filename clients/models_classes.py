@@ -5,8 +5,7 @@ Mirrors the "recurring meeting" mental model (does not repeat / weekly on X / mo
 the Nth X of every month) so staff can set a class up once and have upcoming sessions
 generated automatically, instead of hand-adding dates every time.
 """
-from calendar import monthrange
-from datetime import date, timedelta
+from datetime import timedelta
 
 from django.core.exceptions import ValidationError
 from django.db import models
@@ -105,71 +104,18 @@ class ClassTemplate(models.Model):
         ordinal = dict(self.WEEK_OF_MONTH_CHOICES).get(self.recurrence_week_of_month, '')
         return f'Monthly — {ordinal} {weekday_label}'
 
-    def _nth_weekday_of_month(self, year, month):
-        first_day = date(year, month, 1)
-        offset = (self.recurrence_weekday - first_day.weekday()) % 7
-        day_number = 1 + offset + (self.recurrence_week_of_month - 1) * 7
-        last_day_of_month = monthrange(year, month)[1]
-        if day_number > last_day_of_month:
-            return None
-        return date(year, month, day_number)
-
     def upcoming_dates(self, horizon_days=60, today=None):
         """Compute session dates from today through horizon_days, per the recurrence rule."""
+        from .class_scheduler import recurrence_dates
+
         today = today or timezone.localdate()
-        end = today + timedelta(days=horizon_days)
-        dates = []
-
-        if self.recurrence == 'weekly' and self.recurrence_weekday is not None:
-            offset = (self.recurrence_weekday - today.weekday()) % 7
-            cursor = today + timedelta(days=offset)
-            while cursor <= end:
-                dates.append(cursor)
-                cursor += timedelta(days=7)
-
-        elif (
-            self.recurrence == 'monthly'
-            and self.recurrence_weekday is not None
-            and self.recurrence_week_of_month
-        ):
-            cursor_year, cursor_month = today.year, today.month
-            while date(cursor_year, cursor_month, 1) <= end:
-                candidate = self._nth_weekday_of_month(cursor_year, cursor_month)
-                if candidate and today <= candidate <= end:
-                    dates.append(candidate)
-                if cursor_month == 12:
-                    cursor_year, cursor_month = cursor_year + 1, 1
-                else:
-                    cursor_month += 1
-
-        return dates
+        return list(recurrence_dates(self, today, today + timedelta(days=horizon_days)))
 
     def generate_upcoming_sessions(self, horizon_days=60):
         """Create ClassSession rows for computed upcoming dates that don't already exist."""
-        if self.recurrence == 'none' or not self.is_active:
-            return []
-        dates = self.upcoming_dates(horizon_days=horizon_days)
-        if not dates:
-            return []
-        existing = set(
-            self.sessions.filter(session_date__in=dates).values_list('session_date', flat=True)
-        )
-        created = []
-        for session_date in dates:
-            if session_date in existing:
-                continue
-            created.append(
-                ClassSession.objects.create(
-                    template=self,
-                    session_date=session_date,
-                    start_time=self.start_time,
-                    end_time=self.end_time,
-                    location=self.location,
-                    facilitator=self.facilitator,
-                    capacity=self.capacity,
-                )
-            )
-        return created
+        from .class_scheduler import generate_sessions
+
+        return generate_sessions([self], horizon_days=horizon_days)
 
 
 class ClassSession(models.Model):
@@ -202,6 +148,12 @@ class ClassSession(models.Model):
             models.Index(fields=['session_date'], name='classsession_date_idx'),
             models.Index(fields=['status', 'session_date'], name='classsession_status_date_idx'),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['template', 'session_date', 'start_time'],
+                name='uniq_class_session_slot',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.template.name} — {self.session_date.isoformat()}'
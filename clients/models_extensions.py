@@ -176,6 +176,27 @@ def worker_punch_map_upload_to(instance, filename):
     return f'worker_punches/{account_id}/{safe_name}'
 
 
+class MapSnapshotAsset(models.Model):
+    """
+    One rendered static map per grid cell, zoom and size, stored once under
+    the hash of its bytes and shared by every punch taken in that cell. See
+    clients.worker_map_utils.
+    """
+
+    cell_key = models.CharField(max_length=100, unique=True)
+    content_hash = models.CharField(max_length=64, db_index=True)
+    image = models.ImageField(upload_to='worker_maps/cells/')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Map snapshot asset'
+        verbose_name_plural = 'Map snapshot assets'
+
+    def __str__(self):
+        return self.cell_key
+
+
 class WorkerTimePunch(models.Model):
     """
     Worker clock in/out records with optional map snapshot for visual reference.
@@ -326,6 +347,42 @@ class WorkerTimePunch(models.Model):
         return round(net_seconds / 3600, 2)
 
 
+class WorkerDailyTimesheet(models.Model):
+    """
+    One worker's hours for one local day, rolled up from the punches clocked
+    in that day and refreshed whenever one of them is written. Hours cover
+    completed punches; open_shifts counts punches still clocked in. See
+    clients.timesheets.
+    """
+
+    worker_account = models.ForeignKey(
+        'WorkerAccount',
+        on_delete=models.CASCADE,
+        related_name='daily_timesheets',
+    )
+    work_date = models.DateField()
+    shifts = models.PositiveIntegerField(default=0)
+    open_shifts = models.PositiveIntegerField(default=0)
+    gross_hours = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+    lunch_minutes = models.PositiveIntegerField(default=0)
+    net_hours = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-work_date', 'worker_account']
+        verbose_name = 'Worker daily timesheet'
+        verbose_name_plural = 'Worker daily timesheets'
+        constraints = [
+            models.UniqueConstraint(fields=['worker_account', 'work_date'], name='unique_timesheet_per_worker_day'),
+        ]
+        indexes = [
+            models.Index(fields=['work_date', 'worker_account'], name='timesheet_date_worker_idx'),
+        ]
+
+    def __str__(self):
+        return f'Timesheet {self.worker_account_id} {self.work_date}: {self.net_hours} hrs'
+
+
 class ClientTextMessage(models.Model):
     """SMS log for client/worker outreach sent through Azure Communication Services."""
 
@@ -384,6 +441,7 @@ class ClientTextMessage(models.Model):
             models.Index(fields=['client', 'purpose', 'checkpoint_days']),
             models.Index(fields=['status', 'created_at']),
             models.Index(fields=['direction', 'created_at']),
+            models.Index(fields=['client', '-created_at'], name='textmsg_client_created_idx'),
         ]
 
     def __str__(self):
@@ -414,6 +472,14 @@ class WorkerAccount(models.Model):
         unique=True,
         help_text='Phone number for login (must match client phone)'
     )
+    phone_digits = models.CharField(
+        max_length=20,
+        blank=True,
+        default='',
+        db_index=True,
+        editable=False,
+        help_text='Login phone normalized to digits on save; indexed for login lookups.',
+    )
     pin_hash = models.CharField(
         max_length=128,
         help_text='Hashed 4-6 digit PIN for authentication'
@@ -476,13 +542,14 @@ class WorkerAccount(models.Model):
 
     def save(self, *args, **kwargs):
         """One flag for portal access; store phone as digits so login matches mobile keyboards."""
-        from .phone_utils import normalize_login_phone
+        from .phone_utils import normalize_login_phone, sync_phone_digits
 
         self.is_approved = self.is_active
         if self.phone:
             d = normalize_login_phone(self.phone)
             if d:
                 self.phone = d
+        sync_phone_digits(self, kwargs)
         super().save(*args, **kwargs)
         if self.client_id and self.client.pit_stop_stage != Client.PIT_STOP_STAGE_WORKER:
             Client.objects.filter(pk=self.client_id).update(pit_stop_stage=Client.PIT_STOP_STAGE_WORKER)
@@ -672,6 +739,7 @@ class StaffTicket(models.Model):
             models.Index(fields=['status', 'priority']),
             models.Index(fields=['submitted_by', 'status']),
             models.Index(fields=['assignee', 'status']),
+            models.Index(fields=['-updated_at', '-id'], name='ticket_updated_keyset_idx'),
         ]
 
     def __str__(self):
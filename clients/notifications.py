@@ -3,7 +3,6 @@ Email notification system for case notes, worker onboarding, and schedule update
 """
 import re
 
-from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils import timezone
@@ -40,22 +39,11 @@ def _get_admin_base_url():
 def _get_from_email():
     return getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@missionhiringhall.org')
 
-def _send(subject, plain, html, recipient):
-    """Send an email, return True on success."""
-    try:
-        send_mail(
-            subject=subject,
-            message=plain,
-            from_email=_get_from_email(),
-            recipient_list=[recipient],
-            html_message=html,
-            fail_silently=False,
-        )
-        logger.info('Email sent to %s: %s', recipient, subject)
-        return True
-    except Exception as e:
-        logger.error('Email failed to %s: %s', recipient, e, exc_info=True)
-        return False
+def _send(subject, plain, html, recipient, connection=None):
+    """Send an email, return True on success. Pass `connection` to reuse one across sends."""
+    from .mailer import build_email, send_emails
+
+    return send_emails([build_email(subject, plain, html, recipient)], connection=connection)[0] is None
 
 
 def send_followup_alert(case_note, user_email):
@@ -100,6 +88,18 @@ def send_worker_welcome_email(worker_account):
     Send welcome email when a worker account is approved.
     Returns True if sent, False if skipped or failed.
     """
+    from .mailer import send_emails
+
+    message = worker_welcome_message(worker_account)
+    if message is None:
+        return False
+    return send_emails([message])[0] is None
+
+
+def worker_welcome_message(worker_account):
+    """The welcome email for an approved worker, or None if their client record has no email."""
+    from .mailer import build_email
+
     client = worker_account.client
     email = client.email
     if not email:
@@ -107,7 +107,7 @@ def send_worker_welcome_email(worker_account):
             'No email for worker %s (client %s) - skipping welcome email',
             worker_account.phone, client.full_name
         )
-        return False
+        return None
 
     context = {
         'worker_name': client.first_name or client.full_name,
@@ -132,7 +132,7 @@ def send_worker_welcome_email(worker_account):
             f"Questions? Talk to your supervisor.\n"
         )
 
-    return _send(subject, plain, html, email)
+    return build_email(subject, plain, html, email)
 
 
 def send_assignment_notification(assignment):
@@ -147,14 +147,23 @@ def send_schedule_reminders():
     return {'sent': 0, 'skipped': 0, 'total': 0}
 
 
-def send_pitstop_application_alert(application):
-    """
-    Send alert email when a new Pit Stop application is submitted.
-    Uses PITSTOP_APPLICATION_ALERT_EMAILS env (comma-separated).
-    """
+def _pitstop_alert_recipients():
     recipients = getattr(settings, 'PITSTOP_APPLICATION_ALERT_EMAILS', '')
     if isinstance(recipients, str):
         recipients = [r.strip() for r in recipients.split(',') if r.strip()]
+    return list(recipients)
+
+
+def send_pitstop_application_alert(application, recipients=None):
+    """
+    Send alert email when a new Pit Stop application is submitted.
+    Uses PITSTOP_APPLICATION_ALERT_EMAILS env (comma-separated) unless
+    `recipients` is given. All recipients share one mail connection.
+    """
+    from .mailer import build_email, send_emails
+
+    if recipients is None:
+        recipients = _pitstop_alert_recipients()
     if not recipients:
         logger.info('No PITSTOP_APPLICATION_ALERT_EMAILS configured; skipping alert for application %s', application.pk)
         return {'sent': 0, 'total': 0}
@@ -176,11 +185,38 @@ def send_pitstop_application_alert(application):
         f"{_get_admin_base_url()}/admin/clients/pitstopapplication/{application.pk}/change/\n"
     )
 
-    sent = 0
+    outcomes = send_emails(build_email(subject, plain, None, recipient) for recipient in recipients)
+    return {'sent': outcomes.count(None), 'total': len(recipients)}
+
+
+def queue_pitstop_application_alert(application):
+    """
+    Queue one alert job per recipient so the public submit returns without
+    waiting on SMTP, and a retry never re-sends to someone already emailed.
+    """
+    from .jobs import enqueue
+
+    recipients = _pitstop_alert_recipients()
     for recipient in recipients:
-        if _send(subject, plain, None, recipient):
-            sent += 1
-    return {'sent': sent, 'total': len(recipients)}
+        enqueue(
+            'clients.notifications.deliver_pitstop_application_alert',
+            {'application_id': application.pk, 'recipient': recipient},
+            idempotency_key=f'pitstop-alert:{application.pk}:{recipient}',
+        )
+    return len(recipients)
+
+
+def deliver_pitstop_application_alert(application_id, recipient):
+    """Background task: email one alert recipient; raising makes the queue retry."""
+    from .models import PitStopApplication
+
+    application = PitStopApplication.objects.select_related('client').filter(pk=application_id).first()
+    if application is None:
+        return {'sent': 0, 'total': 0}
+    result = send_pitstop_application_alert(application, recipients=[recipient])
+    if not result['sent']:
+        raise RuntimeError(f'Pit Stop alert email to {recipient} failed')
+    return result
 
 
 def _sms_client():
@@ -247,9 +283,35 @@ def _compose_sms_body(body):
     return f'{content[:reserve].rstrip()}{footer}'
 
 
-def _is_internal_phone_allowed(to_phone):
+def internal_phone_allowlist():
+    """
+    For SMS_INTERNAL_ONLY mode: the set of every known app number (clients,
+    workers, staff) in 11-digit US form, read in one query from the
+    normalized phone_digits columns. Build it once per batch of sends and
+    pass it to send_phone_text_message. None when internal-only mode is off.
+    """
+    if not getattr(settings, 'SMS_INTERNAL_ONLY', False):
+        return None
+
+    from .models import Client
+    from .models_extensions import WorkerAccount
+    from users.models import StaffUser
+
+    numbers = (
+        Client.objects.order_by().values_list('phone_digits', flat=True)
+        .union(
+            WorkerAccount.objects.order_by().values_list('phone_digits', flat=True),
+            StaffUser.objects.order_by().values_list('phone_digits', flat=True),
+        )
+    )
+    return frozenset(f'1{digits}' for digits in numbers if len(digits) == 10)
+
+
+def _is_internal_phone_allowed(to_phone, allowlist=None):
     """
     When internal-only mode is enabled, allow sends only to known app records.
+    With an `allowlist` from internal_phone_allowlist() this is a set lookup;
+    without one it is an indexed phone_digits lookup per table.
     """
     if not getattr(settings, 'SMS_INTERNAL_ONLY', False):
         return True
@@ -257,32 +319,30 @@ def _is_internal_phone_allowed(to_phone):
     target_digits = _normalize_us_digits(to_phone)
     if not target_digits:
         return False
+    if allowlist is not None:
+        return target_digits in allowlist
 
     from .models import Client
     from .models_extensions import WorkerAccount
     from users.models import StaffUser
 
-    for raw_phone in Client.objects.exclude(phone__isnull=True).exclude(phone='').values_list('phone', flat=True):
-        if _normalize_us_digits(raw_phone) == target_digits:
-            return True
-    for raw_phone in WorkerAccount.objects.exclude(phone='').values_list('phone', flat=True):
-        if _normalize_us_digits(raw_phone) == target_digits:
-            return True
-    for raw_phone in StaffUser.objects.exclude(phone__isnull=True).exclude(phone='').values_list('phone', flat=True):
-        if _normalize_us_digits(raw_phone) == target_digits:
-            return True
-    return False
+    digits = target_digits[1:]
+    return any(
+        model.objects.filter(phone_digits=digits).exists()
+        for model in (Client, WorkerAccount, StaffUser)
+    )
 
 
-def send_phone_text_message(phone, body, require_enabled_flag=False):
+def send_phone_text_message(phone, body, require_enabled_flag=False, allowlist=None):
     """
     Send SMS to a raw phone number (not tied to a Client row).
+    Pass `allowlist` (internal_phone_allowlist()) when sending in a loop.
     Returns (success: bool, detail: str).
     """
     to_phone = _to_e164_us(phone)
     if not to_phone:
         return False, 'Phone is not a valid SMS number'
-    if not _is_internal_phone_allowed(to_phone):
+    if not _is_internal_phone_allowed(to_phone, allowlist):
         return False, 'Phone is not allowlisted for internal-only SMS mode'
     if require_enabled_flag and not getattr(settings, 'SMS_FOLLOWUP_ENABLED', False):
         return False, 'SMS_FOLLOWUP_ENABLED is false'
@@ -315,8 +375,8 @@ def send_text_message(
     Send and log one SMS via Azure Communication Services.
     If dedupe_key already exists as sent/pending, return that row instead of sending again.
     """
-    from django.utils import timezone
     from .models_extensions import ClientTextMessage
+    from .sms_dispatch import record_send_error, record_send_result
 
     if dedupe_key:
         existing = ClientTextMessage.objects.filter(dedupe_key=dedupe_key).first()
@@ -382,22 +442,9 @@ def send_text_message(
             message=_compose_sms_body(body),
             enable_delivery_report=True,
         )[0]
-        log.provider_message_id = getattr(result, 'message_id', '') or ''
-        log.provider_response = {
-            'successful': getattr(result, 'successful', None),
-            'http_status_code': getattr(result, 'http_status_code', None),
-            'error_message': getattr(result, 'error_message', None),
-        }
-        if getattr(result, 'successful', False):
-            log.status = ClientTextMessage.STATUS_SENT
-            log.sent_at = timezone.now()
-            log.error_message = ''
-        else:
-            log.status = ClientTextMessage.STATUS_FAILED
-            log.error_message = getattr(result, 'error_message', '') or 'Azure SMS send failed'
+        record_send_result(log, result)
     except Exception as exc:
-        log.status = ClientTextMessage.STATUS_FAILED
-        log.error_message = str(exc)
+        record_send_error(log, str(exc))
 
     log.save(
         update_fields=[
@@ -493,6 +540,55 @@ def send_class_confirmation(client, session, enrollment, today=None):
     return 'failed', log.error_message or 'Text could not be sent.'
 
 
+def queue_class_confirmation(client, session, enrollment):
+    """
+    Queue the confirmation text for the job worker instead of calling the SMS
+    provider on the sign-up request.
+
+    Same outcomes as send_class_confirmation plus 'queued'. 'disabled' and
+    'skipped' are decided here from the preview; with JOB_QUEUE_EAGER the
+    send happens inline and its own outcome is returned.
+    """
+    from .jobs import enqueue
+    from .models import BackgroundJob
+
+    will_send, reason, _body = class_confirmation_preview(client, session)
+    if not will_send:
+        if not getattr(settings, 'SMS_CLASS_CONFIRMATION_ENABLED', False):
+            return 'disabled', reason
+        return 'skipped', f'No text sent. {reason}'
+
+    job, created = enqueue(
+        'clients.notifications.deliver_class_confirmation',
+        {'enrollment_id': enrollment.pk},
+        idempotency_key=f'class-confirmation:{enrollment.pk}',
+    )
+    if not created:
+        return 'skipped', 'Text already sent for this class.'
+    if job.status == BackgroundJob.STATUS_SUCCEEDED and job.result:
+        return job.result['outcome'], job.result['detail']
+    if job.attempts:
+        return 'failed', 'Text could not be sent yet; it will be retried.'
+    return 'queued', 'Confirmation text queued.'
+
+
+def deliver_class_confirmation(enrollment_id):
+    """Background task: send one class confirmation; a provider failure raises so the queue retries."""
+    from .models_classes import ClassEnrollment
+
+    enrollment = (
+        ClassEnrollment.objects.select_related('client', 'session__template')
+        .filter(pk=enrollment_id)
+        .first()
+    )
+    if enrollment is None or enrollment.status != 'registered':
+        return {'outcome': 'skipped', 'detail': 'No text sent. The enrollment was removed.'}
+    outcome, detail = send_class_confirmation(enrollment.client, enrollment.session, enrollment)
+    if outcome == 'failed':
+        raise RuntimeError(detail)
+    return {'outcome': outcome, 'detail': detail}
+
+
 def progress_followup_body(client, checkpoint_days):
     first_name = (client.first_name or client.full_name or 'there').strip()
     return (
@@ -514,10 +610,15 @@ def send_due_progress_followups(today=None, dry_run=False):
     """
     Send progress follow-up SMS at configured checkpoint days after client intake/start.
     Intended to run daily from Azure WebJob/Cron.
+
+    Existing texts for the due checkpoints are looked up in one query (shared
+    with the send), and the sends go out through the batched, concurrent
+    clients.sms_dispatch path.
     """
-    from datetime import date, timedelta
+    from datetime import date
     from .models import Client
     from .models_extensions import ClientTextMessage
+    from .sms_dispatch import send_batch_text_messages
 
     today = today or date.today()
     checkpoints = getattr(settings, 'SMS_FOLLOWUP_CHECKPOINT_DAYS', [30, 60, 90, 120])
@@ -528,7 +629,7 @@ def send_due_progress_followups(today=None, dry_run=False):
         needed_fields.add(start_field)
     clients = Client.objects.exclude(phone__isnull=True).exclude(phone='').only(*needed_fields)
 
-    due = []
+    candidates = []
     for client in clients.iterator(chunk_size=500):
         anchor = _progress_anchor_date(client)
         if not anchor:
@@ -536,16 +637,17 @@ def send_due_progress_followups(today=None, dry_run=False):
         age_days = (today - anchor).days
         for checkpoint in checkpoints:
             if checkpoint <= age_days < checkpoint + window_days:
-                dedupe_key = f'client:{client.pk}:progress-followup:{checkpoint}'
-                if ClientTextMessage.objects.filter(
-                    dedupe_key=dedupe_key,
-                    status__in=[
-                        ClientTextMessage.STATUS_PENDING,
-                        ClientTextMessage.STATUS_SENT,
-                    ],
-                ).exists():
-                    continue
-                due.append((client, checkpoint, dedupe_key))
+                candidates.append((client, checkpoint, f'client:{client.pk}:progress-followup:{checkpoint}'))
+
+    existing_statuses = {}
+    if candidates:
+        existing_statuses = dict(
+            ClientTextMessage.objects.filter(
+                dedupe_key__in=[dedupe_key for _client, _checkpoint, dedupe_key in candidates],
+            ).values_list('dedupe_key', 'status')
+        )
+    already_texted = {ClientTextMessage.STATUS_PENDING, ClientTextMessage.STATUS_SENT}
+    due = [candidate for candidate in candidates if existing_statuses.get(candidate[2]) not in already_texted]
 
     if dry_run:
         return {'due': due, 'sent': 0, 'failed': 0, 'skipped': 0, 'total_due': len(due)}
@@ -553,128 +655,182 @@ def send_due_progress_followups(today=None, dry_run=False):
     if not getattr(settings, 'SMS_FOLLOWUP_ENABLED', False):
         return {'due': due, 'sent': 0, 'failed': 0, 'skipped': len(due), 'total_due': len(due)}
 
-    sent = 0
-    failed = 0
-    skipped = 0
-    for client, checkpoint, dedupe_key in due:
-        log, attempted = send_text_message(
+    texts = [
+        ClientTextMessage(
             client=client,
-            body=progress_followup_body(client, checkpoint),
             purpose=ClientTextMessage.PURPOSE_PROGRESS_FOLLOWUP,
             checkpoint_days=checkpoint,
             dedupe_key=dedupe_key,
+            body=progress_followup_body(client, checkpoint),
         )
-        if not attempted:
-            skipped += 1
-        elif log.status == ClientTextMessage.STATUS_SENT:
-            sent += 1
-        else:
-            failed += 1
+        for client, checkpoint, dedupe_key in due
+    ]
+    result = send_batch_text_messages(texts, existing=existing_statuses)
 
     return {
         'due': due,
-        'sent': sent,
-        'failed': failed,
-        'skipped': skipped,
+        'sent': result['sent'],
+        'failed': result['failed'],
+        'skipped': result['skipped'],
         'total_due': len(due),
     }
 
 
+FOLLOWUP_STAGE_LABELS = [
+    ('overdue_90_plus', '90+ days overdue'),
+    ('overdue_60_plus', '60-89 days overdue'),
+    ('overdue_30_plus', '30-59 days overdue'),
+    ('overdue_under_30', 'Overdue (under 30 days)'),
+    ('current', 'Due soon'),
+]
+
+
+class StaffEmailDirectory:
+    """
+    Resolves CaseNote.staff_member strings to an alert address, loading all
+    staff in one query. Same rules as matching one note at a time: username
+    (case-insensitive), else first and last name, else CASE_NOTE_ALERT_EMAIL,
+    else the first superuser. Each distinct string is resolved once.
+    """
+
+    def __init__(self):
+        from users.models import StaffUser
+
+        self.by_username = {}
+        self.by_name = {}
+        self.superuser_email = None
+        first_superuser = True
+        staff = StaffUser.objects.order_by('pk').values_list(
+            'username', 'first_name', 'last_name', 'email', 'is_superuser'
+        )
+        for username, first_name, last_name, email, is_superuser in staff:
+            self.by_username.setdefault(username.lower(), email or None)
+            if email:
+                self.by_name.setdefault((first_name.lower(), last_name.lower()), email)
+            if is_superuser and first_superuser:
+                self.superuser_email = email or None
+                first_superuser = False
+        self.fallback = getattr(settings, 'CASE_NOTE_ALERT_EMAIL', None) or self.superuser_email
+        self._resolved = {}
+
+    def email_for(self, staff_member):
+        if staff_member not in self._resolved:
+            self._resolved[staff_member] = self._match(staff_member or '') or self.fallback
+        return self._resolved[staff_member]
+
+    def _match(self, staff_member):
+        key = staff_member.lower()
+        if key in self.by_username:
+            return self.by_username[key]
+        name_parts = key.split()
+        if len(name_parts) >= 2:
+            return self.by_name.get((name_parts[0], name_parts[-1]))
+        return None
+
+
+def _followup_digest(notes, today):
+    """Subject, plain text and HTML for one recipient's due follow-ups, most overdue first."""
+    admin_base = _get_admin_base_url()
+    by_stage = {}
+    for note in notes:
+        by_stage.setdefault(followup_stage(note.follow_up_date, today=today), []).append({
+            'note': note,
+            'client': note.client,
+            'days_overdue': (today - note.follow_up_date).days,
+            'admin_url': f'{admin_base}/admin/clients/casenote/{note.pk}/change/',
+        })
+    buckets = [
+        {'stage': stage, 'label': label, 'items': sorted(by_stage[stage], key=lambda item: item['note'].follow_up_date)}
+        for stage, label in FOLLOWUP_STAGE_LABELS
+        if stage in by_stage
+    ]
+    overdue = sum(len(bucket['items']) for bucket in buckets if bucket['stage'] != 'current')
+    subject = f'Follow-up digest: {len(notes)} case note{"s" if len(notes) != 1 else ""}'
+    if overdue:
+        subject += f' ({overdue} overdue)'
+    context = {'buckets': buckets, 'total': len(notes), 'overdue': overdue, 'today': today}
+    try:
+        html = render_to_string('clients/emails/followup_digest.html', context)
+        plain = render_to_string('clients/emails/followup_digest.txt', context)
+    except Exception:
+        html = None
+        plain = '\n'.join(
+            f'{bucket["label"]}: ' + ', '.join(item['client'].full_name for item in bucket['items'])
+            for bucket in buckets
+        )
+    return subject, plain, html
+
+
 def check_and_send_followup_alerts(days_before=1, send_to_staff=True):
     """
     Check for case notes with upcoming or overdue follow-ups and send alerts
-    
+
+    Each recipient gets one digest email listing their due notes grouped by
+    followup_stage; the digests are built up front and sent over one mail
+    connection. Two queries whatever the
+    number of notes: the due notes (with clients) and the staff directory.
+
     Args:
         days_before: Send alerts this many days before the follow-up date (default: 1)
         send_to_staff: If True, send to the staff_member email (default: True)
-    
+
     Returns:
         dict with counts of emails sent
     """
+    from .mailer import build_email, send_emails
     from .models import CaseNote
-    from users.models import StaffUser
-    
+
     today = date.today()
     alert_date = today + timedelta(days=days_before)
-    
+
     # Find case notes with follow-ups due or overdue
-    case_notes = CaseNote.objects.filter(
-        follow_up_date__lte=alert_date
-    ).exclude(
-        follow_up_date__isnull=True
-    ).select_related('client')
-    
+    case_notes = list(
+        CaseNote.objects.filter(
+            follow_up_date__lte=alert_date
+        ).exclude(
+            follow_up_date__isnull=True
+        ).select_related('client')
+    )
+
     sent_count = 0
     error_count = 0
-    bucket_counts = {
-        'current': 0,
-        'overdue_under_30': 0,
-        'overdue_30_plus': 0,
-        'overdue_60_plus': 0,
-        'overdue_90_plus': 0,
-    }
-    
+    bucket_counts = {stage: 0 for stage, _label in FOLLOWUP_STAGE_LABELS}
+    if not case_notes:
+        return {'total_notes': 0, 'emails_sent': 0, 'errors': 0, 'bucket_counts': bucket_counts}
+
+    directory = StaffEmailDirectory()
+    notes_by_recipient = {}
     for note in case_notes:
+        stage = followup_stage(note.follow_up_date, today=today)
+        if stage in bucket_counts:
+            bucket_counts[stage] += 1
+        user_email = directory.email_for(note.staff_member) if send_to_staff else directory.fallback
+        if user_email:
+            notes_by_recipient.setdefault(user_email, []).append(note)
+        else:
+            logger.warning(f"No email address found for case note {note.pk} follow-up alert")
+            error_count += 1
+
+    digests = []
+    for user_email, notes in notes_by_recipient.items():
         try:
-            stage = followup_stage(note.follow_up_date, today=today)
-            if stage in bucket_counts:
-                bucket_counts[stage] += 1
-
-            # Try to find user by staff_member name or email
-            user_email = None
-            
-            if send_to_staff:
-                # Try to match staff_member name to a user
-                try:
-                    # Try exact match first
-                    user = StaffUser.objects.filter(
-                        username__iexact=note.staff_member
-                    ).first()
-                    
-                    if not user:
-                        # Try matching by first/last name
-                        name_parts = note.staff_member.split()
-                        if len(name_parts) >= 2:
-                            user = StaffUser.objects.filter(
-                                first_name__iexact=name_parts[0],
-                                last_name__iexact=name_parts[-1]
-                            ).first()
-                    
-                    if user and user.email:
-                        user_email = user.email
-                except Exception as e:
-                    logger.warning(f"Could not find user for staff_member '{note.staff_member}': {e}")
-            
-            # If no user email found, try to get from settings
-            if not user_email:
-                # Fallback: send to admin email or configured alert email
-                user_email = getattr(settings, 'CASE_NOTE_ALERT_EMAIL', None)
-                if not user_email:
-                    # Try to get from first superuser
-                    try:
-                        admin_user = StaffUser.objects.filter(is_superuser=True).first()
-                        if admin_user and admin_user.email:
-                            user_email = admin_user.email
-                    except:
-                        pass
-            
-            if user_email:
-                if send_followup_alert(note, user_email):
-                    sent_count += 1
-                else:
-                    error_count += 1
-            else:
-                logger.warning(f"No email address found for case note {note.pk} follow-up alert")
-                error_count += 1
-                
+            subject, plain, html = _followup_digest(notes, today)
         except Exception as e:
-            logger.error(f"Error processing follow-up alert for case note {note.pk}: {e}", exc_info=True)
-            error_count += 1
-    
+            logger.error(f"Error building follow-up digest for {user_email}: {e}", exc_info=True)
+            error_count += len(notes)
+            continue
+        digests.append((build_email(subject, plain, html, user_email), len(notes)))
+
+    outcomes = send_emails(message for message, _count in digests)
+    for (_message, note_count), error in zip(digests, outcomes):
+        if error is None:
+            sent_count += 1
+        else:
+            error_count += note_count
+
     return {
-        'total_notes': case_notes.count(),
+        'total_notes': len(case_notes),
         'emails_sent': sent_count,
         'errors': error_count,
         'bucket_counts': bucket_counts,
     }
-
@@ -0,0 +1,172 @@
+"""
+Keyset (cursor) pagination for staff lists and the DRF viewsets.
+
+Pages are cut with `WHERE (updated_at, id) < (last row's values)` on an
+ordering that ends in a unique column, so page 50 costs the same indexed range
+scan as page 1, where OFFSET rescans every skipped row. The position travels
+as an opaque signed cursor: clients pass back `?cursor=` untouched, and a
+cursor minted for one ordering is rejected by another.
+
+Function views use `page_params` + `keyset_page` and return the next cursor
+as `next_cursor` (and the X-Next-Cursor header for list bodies);
+KeysetCursorPagination is the DRF default pagination class.
+"""
+from datetime import date, datetime, time
+
+from django.core import signing
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+CURSOR_SALT = 'clients.pagination.cursor'
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+class InvalidCursor(ValueError):
+    """The cursor was tampered with, truncated, or minted for another ordering."""
+
+
+def keyset_after(ordering, values):
+    """Q for rows strictly after `values` in `ordering` (e.g. ('-updated_at', '-id'))."""
+    condition = Q()
+    ties = Q()
+    for name, value in zip(ordering, values):
+        field = name.lstrip('-')
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        condition |= ties & Q(**{f'{field}__{lookup}': value})
+        ties &= Q(**{field: value})
+    return condition
+
+
+def _pack(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, time):
+        return {'t': value.isoformat()}
+    return value
+
+
+def _unpack(value):
+    if isinstance(value, dict):
+        (kind, text), = value.items()
+        parsed = {'dt': parse_datetime, 'd': parse_date, 't': parse_time}[kind](text)
+        if parsed is None:
+            raise ValueError(text)
+        return parsed
+    return value
+
+
+def encode_cursor(ordering, row):
+    """Opaque cursor pointing just past `row` (a model instance or a values() dict)."""
+    fields = [name.lstrip('-') for name in ordering]
+    values = [row[field] if isinstance(row, dict) else getattr(row, field) for field in fields]
+    return signing.dumps({'o': ','.join(ordering), 'v': [_pack(value) for value in values]}, salt=CURSOR_SALT)
+
+
+def decode_cursor(ordering, cursor):
+    try:
+        payload = signing.loads(cursor, salt=CURSOR_SALT)
+        if payload['o'] != ','.join(ordering) or len(payload['v']) != len(ordering):
+            raise InvalidCursor(cursor)
+        return [_unpack(value) for value in payload['v']]
+    except (signing.BadSignature, KeyError, TypeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def keyset_page(queryset, ordering, cursor=None, limit=40):
+    """
+    (rows, next_cursor) for one page of `queryset` in `ordering`, which must
+    end in a unique column. next_cursor is None on the last page. Raises
+    InvalidCursor for a cursor this ordering did not mint.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(keyset_after(ordering, decode_cursor(ordering, cursor)))
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(ordering, rows[-1])
+
+
+def page_params(request, default_limit, max_limit):
+    """(cursor, limit) from ?cursor= and ?limit=."""
+    limit = min(int(request.GET.get('limit') or default_limit), max_limit)
+    return (request.GET.get('cursor') or '').strip() or None, max(1, limit)
+
+
+def with_next_cursor(response, next_cursor):
+    """Advertise the next page on a response whose body is a bare list."""
+    if next_cursor:
+        response[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    DRF pagination on (created_at, id) by default, or on the field an
+    OrderingFilter picked, plus id. Responses are {'next': url, 'results': [...]};
+    there is no total count, which would cost the full scan this avoids.
+    """
+
+    page_size = api_settings.PAGE_SIZE or 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    default_ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def get_page_size(self, request):
+        try:
+            requested = int(request.query_params.get(self.page_size_query_param) or self.page_size)
+        except ValueError:
+            requested = self.page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def get_ordering(self, queryset, view):
+        """The queryset's explicit ordering when it is on plain columns, else the view's or the default."""
+        ordering = list(queryset.query.order_by) or list(getattr(view, 'cursor_ordering', self.default_ordering))
+        concrete = {field.name for field in queryset.model._meta.concrete_fields} | {'pk'}
+        if not all(isinstance(name, str) and name.lstrip('-') in concrete for name in ordering):
+            ordering = list(getattr(view, 'cursor_ordering', self.default_ordering))
+        if ordering[-1].lstrip('-') not in ('id', 'pk'):
+            ordering.append('-id' if ordering[-1].startswith('-') else 'id')
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = self.get_ordering(queryset, view)
+        try:
+            rows, self.next_cursor = keyset_page(
+                queryset,
+                ordering,
+                request.query_params.get(self.cursor_query_param),
+                self.get_page_size(request),
+            )
+        except InvalidCursor:
+            raise NotFound(self.invalid_cursor_message)
+        return rows
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -6,15 +6,15 @@ from django.db.models import F
 from rest_framework import status
 from rest_framework.permissions import BasePermission
 from rest_framework.response import Response
-from rest_framework.throttling import AnonRateThrottle
 from rest_framework.views import APIView
 
 from .partner_auth import PartnerAPIKeyAuthentication
 from .models_partners import PartnerApiAuditLog, PartnerReferral
 from .phone_utils import normalize_login_phone
+from .throttles import SharedAnonRateThrottle
 
 
-class PartnerReferralThrottle(AnonRateThrottle):
+class PartnerReferralThrottle(SharedAnonRateThrottle):
     scope = 'partner_referral'
 
 
@@ -5,9 +5,6 @@ Stored numbers may include formatting; workers typically enter digits only.
 """
 import re
 
-from django.db import connection
-from django.db.models import Q
-
 
 def phone_digits(phone) -> str:
     if phone is None:
@@ -42,68 +39,66 @@ def default_worker_pin_from_phone(phone) -> str:
     return '1234'
 
 
+def sync_phone_digits(instance, save_kwargs):
+    """
+    Refresh `instance.phone_digits` from `instance.phone` ahead of save().
+
+    The stored column is what the lookups below filter on; when a caller saves
+    with update_fields including `phone`, `phone_digits` is written with it.
+    """
+    instance.phone_digits = normalize_login_phone(instance.phone)
+    update_fields = save_kwargs.get('update_fields')
+    if update_fields and 'phone' in update_fields:
+        save_kwargs['update_fields'] = set(update_fields) | {'phone_digits'}
+
+
 def find_by_normalized_phone(queryset, phone_raw: str):
     """
-    Find a model instance whose `phone` field matches the given input when
-    both are reduced to digits-only (plus exact-match fallbacks).
+    Find a model instance whose `phone` matches the given input when both are
+    normalized with normalize_login_phone.
+
+    One seek on the indexed `phone_digits` column (Client, WorkerAccount and
+    StaffUser keep it in sync on save), instead of rescanning every row.
     """
     digits = normalize_login_phone(phone_raw)
     if not digits:
         return None
-
-    for candidate in (phone_raw, digits):
-        if candidate:
-            hit = queryset.filter(phone=candidate).first()
-            if hit:
-                return hit
-
-    model = queryset.model
-    table = model._meta.db_table
-
-    if connection.vendor == 'postgresql':
-        hit = queryset.extra(
-            where=[f"regexp_replace({table}.phone, '[^0-9]', '', 'g') = %s"],
-            params=[digits],
-        ).first()
-        if hit:
-            return hit
-
-    for obj in queryset.iterator(chunk_size=500):
-        if normalize_login_phone(obj.phone) == digits:
-            return obj
-    return None
+    return queryset.filter(phone_digits=digits).first()
 
 
 def find_all_by_normalized_phone(queryset, phone_raw: str):
     """
-    All rows whose phone matches phone_raw when compared as digits-only
+    All rows whose phone matches phone_raw when compared as normalized digits
     (same rules as find_by_normalized_phone, but returns every match).
     """
     digits = normalize_login_phone(phone_raw)
     if not digits:
         return queryset.none()
+    return queryset.filter(phone_digits=digits)
 
-    q = Q()
-    if phone_raw:
-        q |= Q(phone=phone_raw)
-    q |= Q(phone=digits)
-    exact = queryset.filter(q).distinct()
-    if exact.exists():
-        return exact
-
-    model = queryset.model
-    table = model._meta.db_table
-
-    if connection.vendor == 'postgresql':
-        return queryset.extra(
-            where=[f"regexp_replace({table}.phone, '[^0-9]', '', 'g') = %s"],
-            params=[digits],
-        ).distinct()
-
-    pks = []
-    for obj in queryset.iterator(chunk_size=500):
-        if normalize_login_phone(obj.phone) == digits:
-            pks.append(obj.pk)
-    if not pks:
-        return queryset.none()
-    return queryset.filter(pk__in=pks).distinct()
+
+def backfill_phone_digits(model, batch_size=1000):
+    """
+    Recompute `phone_digits` for rows of `model` whose stored value is stale.
+
+    Walks the table in primary-key batches and bulk-updates only the rows that
+    changed. Returns the number of rows updated.
+    """
+    manager = model._default_manager
+    updated = 0
+    last_pk = 0
+    while True:
+        rows = list(
+            manager.filter(pk__gt=last_pk).order_by('pk').only('pk', 'phone', 'phone_digits')[:batch_size]
+        )
+        if not rows:
+            return updated
+        last_pk = rows[-1].pk
+        stale = []
+        for row in rows:
+            digits = normalize_login_phone(row.phone)
+            if row.phone_digits != digits:
+                row.phone_digits = digits
+                stale.append(row)
+        manager.bulk_update(stale, ['phone_digits'])
+        updated += len(stale)
@@ -12,15 +12,24 @@ from django.http import HttpResponse
 from django.shortcuts import render
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q, Count
+from django.db.models import Count, F, Q
+from django.db.models.functions import Coalesce
 
 from .models import Client, CaseNote, Document
+from .csv_streaming import (
+    iter_csv_lines,
+    iter_keyset,
+    iter_queryset,
+    streaming_csv_response,
+)
 from .citybuild_docs import (
     CITYBUILD_CHECKLIST_ITEMS,
     CITYBUILD_PROGRAMS,
     evaluate_citybuild_packet,
 )
-from .models_extensions import WorkAssignment, WorkSite, WorkerTimePunch
+from .models_extensions import WorkAssignment, WorkSite, WorkerAccount, WorkerDailyTimesheet, WorkerTimePunch
+from .phone_utils import normalize_login_phone
+from .worker_hours import GROSS_DURATION, hours_by_worker_day
 
 
 # Accountants read these reports in local time, but the DB stores UTC.
@@ -43,10 +52,6 @@ def _client_metrics_snapshot():
     return _client_metrics_snapshot_for_queryset(Client.objects.all())
 
 
-def _digits_only(value):
-    return re.sub(r'\D', '', value or '')
-
-
 def _slug_for_filename(value):
     slug = re.sub(r'[^a-z0-9]+', '_', (value or '').lower()).strip('_')
     return slug or 'client'
@@ -62,18 +67,17 @@ def _resolve_client_lookup(raw_lookup):
         if by_id:
             return by_id, None
 
-    lookup_digits = _digits_only(lookup)
+    lookup_digits = normalize_login_phone(lookup)
     if lookup_digits:
-        for candidate in Client.objects.only('id', 'phone'):
-            candidate_digits = _digits_only(candidate.phone)
-            if not candidate_digits:
-                continue
-            if (
-                candidate_digits == lookup_digits
-                or candidate_digits.endswith(lookup_digits)
-                or lookup_digits.endswith(candidate_digits)
-            ):
-                return candidate, None
+        # Stored phone equal to the lookup or to its tail (index seek on
+        # phone_digits), then stored phones ending in a partial lookup.
+        tails = {lookup_digits[index:] for index in range(len(lookup_digits))}
+        by_phone = (
+            Client.objects.filter(phone_digits__in=tails).first()
+            or Client.objects.filter(phone_digits__endswith=lookup_digits).first()
+        )
+        if by_phone:
+            return by_phone, None
 
     by_name = list(
         Client.objects.filter(
@@ -151,10 +155,19 @@ class AvailableWorkersCSVView(LoginRequiredMixin, View):
         specific_day = request.GET.get('day')  # e.g., 'monday'
         specific_date = request.GET.get('date')  # e.g., '2025-10-15'
         
-        # Base queryset - active clients who have completed program
+        thirty_days_ago = date.today() - timedelta(days=30)
+        recent = Q(work_assignments__assignment_date__gte=thirty_days_ago)
+
+        # Base queryset - active clients who have completed program.
+        # Recent/no-show/call-out counts ride along as conditional aggregates
+        # so streaming does not fire three COUNTs per client.
         clients = Client.objects.filter(
             status__in=['active', 'program_complete'],
-        ).select_related().prefetch_related('work_assignments')
+        ).annotate(
+            recent_assignments=Count('work_assignments', filter=recent),
+            recent_no_shows=Count('work_assignments', filter=recent & Q(work_assignments__status='no_show')),
+            recent_call_outs=Count('work_assignments', filter=recent & Q(work_assignments__status='called_out')),
+        )
 
         # `day` filter was tied to removed weekly-availability records; ignored for compatibility.
         if specific_day:
@@ -168,17 +181,11 @@ class AvailableWorkersCSVView(LoginRequiredMixin, View):
             ).values_list('client_id', flat=True)
             clients = clients.exclude(id__in=assigned_client_ids)
         
-        # Create CSV response
-        response = HttpResponse(content_type='text/csv')
         filename = f'available_workers_{date.today()}'
         if specific_day:
             filename += f'_{specific_day}'
-        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
-        
-        writer = csv.writer(response)
-        
-        # Header row
-        writer.writerow([
+
+        header = [
             'Name',
             'Phone',
             'Email',
@@ -189,44 +196,23 @@ class AvailableWorkersCSVView(LoginRequiredMixin, View):
             'Call Outs (Last 30 days)',
             'Status',
             'Notes'
-        ])
-        
-        # Data rows
-        for client in clients:
-            available_days = ''
-            
-            # Count recent assignments
-            thirty_days_ago = date.today() - timedelta(days=30)
-            recent_assignments = client.work_assignments.filter(
-                assignment_date__gte=thirty_days_ago
-            ).count()
-            
-            # Count no-shows
-            no_shows = client.work_assignments.filter(
-                assignment_date__gte=thirty_days_ago,
-                status='no_show'
-            ).count()
-            
-            # Count call-outs
-            call_outs = client.work_assignments.filter(
-                assignment_date__gte=thirty_days_ago,
-                status='called_out'
-            ).count()
-            
-            writer.writerow([
+        ]
+        rows = (
+            [
                 client.full_name,
                 client.phone or '',
                 client.email or '',
                 client.get_language_display(),
-                available_days or '—',
-                recent_assignments,
-                no_shows,
-                call_outs,
+                '—',
+                client.recent_assignments,
+                client.recent_no_shows,
+                client.recent_call_outs,
                 client.get_status_display(),
                 client.additional_notes or ''
-            ])
-        
-        return response
+            ]
+            for client in iter_queryset(clients)
+        )
+        return streaming_csv_response(f'{filename}.csv', header, rows)
 
 
 class WorkforceInventoryPackageView(LoginRequiredMixin, View):
@@ -472,118 +458,116 @@ class ClientFilePackageView(LoginRequiredMixin, View):
         return response
 
 
-def _client_metrics_snapshot_for_queryset(clients):
+# Funder workbook labels, in workbook order. Each label maps to the stored
+# values that roll up into it; anything unmatched lands in the "unknown" row.
+GENDER_METRIC_LABELS = [
+    ('Female', {'F'}),
+    ('Male', {'M'}),
+    ('Genderqueer or Gender Non-binary', {'NB'}),
+    ('Not listed, specified', {'O'}),
+    ('Declined to state', {'P'}),
+]
+
+RACE_METRIC_LABELS = [
+    ('American Indian or Alaska Native, alone', {'american_indian', 'native'}),
+    ('Asian, alone', {'asian'}),
+    ('Black or African-American, alone', {'black'}),
+    ('Hispanic, Latino, or Spanish', {'hispanic_latinx', 'latinx'}),
+    ('Middle Eastern or North African, alone', {'middle_eastern'}),
+    ('Native Hawaiian or Other Pacific Islander, alone', {'pacific_islander'}),
+    ('White, alone', {'white'}),
+    ('Other Race, alone', {'other'}),
+    ('Two or More Races', {'multiracial', 'mixed'}),
+    ('Declined to state', {'decline_state', 'prefer_not'}),
+]
+
+UNKNOWN_METRIC_LABEL = 'Data Unknown or Unavailable.'
+
+
+def _birthday_cutoff(reference_date, years):
+    """Latest DOB that makes someone at least `years` old on reference_date."""
+    try:
+        return reference_date.replace(year=reference_date.year - years)
+    except ValueError:
+        # Feb 29 reference date in a non-leap target year.
+        return reference_date.replace(year=reference_date.year - years, day=28)
+
+
+def _age_band_filters(reference_date):
+    """Age-band Q objects matching Client.age math, so the DB can bucket DOBs."""
+    turns_18 = _birthday_cutoff(reference_date, 18)
+    turns_25 = _birthday_cutoff(reference_date, 25)
+    turns_55 = _birthday_cutoff(reference_date, 55)
+    return [
+        ('Youth (17 and under)', Q(dob__gt=turns_18)),
+        ('TAY (age 18 to 24)', Q(dob__gt=turns_25, dob__lte=turns_18)),
+        ('Adults (age 25 to 54)', Q(dob__gt=turns_55, dob__lte=turns_25)),
+        ('Older Adults (age 55 and over)', Q(dob__lte=turns_55)),
+    ]
+
+
+def _client_metrics_snapshot_for_queryset(clients, reference_date=None):
     """
     Same metric rollups as _client_metrics_snapshot(), but for a filtered queryset.
+
+    Every rollup is a conditional COUNT in one query grouped by zip code, so
+    the database returns one row per distinct zip instead of one per client.
+    Ages are measured on reference_date (default: today).
     """
-    today = date.today()
+    reference_date = reference_date or date.today()
 
-    def _age_bucket(dob):
-        if not dob:
-            return 'unknown'
-        age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
-        if age <= 17:
-            return 'youth_17_under'
-        if 18 <= age <= 24:
-            return 'tay_18_24'
-        if 25 <= age <= 54:
-            return 'adult_25_54'
-        return 'older_55_plus'
-
-    metrics = {
-        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'total_clients': clients.count(),
-        'active_clients': clients.filter(status='active').count(),
-        'program_counts': {},
-        'gender_counts': {
-            'Female': 0,
-            'Male': 0,
-            'Genderqueer or Gender Non-binary': 0,
-            'Not listed, specified': 0,
-            'Declined to state': 0,
-            'Data Unknown or Unavailable.': 0,
-        },
-        'age_counts': {
-            'Youth (17 and under)': 0,
-            'TAY (age 18 to 24)': 0,
-            'Adults (age 25 to 54)': 0,
-            'Older Adults (age 55 and over)': 0,
-            'Declined to state': 0,
-            'Data Unknown or Unavailable.': 0,
-        },
-        'race_counts': {
-            'American Indian or Alaska Native, alone': 0,
-            'Asian, alone': 0,
-            'Black or African-American, alone': 0,
-            'Hispanic, Latino, or Spanish': 0,
-            'Middle Eastern or North African, alone': 0,
-            'Native Hawaiian or Other Pacific Islander, alone': 0,
-            'White, alone': 0,
-            'Other Race, alone': 0,
-            'Two or More Races': 0,
-            'Declined to state': 0,
-            'Data Unknown or Unavailable.': 0,
-        },
-        'zip_counts': {},
-    }
+    # Aggregate annotations (e.g. Count('casenotes')) join extra rows in;
+    # count against the matching ids instead so totals are not inflated.
+    if any(getattr(expr, 'contains_aggregate', False) for expr in clients.query.annotations.values()):
+        clients = Client.objects.filter(pk__in=clients.order_by().values('pk'))
 
-    for key, label in Client.TRAINING_INTEREST_CHOICES:
-        metrics['program_counts'][label] = clients.filter(training_interest=key).count()
-
-    for c in clients.only('gender', 'dob', 'demographic_info', 'zip_code'):
-        if c.gender == 'F':
-            metrics['gender_counts']['Female'] += 1
-        elif c.gender == 'M':
-            metrics['gender_counts']['Male'] += 1
-        elif c.gender == 'NB':
-            metrics['gender_counts']['Genderqueer or Gender Non-binary'] += 1
-        elif c.gender == 'O':
-            metrics['gender_counts']['Not listed, specified'] += 1
-        elif c.gender == 'P':
-            metrics['gender_counts']['Declined to state'] += 1
-        else:
-            metrics['gender_counts']['Data Unknown or Unavailable.'] += 1
-
-        age_bucket = _age_bucket(c.dob)
-        if age_bucket == 'youth_17_under':
-            metrics['age_counts']['Youth (17 and under)'] += 1
-        elif age_bucket == 'tay_18_24':
-            metrics['age_counts']['TAY (age 18 to 24)'] += 1
-        elif age_bucket == 'adult_25_54':
-            metrics['age_counts']['Adults (age 25 to 54)'] += 1
-        elif age_bucket == 'older_55_plus':
-            metrics['age_counts']['Older Adults (age 55 and over)'] += 1
-        else:
-            metrics['age_counts']['Data Unknown or Unavailable.'] += 1
-
-        if c.demographic_info in {'american_indian', 'native'}:
-            metrics['race_counts']['American Indian or Alaska Native, alone'] += 1
-        elif c.demographic_info == 'asian':
-            metrics['race_counts']['Asian, alone'] += 1
-        elif c.demographic_info == 'black':
-            metrics['race_counts']['Black or African-American, alone'] += 1
-        elif c.demographic_info in {'hispanic_latinx', 'latinx'}:
-            metrics['race_counts']['Hispanic, Latino, or Spanish'] += 1
-        elif c.demographic_info == 'middle_eastern':
-            metrics['race_counts']['Middle Eastern or North African, alone'] += 1
-        elif c.demographic_info == 'pacific_islander':
-            metrics['race_counts']['Native Hawaiian or Other Pacific Islander, alone'] += 1
-        elif c.demographic_info == 'white':
-            metrics['race_counts']['White, alone'] += 1
-        elif c.demographic_info in {'multiracial', 'mixed'}:
-            metrics['race_counts']['Two or More Races'] += 1
-        elif c.demographic_info in {'decline_state', 'prefer_not'}:
-            metrics['race_counts']['Declined to state'] += 1
-        elif c.demographic_info == 'other':
-            metrics['race_counts']['Other Race, alone'] += 1
-        else:
-            metrics['race_counts']['Data Unknown or Unavailable.'] += 1
-
-        zip_code = (c.zip_code or '').strip()
+    age_bands = _age_band_filters(reference_date)
+    aggregates = {
+        'total': Count('pk'),
+        'active': Count('pk', filter=Q(status='active')),
+    }
+    for index, (key, _label) in enumerate(Client.TRAINING_INTEREST_CHOICES):
+        aggregates[f'program_{index}'] = Count('pk', filter=Q(training_interest=key))
+    for index, (_label, values) in enumerate(GENDER_METRIC_LABELS):
+        aggregates[f'gender_{index}'] = Count('pk', filter=Q(gender__in=values))
+    for index, (_label, band) in enumerate(age_bands):
+        aggregates[f'age_{index}'] = Count('pk', filter=band)
+    for index, (_label, values) in enumerate(RACE_METRIC_LABELS):
+        aggregates[f'race_{index}'] = Count('pk', filter=Q(demographic_info__in=values))
+
+    totals = {name: 0 for name in aggregates}
+    zip_counts = {}
+    for row in clients.order_by().values('zip_code').annotate(**aggregates):
+        for name in aggregates:
+            totals[name] += row[name]
+        zip_code = (row['zip_code'] or '').strip()
         if zip_code:
-            metrics['zip_counts'][zip_code] = metrics['zip_counts'].get(zip_code, 0) + 1
+            zip_counts[zip_code] = zip_counts.get(zip_code, 0) + row['total']
+
+    def _labelled(prefix, labels):
+        return {label: totals[f'{prefix}_{index}'] for index, label in enumerate(labels)}
+
+    gender_counts = _labelled('gender', [label for label, _values in GENDER_METRIC_LABELS])
+    gender_counts[UNKNOWN_METRIC_LABEL] = totals['total'] - sum(gender_counts.values())
 
-    return metrics
+    age_counts = _labelled('age', [label for label, _band in age_bands])
+    # Intake never records a declined age, but the workbook keeps the row.
+    age_counts['Declined to state'] = 0
+    age_counts[UNKNOWN_METRIC_LABEL] = totals['total'] - sum(age_counts.values())
+
+    race_counts = _labelled('race', [label for label, _values in RACE_METRIC_LABELS])
+    race_counts[UNKNOWN_METRIC_LABEL] = totals['total'] - sum(race_counts.values())
+
+    return {
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'total_clients': totals['total'],
+        'active_clients': totals['active'],
+        'program_counts': _labelled('program', [label for _key, label in Client.TRAINING_INTEREST_CHOICES]),
+        'gender_counts': gender_counts,
+        'age_counts': age_counts,
+        'race_counts': race_counts,
+        'zip_counts': zip_counts,
+    }
 
 
 class WorkAssignmentsReportCSVView(LoginRequiredMixin, View):
@@ -621,12 +605,7 @@ class WorkAssignmentsReportCSVView(LoginRequiredMixin, View):
         elif assigned_by:
             assignments = assignments.filter(assigned_by__icontains=assigned_by.strip())
         
-        # Create CSV
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="assignments_{start_date}_to_{end_date}.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow([
+        header = [
             'Date',
             'Worker Name',
             'Phone',
@@ -640,10 +619,9 @@ class WorkAssignmentsReportCSVView(LoginRequiredMixin, View):
             'Call Out Reason',
             'Replacement',
             'Notes'
-        ])
-        
-        for assignment in assignments:
-            writer.writerow([
+        ]
+        rows = (
+            [
                 assignment.assignment_date,
                 assignment.client.full_name,
                 assignment.client.phone or '',
@@ -657,15 +635,30 @@ class WorkAssignmentsReportCSVView(LoginRequiredMixin, View):
                 assignment.callout_reason or '',
                 assignment.replacement_client.full_name if assignment.replacement_client else '',
                 assignment.assignment_notes or ''
-            ])
-        
-        return response
+            ]
+            for assignment in iter_queryset(assignments)
+        )
+        return streaming_csv_response(f'assignments_{start_date}_to_{end_date}.csv', header, rows)
 
 
 def _created_range_requested(request):
     return request.GET.get('created_range') in {'1', 'true', 'True'}
 
 
+def _annotate_client_outcomes(clients):
+    """
+    Note/document totals and last note date read from the client's ClientRollup.
+
+    One LEFT JOIN on the rollup primary key instead of counting notes and
+    documents across joins; note bodies are never read.
+    """
+    return clients.annotate(
+        case_notes_total=Coalesce(F('rollup__case_notes_count'), 0),
+        documents_on_file=Coalesce(F('rollup__documents_count'), 0),
+        last_case_note_date=F('rollup__last_note_date'),
+    )
+
+
 def _clients_for_outcomes_report(request):
     """
     Client queryset for outcomes exports.
@@ -677,10 +670,7 @@ def _clients_for_outcomes_report(request):
     client_status = (request.GET.get('status') or '').strip()
     mine = request.GET.get('mine')
 
-    clients = Client.objects.annotate(
-        case_notes_total=Count('casenotes'),
-        documents_on_file=Count('documents'),
-    )
+    clients = _annotate_client_outcomes(Client.objects.all())
     if mine in {'1', 'true', 'True'}:
         clients = clients.filter(staff_name__in=_staff_aliases(request.user))
     elif case_manager:
@@ -726,16 +716,19 @@ CLIENT_OUTCOMES_HEADERS = [
 ]
 
 
-def _write_client_outcomes_csv(writer, clients):
-    notes_by_client = {}
-    for client in clients.prefetch_related('casenotes'):
-        notes_by_client[client.id] = list(client.casenotes.all().order_by('-note_date', '-created_at'))
+# Keyset order for walking the outcomes export; id breaks updated_at ties.
+CLIENT_OUTCOMES_ORDERING = ('-updated_at', '-id')
 
-    writer.writerow(CLIENT_OUTCOMES_HEADERS)
-    for client in clients:
-        notes = notes_by_client.get(client.id, [])
-        last_note = notes[0] if notes else None
-        writer.writerow([
+
+def _client_outcomes_csv_rows(clients):
+    """
+    Outcomes rows, one keyset page of clients per query.
+
+    Totals and the last note date come from _annotate_client_outcomes(), so
+    the query count depends only on the page count, never on notes per client.
+    """
+    for client in iter_keyset(clients, CLIENT_OUTCOMES_ORDERING):
+        yield [
             client.id,
             client.full_name,
             client.phone or '',
@@ -752,16 +745,25 @@ def _write_client_outcomes_csv(writer, clients):
             client.program_start_date.isoformat() if client.program_start_date else '',
             client.program_completed_date.isoformat() if client.program_completed_date else '',
             'Yes' if client.resume else 'No',
-            getattr(client, 'documents_on_file', 0) or 0,
-            getattr(client, 'case_notes_total', len(notes)),
-            last_note.note_date.strftime('%Y-%m-%d') if last_note and last_note.note_date else '',
-        ])
+            client.documents_on_file,
+            client.case_notes_total,
+            client.last_case_note_date.strftime('%Y-%m-%d') if client.last_case_note_date else '',
+        ]
+
+
+def _write_client_outcomes_csv(writer, clients):
+    writer.writerow(CLIENT_OUTCOMES_HEADERS)
+    writer.writerows(_client_outcomes_csv_rows(clients))
 
 
-def _build_client_outcomes_summary_html(clients, request):
-    metrics = _client_metrics_snapshot_for_queryset(clients)
-    unassigned = clients.filter(Q(staff_name__isnull=True) | Q(staff_name='')).count()
-    no_notes = clients.filter(case_notes_total=0).count()
+def _build_client_outcomes_summary_html(clients, request, metrics=None):
+    metrics = metrics or _client_metrics_snapshot_for_queryset(clients)
+    gaps = clients.aggregate(
+        unassigned=Count('pk', filter=Q(staff_name__isnull=True) | Q(staff_name='')),
+        no_notes=Count('pk', filter=Q(case_notes_total=0)),
+    )
+    unassigned = gaps['unassigned']
+    no_notes = gaps['no_notes']
     created_filter = 'Yes (created date range applied)' if _created_range_requested(request) else 'No (all clients in system)'
 
     rows = []
@@ -774,8 +776,8 @@ def _build_client_outcomes_summary_html(clients, request):
     if not rows:
         rows.append('<tr><td colspan="5">No clients matched these filters.</td></tr>')
     more = ''
-    if clients.count() > 500:
-        more = f'<p class="meta">Showing first 500 of {clients.count()} clients. Open the CSV in the package for the full list.</p>'
+    if metrics['total_clients'] > 500:
+        more = f'<p class="meta">Showing first 500 of {metrics["total_clients"]} clients. Open the CSV in the package for the full list.</p>'
 
     return f"""<!doctype html>
 <html><head><meta charset="utf-8"><title>Client Outcomes Summary</title>
@@ -816,13 +818,11 @@ class ClientOutcomesReportCSVView(LoginRequiredMixin, View):
 
     def get(self, request):
         clients = _clients_for_outcomes_report(request)
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = (
-            f'attachment; filename="client_outcomes_{date.today().isoformat()}.csv"'
+        return streaming_csv_response(
+            f'client_outcomes_{date.today().isoformat()}.csv',
+            CLIENT_OUTCOMES_HEADERS,
+            _client_outcomes_csv_rows(clients),
         )
-        writer = csv.writer(response)
-        _write_client_outcomes_csv(writer, clients)
-        return response
 
 
 class ClientOutcomesPackageView(LoginRequiredMixin, View):
@@ -830,15 +830,16 @@ class ClientOutcomesPackageView(LoginRequiredMixin, View):
 
     def get(self, request):
         clients = _clients_for_outcomes_report(request)
+        metrics = _client_metrics_snapshot_for_queryset(clients)
         csv_io = io.StringIO()
         _write_client_outcomes_csv(csv.writer(csv_io), clients)
-        html = _build_client_outcomes_summary_html(clients, request)
+        html = _build_client_outcomes_summary_html(clients, request, metrics=metrics)
         readme = (
             'Client Outcomes Package\n'
             '========================\n'
             '1) Open client_outcomes.csv in Excel or Google Sheets.\n'
             '2) Print client_outcomes_summary.html for a quick snapshot.\n'
-            f'Total clients in this export: {clients.count()}\n'
+            f'Total clients in this export: {metrics["total_clients"]}\n'
             'Note: By default this includes ALL clients. Use Reports Hub checkbox '
             '"Only clients created in date range" to narrow.\n'
         )
@@ -863,10 +864,11 @@ class ManagerOperationsPackageView(LoginRequiredMixin, View):
 
     def get(self, request):
         clients = _clients_for_outcomes_report(request)
+        metrics = _client_metrics_snapshot_for_queryset(clients)
 
         outcomes_csv = io.StringIO()
         _write_client_outcomes_csv(csv.writer(outcomes_csv), clients)
-        outcomes_html = _build_client_outcomes_summary_html(clients, request)
+        outcomes_html = _build_client_outcomes_summary_html(clients, request, metrics=metrics)
 
         pitstop_io = io.StringIO()
         start_date = (request.GET.get('start_date') or '').strip()
@@ -888,7 +890,7 @@ h1{{margin-bottom:6px}}.step{{margin:10px 0;padding:10px 14px;background:#f8fafc
 </style></head><body>
 <h1>Manager Operations Package</h1>
 <p>Generated {datetime.now().strftime('%Y-%m-%d %H:%M')}. Unzip this folder, then:</p>
-<div class="step"><strong>1.</strong> Open <code>client_outcomes.csv</code> in Excel — full caseload ({clients.count()} clients).</div>
+<div class="step"><strong>1.</strong> Open <code>client_outcomes.csv</code> in Excel — full caseload ({metrics['total_clients']} clients).</div>
 <div class="step"><strong>2.</strong> Print <code>client_outcomes_summary.html</code> for a one-page meeting snapshot.</div>
 <div class="step"><strong>3.</strong> Review <code>pitstop_hours.csv</code> for clocked time (uses activity date range from Reports Hub).</div>
 </body></html>"""
@@ -925,11 +927,7 @@ class CallOutReportCSVView(LoginRequiredMixin, View):
             status='called_out',
         ).select_related('client', 'work_site', 'replacement_client')
 
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="callouts_{start_date}_to_{end_date}.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow([
+        header = [
             'Date',
             'Worker Name',
             'Phone',
@@ -939,10 +937,9 @@ class CallOutReportCSVView(LoginRequiredMixin, View):
             'Replacement found',
             'Replacement name',
             'Assignment notes',
-        ])
-
-        for a in assignments:
-            writer.writerow([
+        ]
+        rows = (
+            [
                 a.assignment_date,
                 a.client.full_name,
                 a.client.phone or '',
@@ -952,9 +949,10 @@ class CallOutReportCSVView(LoginRequiredMixin, View):
                 'Yes' if a.replacement_found else 'No',
                 a.replacement_client.full_name if a.replacement_client else '',
                 a.assignment_notes or '',
-            ])
-
-        return response
+            ]
+            for a in iter_queryset(assignments)
+        )
+        return streaming_csv_response(f'callouts_{start_date}_to_{end_date}.csv', header, rows)
 
 
 # Columns ordered for accountant/staff review: who → each punch with its
@@ -1040,10 +1038,8 @@ def _format_punch_row(punch):
 
 
 def write_pitstop_hours_csv(stream, punches):
-    writer = csv.writer(stream)
-    writer.writerow(PITSTOP_HOURS_CSV_HEADER)
-    for punch in punches:
-        writer.writerow(_format_punch_row(punch))
+    for line in iter_csv_lines(PITSTOP_HOURS_CSV_HEADER, (_format_punch_row(punch) for punch in punches)):
+        stream.write(line)
     return stream
 
 
@@ -1081,10 +1077,12 @@ def _parse_pitstop_hours_report_params(request):
         'worker_id': worker_id,
         'only_complete': only_complete,
         'min_hours_value': min_hours_value,
+        'by_shift': request.GET.get('detail') == 'shifts',
+        'by_day': request.GET.get('group') == 'day',
     }, None
 
 
-def _pitstop_punches_for_hours_report(params):
+def _pitstop_punch_queryset_for_hours_report(params):
     punches = (
         WorkerTimePunch.objects.filter(
             clock_in_at__date__gte=params['start_date'],
@@ -1099,50 +1097,148 @@ def _pitstop_punches_for_hours_report(params):
         punches = punches.filter(worker_account_id=params['worker_id'])
     if params['only_complete']:
         punches = punches.exclude(clock_out_at__isnull=True)
+    return _apply_pitstop_min_hours(punches, params['min_hours_value'])
 
-    punch_list = list(punches)
-    min_hours_value = params['min_hours_value']
-    if min_hours_value is not None:
-        punch_list = [
-            punch for punch in punch_list
-            if (_pitstop_punch_hours(punch) or 0) >= min_hours_value
-        ]
-    return punch_list
 
+def _apply_pitstop_min_hours(punches, min_hours_value):
+    if min_hours_value is None or min_hours_value <= 0:
+        return punches
+    # Compared against gross hours as printed (2 decimals), so 4.497 h passes a 4.50 minimum.
+    threshold = timedelta(hours=min_hours_value) - timedelta(hours=0.005)
+    return punches.alias(gross_duration=GROSS_DURATION).filter(gross_duration__gte=threshold)
 
-def _pitstop_hours_worker_totals(punches):
-    """Roll up completed-shift net hours by worker for fiscal printouts."""
+
+def _pitstop_punches_for_hours_report(params):
+    return list(_pitstop_punch_queryset_for_hours_report(params))
+
+
+def _timesheets_cover(params):
+    """Day rows answer the report unless it filters on something only a punch carries."""
+    return not params['work_site_id'] and params['min_hours_value'] is None
+
+
+def _worker_name(account):
+    worker_client = getattr(account, 'client', None) if account else None
+    return worker_client.full_name if worker_client else 'Unknown worker'
+
+
+def _pitstop_days_for_hours_report(params):
+    """
+    Worker-day totals for the report, ordered like the punch rows: the
+    pre-rolled WorkerDailyTimesheet rows (one indexed range scan), or, with a
+    work site or minimum-hours filter, the matching punches grouped by day.
+    """
+    if not _timesheets_cover(params):
+        days = list(hours_by_worker_day(_pitstop_punch_queryset_for_hours_report(params)))
+        accounts = WorkerAccount.objects.select_related('client').in_bulk({day['worker_account_id'] for day in days})
+        for day in days:
+            day['name'] = _worker_name(accounts.get(day['worker_account_id']))
+        return sorted(days, key=lambda day: (day['name'].lower(), day['work_date']))
+
+    timesheets = (
+        WorkerDailyTimesheet.objects.filter(
+            work_date__gte=params['start_date'],
+            work_date__lte=params['end_date'],
+        )
+        .select_related('worker_account__client')
+        .order_by('worker_account__client__last_name', 'worker_account__client__first_name', 'work_date')
+    )
+    if params['worker_id']:
+        timesheets = timesheets.filter(worker_account_id=params['worker_id'])
+    if params['only_complete']:
+        timesheets = timesheets.filter(shifts__gt=0)
+    return [
+        {
+            'worker_account_id': timesheet.worker_account_id,
+            'work_date': timesheet.work_date,
+            'name': _worker_name(timesheet.worker_account),
+            'shifts': timesheet.shifts,
+            'open_shifts': 0 if params['only_complete'] else timesheet.open_shifts,
+            'gross_hours': timesheet.gross_hours,
+            'lunch_minutes': timesheet.lunch_minutes,
+            'net_hours': timesheet.net_hours,
+        }
+        for timesheet in iter_queryset(timesheets)
+    ]
+
+
+def _pitstop_hours_worker_totals(days):
+    """Roll up worker-day rows by worker for fiscal printouts."""
     totals = {}
+    for day in days:
+        row = totals.setdefault(day['worker_account_id'], {
+            'name': day['name'],
+            'shifts': 0,
+            'days': 0,
+            'gross_hours': 0,
+            'lunch_minutes': 0,
+            'net_hours': 0,
+            'open_shifts': 0,
+        })
+        row['days'] += 1
+        for field in ('shifts', 'gross_hours', 'lunch_minutes', 'net_hours', 'open_shifts'):
+            row[field] += day[field]
+    return sorted(totals.values(), key=lambda item: item['name'].lower())
+
+
+PITSTOP_DAILY_HOURS_CSV_HEADER = [
+    'Worker Name',
+    'Date',
+    'Shifts',
+    'Open Shifts',
+    'Gross Hours',
+    'Lunch (min)',
+    'Net Hours',
+    'Short Day?',
+    'Worker ID',
+]
+
+
+def _format_day_row(day):
+    return [
+        day['name'],
+        day['work_date'].isoformat(),
+        day['shifts'],
+        day['open_shifts'] or '',
+        f'{day["gross_hours"]:.2f}',
+        day['lunch_minutes'] or '',
+        f'{day["net_hours"]:.2f}',
+        ('Yes' if day['net_hours'] < _short_shift_threshold() else 'No') if day['shifts'] else '',
+        day['worker_account_id'],
+    ]
+
+
+def write_pitstop_daily_hours_csv(stream, days):
+    for line in iter_csv_lines(PITSTOP_DAILY_HOURS_CSV_HEADER, (_format_day_row(day) for day in days)):
+        stream.write(line)
+    return stream
+
+
+def _shift_detail_rows(punches):
+    rows = []
     for punch in punches:
         worker_client = getattr(punch.worker_account, 'client', None) if punch.worker_account else None
-        name = worker_client.full_name if worker_client else 'Unknown worker'
-        key = punch.worker_account_id or name
-        if key not in totals:
-            totals[key] = {
-                'name': name,
-                'shifts': 0,
-                'days': set(),
-                'gross_hours': 0.0,
-                'lunch_minutes': 0,
-                'net_hours': 0.0,
-                'open_shifts': 0,
-            }
-        row = totals[key]
-        day_label = _local_date(punch.clock_in_at)
-        if day_label:
-            row['days'].add(day_label)
-        if not punch.clock_out_at:
-            row['open_shifts'] += 1
-            continue
-        row['shifts'] += 1
-        row['gross_hours'] += _pitstop_punch_hours(punch) or 0
-        row['lunch_minutes'] += punch.lunch_minutes or 0
-        row['net_hours'] += punch.net_hours or 0
-    return sorted(totals.values(), key=lambda item: item['name'].lower())
+        gross_hours = _pitstop_punch_hours(punch)
+        net_hours = punch.net_hours
+        rows.append(
+            f'<tr>'
+            f'<td>{escape(worker_client.full_name if worker_client else "Unknown")}</td>'
+            f'<td>{_local_date(punch.clock_in_at)}</td>'
+            f'<td>{_local_time_12h(punch.clock_in_at)}</td>'
+            f'<td>{_local_time_12h(punch.clock_out_at) or "—"}</td>'
+            f'<td style="text-align:right;">{punch.lunch_minutes or "—"}</td>'
+            f'<td style="text-align:right;">{f"{gross_hours:.2f}" if gross_hours is not None else "—"}</td>'
+            f'<td style="text-align:right;">{f"{net_hours:.2f}" if net_hours is not None else "—"}</td>'
+            f'<td>{escape(punch.work_site.name if punch.work_site else "—")}</td>'
+            f'<td>{"Complete" if punch.clock_out_at else "Open"}</td>'
+            f'</tr>'
+        )
+    return rows
 
 
-def _build_pitstop_hours_printable_html(punches, params):
-    totals = _pitstop_hours_worker_totals(punches)
+def _build_pitstop_hours_printable_html(days, params, punches=None):
+    """Worker totals plus a per-day detail table, or per-shift detail when `punches` is given."""
+    totals = _pitstop_hours_worker_totals(days)
     grand_net = sum(row['net_hours'] for row in totals)
     grand_gross = sum(row['gross_hours'] for row in totals)
     completed_shifts = sum(row['shifts'] for row in totals)
@@ -1164,7 +1260,7 @@ def _build_pitstop_hours_printable_html(punches, params):
         summary_rows.append(
             f'<tr>'
             f'<td>{escape(row["name"])}</td>'
-            f'<td style="text-align:center;">{len(row["days"])}</td>'
+            f'<td style="text-align:center;">{row["days"]}</td>'
             f'<td style="text-align:center;">{row["shifts"]}</td>'
             f'<td style="text-align:right;">{row["gross_hours"]:.2f}</td>'
             f'<td style="text-align:right;">{row["lunch_minutes"]}</td>'
@@ -1175,26 +1271,28 @@ def _build_pitstop_hours_printable_html(punches, params):
     if not summary_rows:
         summary_rows.append('<tr><td colspan="7">No punches matched these filters.</td></tr>')
 
-    detail_rows = []
-    for punch in punches:
-        worker_client = getattr(punch.worker_account, 'client', None) if punch.worker_account else None
-        gross_hours = _pitstop_punch_hours(punch)
-        net_hours = punch.net_hours
-        detail_rows.append(
+    if punches is None:
+        detail_title = 'Daily detail'
+        detail_headers = ['Worker', 'Date', 'Shifts', 'Lunch (min)', 'Gross', 'Net paid', 'Open']
+        detail_rows = [
             f'<tr>'
-            f'<td>{escape(worker_client.full_name if worker_client else "Unknown")}</td>'
-            f'<td>{_local_date(punch.clock_in_at)}</td>'
-            f'<td>{_local_time_12h(punch.clock_in_at)}</td>'
-            f'<td>{_local_time_12h(punch.clock_out_at) or "—"}</td>'
-            f'<td style="text-align:right;">{punch.lunch_minutes or "—"}</td>'
-            f'<td style="text-align:right;">{f"{gross_hours:.2f}" if gross_hours is not None else "—"}</td>'
-            f'<td style="text-align:right;">{f"{net_hours:.2f}" if net_hours is not None else "—"}</td>'
-            f'<td>{escape(punch.work_site.name if punch.work_site else "—")}</td>'
-            f'<td>{"Complete" if punch.clock_out_at else "Open"}</td>'
+            f'<td>{escape(day["name"])}</td>'
+            f'<td>{day["work_date"].isoformat()}</td>'
+            f'<td style="text-align:center;">{day["shifts"]}</td>'
+            f'<td style="text-align:right;">{day["lunch_minutes"] or "—"}</td>'
+            f'<td style="text-align:right;">{day["gross_hours"]:.2f}</td>'
+            f'<td style="text-align:right;">{day["net_hours"]:.2f}</td>'
+            f'<td style="text-align:center;">{day["open_shifts"] or "—"}</td>'
             f'</tr>'
-        )
+            for day in days
+        ]
+    else:
+        detail_title = 'Shift detail'
+        detail_headers = ['Worker', 'Date', 'Clock in', 'Clock out', 'Lunch (min)', 'Gross', 'Net paid', 'Work site', 'Status']
+        detail_rows = _shift_detail_rows(punches)
     if not detail_rows:
-        detail_rows.append('<tr><td colspan="9">No punch detail rows.</td></tr>')
+        detail_rows.append(f'<tr><td colspan="{len(detail_headers)}">No detail rows.</td></tr>')
+    detail_header_html = ''.join(f'<th>{header}</th>' for header in detail_headers)
 
     generated_at = datetime.now().astimezone(REPORT_DISPLAY_TZ).strftime('%Y-%m-%d %I:%M %p').lstrip('0')
 
@@ -1263,20 +1361,10 @@ def _build_pitstop_hours_printable_html(punches, params):
     </tfoot>
   </table>
 
-  <h2>Shift detail</h2>
+  <h2>{detail_title}</h2>
   <table>
     <thead>
-      <tr>
-        <th>Worker</th>
-        <th>Date</th>
-        <th>Clock in</th>
-        <th>Clock out</th>
-        <th>Lunch (min)</th>
-        <th>Gross</th>
-        <th>Net paid</th>
-        <th>Work site</th>
-        <th>Status</th>
-      </tr>
+      <tr>{detail_header_html}</tr>
     </thead>
     <tbody>
       {''.join(detail_rows)}
@@ -1298,30 +1386,37 @@ class PitStopHoursReportCSVView(LoginRequiredMixin, View):
         - worker_id
         - only_complete=1 (exclude open punches)
         - min_hours (decimal)
+        - group=day (one row per worker per day, read from WorkerDailyTimesheet)
     """
 
     def get(self, request):
         params, error = _parse_pitstop_hours_report_params(request)
         if error:
             return error
-        punches = _pitstop_punches_for_hours_report(params)
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = (
-            f'attachment; filename="pitstop_hours_{params["start_date"].isoformat()}_to_{params["end_date"].isoformat()}.csv"'
+        period = f'{params["start_date"].isoformat()}_to_{params["end_date"].isoformat()}'
+        if params['by_day']:
+            return streaming_csv_response(
+                f'pitstop_daily_hours_{period}.csv',
+                PITSTOP_DAILY_HOURS_CSV_HEADER,
+                (_format_day_row(day) for day in _pitstop_days_for_hours_report(params)),
+            )
+        punches = iter_queryset(_pitstop_punch_queryset_for_hours_report(params))
+        return streaming_csv_response(
+            f'pitstop_hours_{period}.csv',
+            PITSTOP_HOURS_CSV_HEADER,
+            (_format_punch_row(punch) for punch in punches),
         )
-        write_pitstop_hours_csv(response, punches)
-        return response
 
 
 class PitStopHoursPrintableView(LoginRequiredMixin, View):
-    """Print-friendly HTML hours report for fiscal / payroll review."""
+    """Print-friendly HTML hours report for fiscal / payroll review (?detail=shifts lists every punch)."""
 
     def get(self, request):
         params, error = _parse_pitstop_hours_report_params(request)
         if error:
             return error
-        punches = _pitstop_punches_for_hours_report(params)
-        html = _build_pitstop_hours_printable_html(punches, params)
+        punches = _pitstop_punches_for_hours_report(params) if params['by_shift'] else None
+        html = _build_pitstop_hours_printable_html(_pitstop_days_for_hours_report(params), params, punches)
         return HttpResponse(html, content_type='text/html; charset=utf-8')
 
 
@@ -1332,17 +1427,22 @@ class PitStopHoursPackageView(LoginRequiredMixin, View):
         params, error = _parse_pitstop_hours_report_params(request)
         if error:
             return error
+        days = _pitstop_days_for_hours_report(params)
         punches = _pitstop_punches_for_hours_report(params)
 
         csv_io = io.StringIO()
         write_pitstop_hours_csv(csv_io, punches)
-        html = _build_pitstop_hours_printable_html(punches, params)
+        daily_io = io.StringIO()
+        write_pitstop_daily_hours_csv(daily_io, days)
+        html = _build_pitstop_hours_printable_html(days, params)
         readme = (
             'Worker Hours Package\n'
             '====================\n'
             '1) Open worker_hours_printable.html in your browser and print to PDF for fiscal.\n'
-            '2) Open worker_hours.csv in Excel for audit / pivot tables.\n'
+            '2) Open worker_daily_hours.csv in Excel for payroll totals by worker and day.\n'
+            '3) Open worker_hours.csv for the punch-by-punch audit trail.\n'
             f'Period: {params["start_date"].isoformat()} to {params["end_date"].isoformat()}\n'
+            f'Worker days: {len(days)}\n'
             f'Punch rows: {len(punches)}\n'
         )
 
@@ -1353,6 +1453,10 @@ class PitStopHoursPackageView(LoginRequiredMixin, View):
                 f'worker_hours_{params["start_date"].isoformat()}_to_{params["end_date"].isoformat()}.csv',
                 csv_io.getvalue(),
             )
+            zf.writestr(
+                f'worker_daily_hours_{params["start_date"].isoformat()}_to_{params["end_date"].isoformat()}.csv',
+                daily_io.getvalue(),
+            )
             zf.writestr('worker_hours_printable.html', html)
         out.seek(0)
         response = HttpResponse(out.getvalue(), content_type='application/zip')
@@ -1372,11 +1476,7 @@ class TodaysAssignmentsCSVView(LoginRequiredMixin, View):
             status__in=['confirmed', 'in_progress']
         ).select_related('client', 'work_site').order_by('work_site__name', 'start_time')
         
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="todays_assignments_{today}.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow([
+        header = [
             'Work Site',
             'Worker Name',
             'Phone',
@@ -1386,10 +1486,9 @@ class TodaysAssignmentsCSVView(LoginRequiredMixin, View):
             'Site Supervisor',
             'Supervisor Phone',
             'Notes'
-        ])
-        
-        for assignment in assignments:
-            writer.writerow([
+        ]
+        rows = (
+            [
                 assignment.work_site.name,
                 assignment.client.full_name,
                 assignment.client.phone or '',
@@ -1399,9 +1498,10 @@ class TodaysAssignmentsCSVView(LoginRequiredMixin, View):
                 assignment.work_site.supervisor_name or '',
                 assignment.work_site.supervisor_phone or '',
                 assignment.assignment_notes or ''
-            ])
-        
-        return response
+            ]
+            for assignment in iter_queryset(assignments)
+        )
+        return streaming_csv_response(f'todays_assignments_{today}.csv', header, rows)
 
 
 def _citybuild_clients_for_missing_docs_report(request):
@@ -1415,8 +1515,8 @@ def _citybuild_clients_for_missing_docs_report(request):
     program = (request.GET.get('program') or '').strip()
     mine = request.GET.get('mine')
 
-    clients = Client.objects.filter(training_interest__in=CITYBUILD_PROGRAMS).annotate(
-        casenotes_count=Count('casenotes'),
+    clients = Client.objects.filter(training_interest__in=CITYBUILD_PROGRAMS).select_related('rollup').annotate(
+        casenotes_count=Coalesce(F('rollup__case_notes_count'), 0),
     )
     if program in CITYBUILD_PROGRAMS:
         clients = clients.filter(training_interest=program)
@@ -1429,25 +1529,6 @@ def _citybuild_clients_for_missing_docs_report(request):
     return clients.order_by('last_name', 'first_name', 'id')
 
 
-def _citybuild_doc_types_by_client_id(client_ids):
-    """
-    One SQL round-trip: map client_id -> set(doc_type) for uploaded documents.
-
-    Time: O(D) where D = document rows returned; grouping into sets is O(D).
-    """
-    doc_types_by_client = {}
-    if not client_ids:
-        return doc_types_by_client
-    rows = (
-        Document.objects.filter(client_id__in=client_ids)
-        .exclude(file='')
-        .values_list('client_id', 'doc_type')
-    )
-    for client_id, doc_type in rows:
-        doc_types_by_client.setdefault(client_id, set()).add(doc_type)
-    return doc_types_by_client
-
-
 CITYBUILD_MISSING_DOCS_SUMMARY_HEADERS = [
     'Client ID',
     'Client Name',
@@ -1466,34 +1547,32 @@ CITYBUILD_MISSING_DOCS_SUMMARY_HEADERS = [
 ]
 
 
-def _write_citybuild_missing_docs_csv(writer, clients, only_incomplete=False):
+def _citybuild_missing_docs_csv_header():
+    item_labels = [label for _panel, _code, label, _source in CITYBUILD_CHECKLIST_ITEMS]
+    return CITYBUILD_MISSING_DOCS_SUMMARY_HEADERS + item_labels
+
+
+def _citybuild_missing_docs_csv_rows(clients, only_incomplete=False):
     """
-    Build the CityBuild missing-docs CSV.
+    Build the CityBuild missing-docs CSV rows.
 
-    Overall complexity (C = clients, D = their documents, K = checklist size ~22):
-      - 1 query for clients (+ COUNT annotation via JOIN)
-      - 1 query for all document types
+    Overall complexity (C = clients, K = checklist size ~22):
+      - 1 streamed query for clients, joined to their ClientRollup (note count
+        and uploaded doc types are precomputed there)
       - O(C * K) in Python to score each client (K is constant)
 
     No Azure/blob access — metadata only, same as the admin checklist.
     """
-    client_list = list(clients)
-    client_ids = [client.id for client in client_list]
-    doc_types_by_client = _citybuild_doc_types_by_client_id(client_ids)
-
-    item_labels = [label for _panel, _code, label, _source in CITYBUILD_CHECKLIST_ITEMS]
-    writer.writerow(CITYBUILD_MISSING_DOCS_SUMMARY_HEADERS + item_labels)
-
-    for client in client_list:
-        present_doc_types = doc_types_by_client.get(client.id, set())
+    for client in iter_queryset(clients):
+        rollup = client.rollup_or_none
         packet = evaluate_citybuild_packet(
-            present_doc_types,
+            set(rollup.doc_types) if rollup else set(),
             bool(client.resume),
             getattr(client, 'casenotes_count', 0) or 0,
         )
         if only_incomplete and packet['missing_count'] == 0:
             continue
-        writer.writerow([
+        yield [
             client.id,
             client.full_name,
             client.phone or '',
@@ -1513,7 +1592,7 @@ def _write_citybuild_missing_docs_csv(writer, clients, only_incomplete=False):
                 else ''
             ),
             *[('Yes' if present else 'No') for _label, present in packet['items']],
-        ])
+        ]
 
 
 class CityBuildMissingDocsReportCSVView(LoginRequiredMixin, View):
@@ -1526,12 +1605,9 @@ class CityBuildMissingDocsReportCSVView(LoginRequiredMixin, View):
     def get(self, request):
         clients = _citybuild_clients_for_missing_docs_report(request)
         only_incomplete = request.GET.get('only_incomplete') in {'1', 'true', 'True'}
-        response = HttpResponse(content_type='text/csv')
         suffix = '_incomplete_only' if only_incomplete else ''
-        response['Content-Disposition'] = (
-            f'attachment; filename="citybuild_missing_docs_{date.today().isoformat()}{suffix}.csv"'
+        return streaming_csv_response(
+            f'citybuild_missing_docs_{date.today().isoformat()}{suffix}.csv',
+            _citybuild_missing_docs_csv_header(),
+            _citybuild_missing_docs_csv_rows(clients, only_incomplete=only_incomplete),
         )
-        writer = csv.writer(response)
-        _write_citybuild_missing_docs_csv(writer, clients, only_incomplete=only_incomplete)
-        return response
-
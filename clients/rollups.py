@@ -0,0 +1,180 @@
+"""
+Incremental maintenance for ClientRollup.
+
+Each CaseNote / Document / WorkerTimePunch save or delete refreshes only the
+rollup fields that model feeds, for only the client it belongs to (and the
+client it was moved from, if a save reassigned it): one aggregate over that
+client's rows plus one upsert. A client with no rollup row has no notes,
+documents or punches yet. Bulk writes that skip
+signals (QuerySet.update, bulk_create) are picked up by
+`manage.py rebuild_client_rollups`, which also reports drift with --check.
+"""
+from django.db.models import Count, Max, QuerySet
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import CaseNote, Client, ClientRollup, Document
+from .models_extensions import WorkerAccount, WorkerTimePunch
+
+
+ROLLUP_FIELDS = ('case_notes_count', 'documents_count', 'last_note_date', 'doc_types', 'last_punch_at')
+
+
+def _note_fields(client_ids):
+    rows = (
+        CaseNote.objects.filter(client_id__in=client_ids)
+        .order_by()
+        .values('client_id')
+        .annotate(total=Count('pk'), last_date=Max('note_date'))
+    )
+    return {
+        row['client_id']: {'case_notes_count': row['total'], 'last_note_date': row['last_date']}
+        for row in rows
+    }
+
+
+def _document_fields(client_ids):
+    fields = {}
+    rows = (
+        Document.objects.filter(client_id__in=client_ids)
+        .order_by()
+        .values('client_id')
+        .annotate(total=Count('pk'))
+    )
+    for row in rows:
+        fields[row['client_id']] = {'documents_count': row['total'], 'doc_types': []}
+    typed = (
+        Document.objects.filter(client_id__in=client_ids)
+        .exclude(file='')
+        .order_by()
+        .values_list('client_id', 'doc_type')
+        .distinct()
+    )
+    for client_id, doc_type in typed:
+        fields[client_id]['doc_types'].append(doc_type)
+    for values in fields.values():
+        values['doc_types'].sort()
+    return fields
+
+
+def _punch_fields(client_ids):
+    rows = (
+        WorkerTimePunch.objects.filter(worker_account__client_id__in=client_ids)
+        .order_by()
+        .values('worker_account__client_id')
+        .annotate(last_in=Max('clock_in_at'), last_out=Max('clock_out_at'))
+    )
+    return {
+        row['worker_account__client_id']: {
+            'last_punch_at': max(value for value in (row['last_in'], row['last_out']) if value),
+        }
+        for row in rows
+    }
+
+
+_EMPTY_NOTE_FIELDS = {'case_notes_count': 0, 'last_note_date': None}
+_EMPTY_PUNCH_FIELDS = {'last_punch_at': None}
+
+
+def _empty_document_fields():
+    return {'documents_count': 0, 'doc_types': []}
+
+
+def compute_rollups(client_ids):
+    """Fresh rollup values for `client_ids` from the source tables (four grouped queries)."""
+    client_ids = list(client_ids)
+    notes = _note_fields(client_ids)
+    documents = _document_fields(client_ids)
+    punches = _punch_fields(client_ids)
+    return {
+        client_id: {
+            **notes.get(client_id, _EMPTY_NOTE_FIELDS),
+            **(documents.get(client_id) or _empty_document_fields()),
+            **punches.get(client_id, _EMPTY_PUNCH_FIELDS),
+        }
+        for client_id in client_ids
+    }
+
+
+def _upsert(client_id, values):
+    ClientRollup.objects.update_or_create(client_id=client_id, defaults=values)
+
+
+def refresh_note_rollup(client_id):
+    _upsert(client_id, _note_fields([client_id]).get(client_id, _EMPTY_NOTE_FIELDS))
+
+
+def refresh_document_rollup(client_id):
+    _upsert(client_id, _document_fields([client_id]).get(client_id) or _empty_document_fields())
+
+
+def refresh_punch_rollup(client_id):
+    _upsert(client_id, _punch_fields([client_id]).get(client_id, _EMPTY_PUNCH_FIELDS))
+
+
+def _client_is_being_deleted(origin):
+    """The client's own delete cascades here; its rollup goes with it."""
+    if isinstance(origin, Client):
+        return True
+    return isinstance(origin, QuerySet) and issubclass(origin.model, Client)
+
+
+@receiver(post_init, sender=CaseNote, dispatch_uid='client_rollup_note_loaded')
+@receiver(post_init, sender=Document, dispatch_uid='client_rollup_document_loaded')
+def _owned_row_loaded(sender, instance, **kwargs):
+    # Remember the owner so a save that moves the row refreshes both clients.
+    # Read from __dict__ so a deferred client_id is not fetched.
+    instance._rollup_client_id = instance.__dict__.get('client_id')
+
+
+def _owner_ids(instance):
+    """The client the row belongs to, plus the one it was loaded under if that differs."""
+    previous = getattr(instance, '_rollup_client_id', None)
+    instance._rollup_client_id = instance.client_id
+    return {previous, instance.client_id} - {None}
+
+
+@receiver(post_save, sender=CaseNote, dispatch_uid='client_rollup_note_saved')
+def _note_saved(sender, instance, **kwargs):
+    for client_id in _owner_ids(instance):
+        refresh_note_rollup(client_id)
+
+
+@receiver(post_delete, sender=CaseNote, dispatch_uid='client_rollup_note_deleted')
+def _note_deleted(sender, instance, origin=None, **kwargs):
+    if not _client_is_being_deleted(origin):
+        refresh_note_rollup(instance.client_id)
+
+
+@receiver(post_save, sender=Document, dispatch_uid='client_rollup_document_saved')
+def _document_saved(sender, instance, **kwargs):
+    for client_id in _owner_ids(instance):
+        refresh_document_rollup(client_id)
+
+
+@receiver(post_delete, sender=Document, dispatch_uid='client_rollup_document_deleted')
+def _document_deleted(sender, instance, origin=None, **kwargs):
+    if not _client_is_being_deleted(origin):
+        refresh_document_rollup(instance.client_id)
+
+
+def _punch_client_id(punch):
+    if WorkerTimePunch._meta.get_field('worker_account').is_cached(punch):
+        return punch.worker_account.client_id
+    return WorkerAccount.objects.filter(pk=punch.worker_account_id).values_list('client_id', flat=True).first()
+
+
+@receiver(post_save, sender=WorkerTimePunch, dispatch_uid='client_rollup_punch_saved')
+def _punch_saved(sender, instance, **kwargs):
+    client_id = _punch_client_id(instance)
+    if client_id:
+        refresh_punch_rollup(client_id)
+
+
+@receiver(post_delete, sender=WorkerTimePunch, dispatch_uid='client_rollup_punch_deleted')
+def _punch_deleted(sender, instance, origin=None, **kwargs):
+    if _client_is_being_deleted(origin):
+        return
+    client_id = _punch_client_id(instance)
+    if client_id:
+        refresh_punch_rollup(client_id)
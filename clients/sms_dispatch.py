@@ -0,0 +1,297 @@
+"""
+Concurrent, batched SMS dispatch for bulk outreach (progress follow-ups,
+document reminders and the like).
+
+send_text_message is one blocking provider round trip per call, with a fresh
+SDK client each time: fine for a single confirmation text, slow for a daily
+run of thousands. The bulk path is:
+
+- prepare_text_messages logs a list of outbound ClientTextMessage rows in a
+  couple of queries (one dedupe-key lookup, unless the caller already did
+  it; a bulk_create that leaves keys another run inserted first alone; and
+  a locked re-claim of earlier failures) and returns the ones ready to send.
+- dispatch_text_messages groups those rows by their final message body and
+  sends each group with multi-recipient calls (up to
+  MAX_RECIPIENTS_PER_SEND numbers per call, as the Azure API allows),
+  through a bounded thread pool sharing one SMS client, spaced to at most
+  SMS_DISPATCH_RATE_PER_SECOND messages. Per-recipient results are mapped
+  back to their rows by phone number and written with one bulk_update;
+  worker threads never touch the database. If the dispatch itself breaks,
+  every row not yet resolved is saved as failed, so none is left pending
+  (which would block its retry).
+
+send_batch_text_messages does both. Anything with the SmsClient.send(from_,
+to, message, enable_delivery_report) signature can be passed as
+`sms_client` (tests use a fake transport).
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models_extensions import ClientTextMessage
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_RATE_PER_SECOND = 10
+MAX_RECIPIENTS_PER_SEND = 100
+BULK_BATCH_SIZE = 500
+RESULT_FIELDS = ['status', 'provider_message_id', 'provider_response', 'error_message', 'sent_at', 'updated_at']
+RETRY_FIELDS = ['to_phone', 'from_phone', 'body', 'status', 'error_message', 'updated_at']
+ALREADY_TEXTED = {ClientTextMessage.STATUS_PENDING, ClientTextMessage.STATUS_SENT}
+
+logger = logging.getLogger('clients')
+
+
+class RateLimiter:
+    """
+    Spaces messages at least 1/rate seconds apart across threads; a call for
+    `count` messages holds the next `count` slots. A rate of 0 or less disables it.
+    """
+
+    def __init__(self, rate_per_second, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1 / rate_per_second if rate_per_second and rate_per_second > 0 else 0
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self, count=1):
+        if not self.interval:
+            return
+        with self._lock:
+            now = self.clock()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval * count
+        if slot > now:
+            self.sleep(slot - now)
+
+
+def record_send_result(log, result):
+    """Copy one provider send result onto a ClientTextMessage (not saved)."""
+    log.provider_message_id = getattr(result, 'message_id', '') or ''
+    log.provider_response = {
+        'successful': getattr(result, 'successful', None),
+        'http_status_code': getattr(result, 'http_status_code', None),
+        'error_message': getattr(result, 'error_message', None),
+    }
+    if getattr(result, 'successful', False):
+        log.status = ClientTextMessage.STATUS_SENT
+        log.sent_at = timezone.now()
+        log.error_message = ''
+    else:
+        log.status = ClientTextMessage.STATUS_FAILED
+        log.error_message = getattr(result, 'error_message', '') or 'Azure SMS send failed'
+
+
+def record_send_error(log, message):
+    log.status = ClientTextMessage.STATUS_FAILED
+    log.error_message = message
+
+
+def prepare_text_messages(messages, existing=None):
+    """
+    Log unsaved outbound ClientTextMessage rows (client, body, purpose and
+    optionally checkpoint_days/dedupe_key set) ahead of a bulk send. A row
+    whose dedupe_key is already pending or sent is skipped, as is one that a
+    concurrent run inserts first; an earlier failure with the same key is
+    re-used, locked so two runs cannot both retry it. `existing` is the
+    {dedupe_key: status} map for these keys when the caller has already
+    read it. Returns (ready, failed, skipped): rows pending send, rows
+    failed up front (no valid number), and the number skipped.
+    """
+    from .notifications import _to_e164_us
+
+    from_phone = getattr(settings, 'AZURE_COMMUNICATION_SMS_FROM', '')
+    if existing is None:
+        keys = [message.dedupe_key for message in messages if message.dedupe_key]
+        existing = {}
+        if keys:
+            existing = dict(
+                ClientTextMessage.objects.filter(dedupe_key__in=keys).values_list('dedupe_key', 'status')
+            )
+
+    new_logs = []
+    retries = {}
+    seen_keys = set()
+    skipped = 0
+    for message in messages:
+        key = message.dedupe_key
+        if key and (existing.get(key) in ALREADY_TEXTED or key in seen_keys):
+            skipped += 1
+            continue
+        if key:
+            seen_keys.add(key)
+        message.direction = ClientTextMessage.DIRECTION_OUTBOUND
+        message.to_phone = _to_e164_us(message.client.phone)
+        message.from_phone = from_phone
+        message.status = ClientTextMessage.STATUS_PENDING if message.to_phone else ClientTextMessage.STATUS_FAILED
+        message.error_message = '' if message.to_phone else 'Client phone is not a valid SMS number'
+        if key in existing:
+            retries[key] = message
+        else:
+            new_logs.append(message)
+
+    # Keyed rows can race another run's insert: ignore_conflicts leaves its
+    # row alone, and the pending rows that are ours are read back by a claim
+    # stamped on them (ignore_conflicts also means no primary keys come back).
+    claim = uuid.uuid4().hex
+    keyed = [log for log in new_logs if log.dedupe_key]
+    claimed = [log for log in keyed if log.status == ClientTextMessage.STATUS_PENDING]
+    for log in claimed:
+        log.provider_response = {'claim': claim}
+
+    with transaction.atomic():
+        ClientTextMessage.objects.bulk_create(
+            [log for log in new_logs if not log.dedupe_key],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        if keyed:
+            ClientTextMessage.objects.bulk_create(keyed, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+        if claimed:
+            inserted = {
+                log.dedupe_key: log
+                for log in ClientTextMessage.objects.filter(
+                    dedupe_key__in=[log.dedupe_key for log in claimed],
+                    provider_response__claim=claim,
+                )
+            }
+            for log in inserted.values():
+                log.provider_response = {}
+            skipped += len(claimed) - len(inserted)
+            new_logs = [
+                inserted.get(log.dedupe_key) if log.status == ClientTextMessage.STATUS_PENDING and log.dedupe_key else log
+                for log in new_logs
+            ]
+            new_logs = [log for log in new_logs if log is not None]
+        retry_logs = []
+        if retries:
+            retry_logs = list(
+                ClientTextMessage.objects.select_for_update()
+                .filter(dedupe_key__in=list(retries), status=ClientTextMessage.STATUS_FAILED)
+            )
+        now = timezone.now()
+        for log in retry_logs:
+            for field in RETRY_FIELDS:
+                setattr(log, field, getattr(retries[log.dedupe_key], field))
+            log.updated_at = now
+        if retry_logs:
+            ClientTextMessage.objects.bulk_update(retry_logs, RETRY_FIELDS, batch_size=BULK_BATCH_SIZE)
+
+    logs = new_logs + retry_logs
+    ready = [log for log in logs if log.status == ClientTextMessage.STATUS_PENDING]
+    failed = [log for log in logs if log.status != ClientTextMessage.STATUS_PENDING]
+    # Retries another run claimed between the lookup and the lock.
+    skipped += len(retries) - len(retry_logs)
+    return ready, failed, skipped
+
+
+def _send_groups(logs, compose):
+    """
+    Split rows into provider calls: same final body, at most
+    MAX_RECIPIENTS_PER_SEND numbers, no number twice in one call (results
+    are matched back by number).
+    """
+    groups = {}
+    for log in logs:
+        groups.setdefault(compose(log.body), []).append(log)
+    for message, group in groups.items():
+        batches = []
+        for log in group:
+            batch = next(
+                (
+                    batch for batch in batches
+                    if len(batch) < MAX_RECIPIENTS_PER_SEND and log.to_phone not in batch
+                ),
+                None,
+            )
+            if batch is None:
+                batch = {}
+                batches.append(batch)
+            batch[log.to_phone] = log
+        for batch in batches:
+            yield message, batch
+
+
+def dispatch_text_messages(logs, sms_client=None, max_workers=None, rate_per_second=None):
+    """
+    Send pending ClientTextMessage rows (to_phone and body already set) and
+    save their outcomes in one bulk_update. Returns (sent, failed).
+    """
+    from .notifications import _compose_sms_body, _sms_client, _sms_from_number
+
+    logs = list(logs)
+    if not logs:
+        return 0, 0
+    if max_workers is None:
+        max_workers = getattr(settings, 'SMS_DISPATCH_MAX_WORKERS', DEFAULT_MAX_WORKERS)
+    if rate_per_second is None:
+        rate_per_second = getattr(settings, 'SMS_DISPATCH_RATE_PER_SECOND', DEFAULT_RATE_PER_SECOND)
+
+    limiter = RateLimiter(rate_per_second)
+
+    def send(group):
+        message, batch = group
+        limiter.wait(len(batch))
+        try:
+            results = sms_client.send(
+                from_=from_number,
+                to=list(batch),
+                message=message,
+                enable_delivery_report=True,
+            )
+        except Exception as exc:
+            for log in batch.values():
+                record_send_error(log, str(exc))
+            return
+        by_number = {getattr(result, 'to', None): result for result in results}
+        for position, (to_phone, log) in enumerate(batch.items()):
+            # Results carry their number; fall back to order if a transport omits it.
+            result = by_number.get(to_phone) or (
+                results[position] if None in by_number and position < len(results) else None
+            )
+            if result is None:
+                record_send_error(log, 'No result returned for this number')
+            else:
+                record_send_result(log, result)
+
+    try:
+        sms_client = sms_client or _sms_client()
+        from_number = _sms_from_number()
+        groups = list(_send_groups(logs, _compose_sms_body))
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(groups)))) as pool:
+            list(pool.map(send, groups))
+    except Exception as exc:
+        logger.exception('SMS dispatch failed for %s message(s)', len(logs))
+        for log in logs:
+            if log.status == ClientTextMessage.STATUS_PENDING:
+                record_send_error(log, str(exc) or exc.__class__.__name__)
+
+    # bulk_update skips auto_now, so stamp updated_at here.
+    now = timezone.now()
+    for log in logs:
+        log.updated_at = now
+    ClientTextMessage.objects.bulk_update(logs, RESULT_FIELDS, batch_size=BULK_BATCH_SIZE)
+    sent = sum(1 for log in logs if log.status == ClientTextMessage.STATUS_SENT)
+    return sent, len(logs) - sent
+
+
+def send_batch_text_messages(messages, sms_client=None, existing=None):
+    """
+    Log and send unsaved ClientTextMessage rows (see prepare_text_messages,
+    which `existing` is passed to). Returns {'sent', 'failed', 'skipped',
+    'logs'}, where logs are every row that was attempted, with its final
+    status and error_message.
+    """
+    ready, failed, skipped = prepare_text_messages(list(messages), existing=existing)
+    sent, send_failures = dispatch_text_messages(ready, sms_client=sms_client)
+    return {
+        'sent': sent,
+        'failed': len(failed) + send_failures,
+        'skipped': skipped,
+        'logs': ready + failed,
+    }
@@ -0,0 +1,113 @@
+"""
+Batched SSN re-encryption for key rotation.
+
+Each id range is walked in keyset batches; every batch is decrypted in Python
+and written back with one UPDATE joined to a VALUES list, instead of a
+transaction and UPDATE per row. Ranges are independent, so the rotation
+command can hand them to a process pool and checkpoint each finished range;
+the checkpoint is deleted once a run finishes every range, so it only ever
+describes an interrupted run.
+"""
+import json
+import os
+
+from django.db import connection, transaction
+
+from .encrypted_fields import ENCRYPTED_PREFIX, decrypt_sensitive_value, encrypt_sensitive_value
+
+
+def plan_id_ranges(min_id, max_id, chunk_size):
+    """Half-open [start, end) id ranges covering min_id..max_id."""
+    if min_id is None or max_id is None:
+        return []
+    return [(start, min(start + chunk_size, max_id + 1)) for start in range(min_id, max_id + 1, chunk_size)]
+
+
+def _ssn_last4(plaintext):
+    digits = ''.join(character for character in plaintext if character.isdigit())
+    return digits[-4:] if len(digits) >= 4 else ''
+
+
+def _write_batch(rows):
+    """One UPDATE for the batch; skips rows whose ciphertext changed since they were read."""
+    placeholders = ', '.join(['(CAST(%s AS INTEGER), %s, %s, %s, %s)'] * len(rows))
+    params = [value for row in rows for value in row]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            # VALUES columns are named column1..N on both PostgreSQL and SQLite.
+            f"""
+            UPDATE clients_client
+            SET ssn = rotated.ssn, ssn_key_id = rotated.ssn_key_id, ssn_last4 = rotated.ssn_last4
+            FROM (
+                SELECT column1 AS id, column2 AS old_ssn, column3 AS ssn, column4 AS ssn_key_id, column5 AS ssn_last4
+                FROM (VALUES {placeholders}) AS batch
+            ) AS rotated
+            WHERE clients_client.id = rotated.id AND clients_client.ssn = rotated.old_ssn
+            """,
+            params,
+        )
+        return cursor.rowcount
+
+
+def rotate_id_range(start, end, key_id, batch_size=500):
+    """
+    Re-encrypt every SSN in ids [start, end) that is not already under `key_id`.
+
+    Legacy plaintext rows are encrypted as well. Returns (start, end, inspected, rotated).
+    """
+    target_prefix = f'{ENCRYPTED_PREFIX}{key_id}:'
+    inspected = 0
+    rotated = 0
+    last_id = start - 1
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT id, ssn
+                FROM clients_client
+                WHERE id > %s AND id < %s AND ssn IS NOT NULL AND ssn <> '' AND ssn NOT LIKE %s
+                ORDER BY id
+                LIMIT %s
+                """,
+                [last_id, end, f'{target_prefix}%', batch_size],
+            )
+            rows = cursor.fetchall()
+        if not rows:
+            return start, end, inspected, rotated
+        last_id = rows[-1][0]
+        inspected += len(rows)
+        batch = []
+        for client_id, stored_value in rows:
+            plaintext = decrypt_sensitive_value(stored_value)
+            batch.append(
+                (client_id, stored_value, encrypt_sensitive_value(plaintext, key_id=key_id), key_id, _ssn_last4(plaintext))
+            )
+        with transaction.atomic():
+            rotated += _write_batch(batch)
+
+
+def load_checkpoint(path, key_id):
+    """Finished ranges recorded for `key_id`; a checkpoint for another key is ignored."""
+    try:
+        with open(path, encoding='utf-8') as handle:
+            data = json.load(handle)
+    except (FileNotFoundError, ValueError):
+        return set()
+    if data.get('key_id') != key_id:
+        return set()
+    return {tuple(done) for done in data.get('done', [])}
+
+
+def save_checkpoint(path, key_id, done_ranges):
+    """Write the checkpoint atomically so an interrupted run never leaves half a file."""
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as handle:
+        json.dump({'key_id': key_id, 'done': sorted(done_ranges)}, handle)
+    os.replace(temp_path, path)
+
+
+def clear_checkpoint(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -8,7 +8,8 @@ from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model, login, logout
 from django.contrib.auth.forms import SetPasswordForm
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Q
+from django.db.models import F, Max, Window
+from django.db.models.functions import RowNumber
 from django.middleware.csrf import get_token
 from django.utils import timezone
 from django.utils.encoding import force_bytes, force_str
@@ -28,10 +29,14 @@ from .staff_serializers import (
     StaffClientDetailSerializer,
     StaffClientListSerializer,
 )
-from .phone_utils import phone_digits
+from .client_search import search_clients
+from .pagination import InvalidCursor, keyset_page, page_params, with_next_cursor
+from .phone_utils import find_all_by_normalized_phone, phone_digits
 from .staff_utils import staff_display_name
 
 ACCENT_HEX_RE = re.compile(r'^#[0-9A-Fa-f]{6}$')
+CLIENT_LIST_ORDERING = ('-updated_at', '-id')
+THREAD_ORDERING = ('-last_created_at', '-client_id')
 
 
 def _staff_payload(user):
@@ -153,25 +158,21 @@ def staff_clients(request):
     q = (request.GET.get('q') or '').strip()
     program = (request.GET.get('program') or '').strip()
     stage = (request.GET.get('stage') or '').strip()
-    limit = min(int(request.GET.get('limit') or 40), 100)
-    queryset = Client.objects.all().order_by('-updated_at')
-    if q:
-        digits = ''.join(ch for ch in q if ch.isdigit())
-        filters = (
-            Q(first_name__icontains=q)
-            | Q(last_name__icontains=q)
-            | Q(email__icontains=q)
-            | Q(staff_name__icontains=q)
-        )
-        if digits:
-            filters |= Q(phone__icontains=digits)
-        queryset = queryset.filter(filters)
+    cursor, limit = page_params(request, 40, 100)
+    queryset = Client.objects.all()
     if program in dict(Client.TRAINING_INTEREST_CHOICES):
         queryset = queryset.filter(training_interest=program)
     if stage in dict(Client.PIT_STOP_STAGE_CHOICES):
         queryset = queryset.filter(pit_stop_stage=stage)
-    clients = queryset[:limit]
-    return Response(StaffClientListSerializer(clients, many=True).data)
+    if q:
+        # Ranked by relevance, so one page of best matches rather than a cursor.
+        clients = search_clients(queryset, q, limit)
+        return Response(StaffClientListSerializer(clients, many=True).data)
+    try:
+        clients, next_cursor = keyset_page(queryset, CLIENT_LIST_ORDERING, cursor, limit)
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+    return with_next_cursor(Response(StaffClientListSerializer(clients, many=True).data), next_cursor)
 
 
 @api_view(['POST'])
@@ -184,13 +185,12 @@ def staff_client_create(request):
 
     serializer = StaffClientCreateSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    phone = phone_digits(serializer.validated_data.get('phone'))
+    phone = serializer.validated_data.get('phone')
     email = str(serializer.validated_data.get('email') or '').strip()
     duplicate_ids = set()
-    if phone:
+    if phone_digits(phone):
         duplicate_ids.update(
-            client.pk for client in Client.objects.only('pk', 'phone')
-            if phone_digits(client.phone) == phone
+            find_all_by_normalized_phone(Client.objects.all(), phone).values_list('pk', flat=True)
         )
     if email:
         duplicate_ids.update(
@@ -436,12 +436,29 @@ def staff_messages(request):
         return Response({'error': 'Staff access required.'}, status=status.HTTP_403_FORBIDDEN)
 
     since = timezone.now() - timedelta(days=30)
+    cursor, limit = page_params(request, 50, 100)
+    recent = ClientTextMessage.objects.filter(created_at__gte=since)
+    # One row per client thread, newest activity first; the cursor pages threads.
+    thread_rows = recent.values('client_id').annotate(last_created_at=Max('created_at'))
+    try:
+        thread_rows, next_cursor = keyset_page(thread_rows, THREAD_ORDERING, cursor, limit)
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    client_ids = [row['client_id'] for row in thread_rows]
+    clients = Client.objects.in_bulk(client_ids)
     messages = (
-        ClientTextMessage.objects.filter(created_at__gte=since)
-        .select_related('client')
-        .order_by('-created_at')[:200]
+        recent.filter(client_id__in=client_ids)
+        .annotate(
+            thread_position=Window(
+                RowNumber(),
+                partition_by=F('client_id'),
+                order_by=[F('created_at').desc(), F('id').desc()],
+            )
+        )
+        .filter(thread_position__lte=40)
+        .order_by('-created_at', '-id')
     )
-
     grouped = defaultdict(list)
     for msg in messages:
         at = msg.sent_at or msg.received_at or msg.created_at
@@ -454,9 +471,10 @@ def staff_messages(request):
         })
 
     threads = []
-    for client_id, msgs in grouped.items():
-        client = Client.objects.filter(pk=client_id).first()
-        if not client:
+    for client_id in client_ids:
+        msgs = grouped.get(client_id)
+        client = clients.get(client_id)
+        if not msgs or not client:
             continue
         latest = msgs[0]
         threads.append({
@@ -466,8 +484,6 @@ def staff_messages(request):
             'last_at': latest['at'],
             'unread': latest['direction'] == ClientTextMessage.DIRECTION_INBOUND
             and latest['status'] == ClientTextMessage.STATUS_RECEIVED,
-            'messages': list(reversed(msgs[-40:])),
+            'messages': list(reversed(msgs)),
         })
-
-    threads.sort(key=lambda t: t['last_at'], reverse=True)
-    return Response({'threads': threads})
+    return Response({'threads': threads, 'next_cursor': next_cursor})
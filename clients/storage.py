@@ -4,9 +4,13 @@ Azure Blob Storage configuration for client documents
 
 import os
 import logging
+import threading
+import time
 from contextvars import ContextVar
+from functools import lru_cache
 from urllib.parse import quote
 from django.conf import settings
+from django.db import connection
 from storages.backends.azure_storage import AzureStorage
 from azure.storage.blob import generate_blob_sas, BlobSasPermissions, BlobServiceClient
 from datetime import datetime, timedelta, timezone
@@ -44,36 +48,160 @@ class AzurePrivateStorage(AzureStorage):
         super().__init__(*args, **kwargs)
         self.default_acl = None
 
+    def _save(self, name, content):
+        from .blob_inventory import record_blob
+
+        name = super()._save(name, content)
+        remember_blob(name)
+        record_blob(name, size=getattr(content, 'size', None))
+        return name
+
     def delete(self, name):
         """Fail-soft delete: log but don't crash if blob is already gone."""
+        from .blob_inventory import forget_blob_record
+
         try:
-            return super().delete(name)
+            result = super().delete(name)
+            forget_blob(name)
+            forget_blob_record(name)
+            return result
         except Exception as exc:
             logger.warning('Blob delete failed for %s (may already be gone): %s', name, exc)
             return None
 
 
-def _get_blob_service():
-    """Get Azure BlobServiceClient, or None if not configured."""
+def _container_name():
+    return os.getenv('AZURE_CONTAINER', 'client-docs')
+
+
+def _storage_config():
+    """(account_name, account_key, container_name), or None when Azure is not configured."""
     account_name = os.getenv('AZURE_ACCOUNT_NAME')
     account_key = os.getenv('AZURE_ACCOUNT_KEY')
     if not account_name or not account_key:
-        return None, None, None
-    container_name = os.getenv('AZURE_CONTAINER', 'client-docs')
-    service = BlobServiceClient(
+        return None
+    return account_name, account_key, _container_name()
+
+
+@lru_cache(maxsize=4)
+def _pooled_blob_service(account_name, account_key):
+    # One client (and its HTTP connection pool) per process instead of one per call.
+    return BlobServiceClient(
         account_url=f"https://{account_name}.blob.core.windows.net",
         credential=account_key
     )
-    return service, account_name, container_name
 
 
-def _blob_exists_uncached(blob_name):
-    service, account_name, container_name = _get_blob_service()
+def _get_blob_service():
+    """Get the process-wide Azure BlobServiceClient, or None if not configured."""
+    config = _storage_config()
+    if not config:
+        return None, None, None
+    account_name, account_key, container_name = config
+    return _pooled_blob_service(account_name, account_key), account_name, container_name
+
+
+# Process-wide set of blob names in the container, loaded from the blob
+# inventory table (or one list_blobs sweep before the inventory exists).
+# Existence checks and SAS signing read it instead of sending HEADs. It is
+# always loaded in a background thread: the first lookup in a process starts
+# the load and falls back to HEADs until it lands, and once the snapshot is
+# older than BLOB_INDEX_TTL_SECONDS it is reloaded while lookups keep using
+# the previous one. A name missing from a fresh snapshot is looked up in the
+# inventory table (which every process's uploads are recorded in) and is
+# otherwise reported missing without a HEAD.
+_container_index = {'names': None, 'loaded_at': 0.0, 'attempted_at': 0.0, 'refreshing': False}
+_container_index_lock = threading.Lock()
+
+
+def _container_index_ttl():
+    return float(getattr(settings, 'BLOB_INDEX_TTL_SECONDS', 300))
+
+
+def refresh_container_index():
+    """
+    Reload the name set and swap it in. Returns it, or None if unavailable.
+
+    Reads the BlobInventoryItem table when it has been built (one query, and
+    it includes uploads from every process); otherwise lists the container.
+    """
+    service, _account_name, container_name = _get_blob_service()
     if not service:
         return None
+    from .blob_inventory import inventory_blob_names
 
-    container = service.get_container_client(container_name)
+    try:
+        names = inventory_blob_names()
+        if names is None:
+            names = {blob.name for blob in service.get_container_client(container_name).list_blobs()}
+    except Exception as exc:
+        logger.warning('Blob container index refresh failed: %s', exc)
+        names = None
+    now = time.monotonic()
+    with _container_index_lock:
+        if names is not None:
+            _container_index['names'] = names
+            _container_index['loaded_at'] = now
+        # A failed sweep also waits out the TTL, so an outage does not mean a list call per lookup.
+        _container_index['attempted_at'] = now
+        _container_index['refreshing'] = False
+    return names
+
+
+def _indexed_blob_names():
+    """
+    (names, fresh) for the current container index: names is None until the
+    first load in this process succeeds, and fresh is True while the snapshot
+    is within the TTL. Starts a background reload when one is due; never
+    lists the container itself.
+    """
+    ttl = _container_index_ttl()
+    with _container_index_lock:
+        now = time.monotonic()
+        names = _container_index['names']
+        fresh = names is not None and now - _container_index['loaded_at'] <= ttl
+        start_refresh = (
+            not fresh
+            and not _container_index['refreshing']
+            and (not _container_index['attempted_at'] or now - _container_index['attempted_at'] > ttl)
+        )
+        if start_refresh:
+            _container_index['refreshing'] = True
+    if start_refresh:
+        _start_index_refresh()
+    return names, fresh
+
+
+def _start_index_refresh():
+    threading.Thread(target=_refresh_container_index_in_thread, name='blob-index-refresh', daemon=True).start()
+
+
+def _refresh_container_index_in_thread():
+    try:
+        refresh_container_index()
+    finally:
+        connection.close()
+
+
+def remember_blob(blob_name):
+    """Add a just-written blob to this process's index so it resolves without a HEAD."""
+    with _container_index_lock:
+        if _container_index['names'] is not None:
+            _container_index['names'].add(blob_name)
+
+
+def forget_blob(blob_name):
+    with _container_index_lock:
+        if _container_index['names'] is not None:
+            _container_index['names'].discard(blob_name)
+
+
+def reset_container_index():
+    with _container_index_lock:
+        _container_index.update(names=None, loaded_at=0.0, attempted_at=0.0, refreshing=False)
 
+
+def _candidate_blob_paths(blob_name, container_name):
     # Normalize: strip leading slash and container prefix
     blob_name = blob_name.lstrip('/')
     prefix = f"{container_name}/"
@@ -90,8 +218,34 @@ def _blob_exists_uncached(blob_name):
         paths.append(blob_name.replace('resumes/', '', 1))
     else:
         paths.extend([f'resumes/{blob_name}', f'documents/{blob_name}'])
+    return list(dict.fromkeys(paths))  # dedupe, preserve order
+
+
+def _blob_exists_uncached(blob_name):
+    service, account_name, container_name = _get_blob_service()
+    if not service:
+        return None
 
-    for path in dict.fromkeys(paths):  # dedupe, preserve order
+    paths = _candidate_blob_paths(blob_name, container_name)
+    indexed, fresh = _indexed_blob_names()
+    if indexed is not None:
+        for path in paths:
+            if path in indexed:
+                return path
+    if fresh:
+        # Not in a current snapshot: only an upload since then (recorded in the
+        # inventory by whichever process wrote it) can make it exist.
+        from .blob_inventory import recorded_blob_path
+
+        found = recorded_blob_path(paths)
+        if found:
+            remember_blob(found)
+        return found
+
+    # No snapshot yet, or an expired one being reloaded: probe with HEADs and
+    # remember hits.
+    container = service.get_container_client(container_name)
+    for path in paths:
         cache = _blob_exists_cache.get()
         if cache is not None and path in cache:
             found = cache[path]
@@ -101,6 +255,7 @@ def _blob_exists_uncached(blob_name):
         try:
             if container.get_blob_client(path).exists():
                 _cache_blob_result(path, path)
+                remember_blob(path)
                 return path
         except Exception:
             continue
@@ -123,10 +278,14 @@ def generate_document_sas_url(blob_name, expiry_minutes=15):
     """
     Generate a short-lived SAS URL for secure document downloads.
     Returns a signed URL string, or raises ValueError with a clear message.
+
+    Signing is local (HMAC with the account key); with the blob in the
+    container index no storage request is made at all.
     """
-    service, account_name, container_name = _get_blob_service()
-    if not service:
+    config = _storage_config()
+    if not config:
         raise ValueError("Azure storage credentials not configured. Check AZURE_ACCOUNT_NAME and AZURE_ACCOUNT_KEY.")
+    account_name, account_key, container_name = config
 
     found_path = blob_exists(blob_name)
     if not found_path:
@@ -141,7 +300,7 @@ def generate_document_sas_url(blob_name, expiry_minutes=15):
         account_name=account_name,
         container_name=container_name,
         blob_name=found_path,
-        account_key=os.getenv('AZURE_ACCOUNT_KEY'),
+        account_key=account_key,
         permission=BlobSasPermissions(read=True),
         start=now - timedelta(minutes=5),
         expiry=now + timedelta(minutes=expiry_minutes),
@@ -1,34 +1,69 @@
 import json
+import multiprocessing
+import os
 import shutil
+import smtplib
 import tempfile
-from datetime import date, time, timedelta  # date used for note_date tests
+import threading
+from datetime import date, datetime, time, timedelta  # date used for note_date tests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from io import StringIO
+from time import monotonic, sleep
+from types import SimpleNamespace
 from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
 
 from django.contrib.admin.sites import AdminSite
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.core.management import call_command
-from django.db import connection
-from django.test import TestCase, override_settings
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.test import Client as DjangoTestClient
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework.test import APIClient
 
-from clients.admin import ClientAdmin
-from clients.models import CaseNote, Client
+from clients.admin import ClientAdmin, WorkerAccountAdmin
+from clients.cache_backends import SQLiteCache
+from clients.client_search import client_index, search_clients
+from clients.dashboard_stats import build_snapshot, dashboard_snapshot
+from clients.jobs import enqueue, run_due_jobs
+from clients.models import BackgroundJob, CaseNote, Client, ClientRollup, DashboardDailyCounter, DashboardDailyMember
 from clients.models import Document, DocumentUploadInvite, PitStopApplication
+from clients.class_scheduler import generate_sessions
+from clients.mailer import build_email, send_emails
 from clients.models_classes import ClassEnrollment, ClassSession, ClassTemplate
-from clients.notifications import _to_e164_us, _compose_sms_body, send_phone_text_message
+from clients.notifications import (
+    _compose_sms_body,
+    _is_internal_phone_allowed,
+    _to_e164_us,
+    check_and_send_followup_alerts,
+    internal_phone_allowlist,
+    send_due_progress_followups,
+    send_phone_text_message,
+    send_worker_welcome_email,
+)
+from clients.sms_dispatch import RateLimiter, prepare_text_messages
 from clients.models_extensions import (
     ClientTextMessage,
+    MapSnapshotAsset,
     WorkerAccount,
     WorkerDailyFeedback,
+    WorkerDailyTimesheet,
+    WorkerSessionToken,
     WorkerTimePunch,
     WorkSite,
 )
-from clients.worker_views import WorkerSession
+from clients.throttles import SharedAnonRateThrottle
+from clients.worker_hours import ALL_TIME, hours_by_worker, hours_for_worker
+from clients.worker_sessions import purge_expired_sessions
+from clients.worker_map_utils import map_grid_cell
+from clients.worker_views import WorkerSession, punch_batch_signature, store_punch_map_snapshot
 
 
 TEST_MEDIA_ROOT = tempfile.mkdtemp()
@@ -36,14 +71,58 @@ UPLOAD_TEST_MEDIA_ROOT = tempfile.mkdtemp()
 TEST_SSN_KEY = 'MDAwMDAwMDAwMDAwMDAwMDAwMDAwMDAwMDAwMDAwMDA='
 
 
+class _StaticMapStandIn:
+    """Local HTTP server that answers like the OSM static map endpoint and records each request."""
+
+    PNG = b'\x89PNG\r\n\x1a\nstand-in map'
+
+    def __init__(self):
+        requests = self.requests = []
+        png = self.PNG
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                requests.append(parse_qs(urlsplit(self.path).query))
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/png')
+                self.send_header('Content-Length', str(len(png)))
+                self.end_headers()
+                self.wfile.write(png)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/staticmap.php'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StaticMapStandInMixin:
+    """Points map snapshot downloads at a _StaticMapStandIn for the test's duration."""
+
+    def setUp(self):
+        super().setUp()
+        self.map_server = _StaticMapStandIn()
+        self.addCleanup(self.map_server.close)
+        map_settings = override_settings(WORKER_STATIC_MAP_URL=self.map_server.url)
+        map_settings.enable()
+        self.addCleanup(map_settings.disable)
+
+
 @override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
-class WorkerTimePunchTests(TestCase):
+class WorkerTimePunchTests(StaticMapStandInMixin, TestCase):
     @classmethod
     def tearDownClass(cls):
         super().tearDownClass()
         shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
 
     def setUp(self):
+        super().setUp()
         self.api = APIClient()
         self.client_record = Client.objects.create(
             first_name='Test',
@@ -71,6 +150,7 @@ class WorkerTimePunchTests(TestCase):
         )
         token = WorkerSession.create_session(self.worker)
         self.api.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        cache.clear()
 
     def test_worker_can_list_active_work_sites(self):
         response = self.api.get('/api/worker/work-sites/')
@@ -78,11 +158,7 @@ class WorkerTimePunchTests(TestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['id'], self.site.id)
 
-    @patch('clients.worker_views.fetch_static_map_image')
-    def test_worker_can_clock_in_with_location_snapshot(self, map_mock):
-        from django.core.files.base import ContentFile
-
-        map_mock.return_value = ContentFile(b'fakepng', name='map.png')
+    def test_worker_can_clock_in_with_location_snapshot(self):
         response = self.api.post(
             '/api/worker/time-punch/',
             {
@@ -98,8 +174,15 @@ class WorkerTimePunchTests(TestCase):
         punch = WorkerTimePunch.objects.get()
         self.assertEqual(punch.worker_account, self.worker)
         self.assertEqual(punch.clock_in_location_label, 'Mission St & 16th St')
-        self.assertTrue(bool(punch.clock_in_map_image))
         self.assertIsNone(punch.clock_out_at)
+        # The OSM download runs in the job worker, not on the punch request.
+        self.assertEqual(self.map_server.requests, [])
+        self.assertFalse(bool(punch.clock_in_map_image))
+
+        self.assertEqual(run_due_jobs(), 1)
+        punch.refresh_from_db()
+        self.assertTrue(bool(punch.clock_in_map_image))
+        self.assertEqual(len(self.map_server.requests), 1)
 
     def test_worker_clock_in_requires_location_services(self):
         response = self.api.post(
@@ -437,7 +520,7 @@ class WorkerTimePunchTests(TestCase):
         response = client.get(url)
 
         self.assertEqual(response.status_code, 200)
-        body = response.content.decode('utf-8')
+        body = response.getvalue().decode('utf-8')
         header = body.strip().splitlines()[0]
         # Accountant-friendly column order leads with the worker name.
         self.assertTrue(header.startswith('Worker Name,Date,Clock In,'))
@@ -462,7 +545,7 @@ class WorkerTimePunchTests(TestCase):
         response = client.get(reverse('pitstop-hours-report-csv') + '?only_complete=1')
 
         self.assertEqual(response.status_code, 200)
-        body = response.content.decode('utf-8')
+        body = response.getvalue().decode('utf-8')
         rows = [line for line in body.strip().splitlines() if line]
         self.assertEqual(len(rows), 1)
         self.assertIn('Worker Name', rows[0])
@@ -538,6 +621,7 @@ class WorkerTimePunchTests(TestCase):
         self.assertIn('Location', body)
 
 
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
 class ClientAdminTextMissingDocumentsTests(TestCase):
     def setUp(self):
         self.site = AdminSite()
@@ -556,14 +640,8 @@ class ClientAdminTextMissingDocumentsTests(TestCase):
         SMS_FORCE_EMAIL_BACKUP=True,
         SMS_FOLLOWUP_ENABLED=True,
     )
-    @patch('clients.notifications.send_text_message')
-    @patch('clients.admin.send_mail')
-    def test_text_missing_documents_action_sends_sms_for_clients_with_missing_required_docs(self, send_mail_mock, send_text_mock):
-        class Log:
-            status = ClientTextMessage.STATUS_SENT
-
-        send_text_mock.return_value = (Log(), True)
-        send_mail_mock.return_value = 1
+    def test_text_missing_documents_action_sends_sms_for_clients_with_missing_required_docs(self):
+        transport = FakeSmsTransport()
 
         # Only intake is present; resume/id/consent should still be requested.
         Document.objects.create(
@@ -575,30 +653,63 @@ class ClientAdminTextMissingDocumentsTests(TestCase):
         )
 
         request = type('Req', (), {'user': None})()
-        with patch.object(self.admin, 'message_user'):
+        with patch.object(self.admin, 'message_user'), patch('clients.notifications._sms_client', return_value=transport):
             self.admin.text_missing_documents(request, Client.objects.filter(pk=self.client_record.pk))
 
-        send_text_mock.assert_called_once()
-        kwargs = send_text_mock.call_args.kwargs
-        self.assertEqual(kwargs['client'], self.client_record)
-        self.assertIn('Resume', kwargs['body'])
-        self.assertIn('Government ID', kwargs['body'])
-        self.assertIn('Consent Form', kwargs['body'])
-        self.assertNotIn('Intake Form', kwargs['body'])
-        send_mail_mock.assert_called_once()
+        self.assertEqual(len(transport.calls), 1)
+        to, message = transport.calls[0]
+        self.assertEqual(to, ['+14155552222'])
+        self.assertIn('Resume', message)
+        self.assertIn('Government ID', message)
+        self.assertIn('Consent Form', message)
+        self.assertNotIn('Intake Form', message)
+        log = ClientTextMessage.objects.get(client=self.client_record)
+        self.assertEqual(log.status, ClientTextMessage.STATUS_SENT)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['missing@example.com'])
+        self.assertIn('Government ID', mail.outbox[0].body)
+
+    @override_settings(
+        AZURE_COMMUNICATION_CONNECTION_STRING='endpoint=https://example.test/;accesskey=fake',
+        AZURE_COMMUNICATION_SMS_FROM='+15555550123',
+        SMS_FORCE_EMAIL_BACKUP=False,
+        SMS_FOLLOWUP_ENABLED=True,
+        SMS_DISPATCH_RATE_PER_SECOND=0,
+    )
+    def test_identical_reminders_go_out_as_multi_recipient_sends(self):
+        Client.objects.bulk_create(
+            Client(first_name='Sam', last_name=f'Batch{n}', phone=f'510{n:07d}', gender='M')
+            for n in range(150)
+        )
+        Client.objects.create(first_name='Sam', last_name='Household', phone='5100000003', gender='F')
+        transport = FakeSmsTransport(fail_numbers={'+15100000009'})
+
+        request = type('Req', (), {'user': None})()
+        with patch.object(self.admin, 'message_user'), patch('clients.notifications._sms_client', return_value=transport):
+            self.admin.text_missing_documents(request, Client.objects.filter(first_name='Sam'))
+
+        # 151 identical texts: 100 + 50 per call, and the shared number rides in the second call.
+        self.assertEqual([len(to) for to, _message in transport.calls], [100, 51])
+        logs = ClientTextMessage.objects.filter(client__first_name='Sam')
+        self.assertEqual(logs.filter(status=ClientTextMessage.STATUS_SENT).count(), 150)
+        failed = logs.get(status=ClientTextMessage.STATUS_FAILED)
+        self.assertEqual(failed.to_phone, '+15100000009')
+        self.assertEqual(failed.error_message, 'Carrier rejected')
+        self.assertEqual(logs.values('provider_message_id').distinct().count(), 151)
 
     @override_settings(
         AZURE_COMMUNICATION_CONNECTION_STRING='endpoint=https://example.test/;accesskey=fake',
         AZURE_COMMUNICATION_SMS_FROM='+15555550123',
         SMS_FOLLOWUP_ENABLED=False,
     )
-    @patch('clients.notifications.send_text_message')
-    def test_reminder_texts_stay_off_so_class_signup_is_the_only_text(self, send_text_mock):
+    @patch('clients.notifications._sms_client')
+    def test_reminder_texts_stay_off_so_class_signup_is_the_only_text(self, sms_client_mock):
         request = type('Req', (), {'user': None})()
         with patch.object(self.admin, 'message_user') as message_user:
             self.admin.text_missing_documents(request, Client.objects.filter(pk=self.client_record.pk))
 
-        send_text_mock.assert_not_called()
+        sms_client_mock.assert_not_called()
+        self.assertFalse(ClientTextMessage.objects.exists())
         self.assertIn('turned off', message_user.call_args.args[1])
 
 
@@ -646,6 +757,25 @@ class SmsInternalOnlyGuardrailTests(TestCase):
         self.assertTrue(ok)
         self.assertIn('+19255501111', detail)
 
+    @override_settings(SMS_INTERNAL_ONLY=True)
+    def test_allowlist_is_built_once_and_matches_normalized_numbers(self):
+        worker = WorkerAccount(client=self.client_record, phone='1 (415) 555-7070')
+        worker.set_pin('7070')
+        worker.save()
+        get_user_model().objects.create_user(username='allowlisted', password='pw12345678', phone='925.550.3333')
+
+        with self.assertNumQueries(1):
+            allowlist = internal_phone_allowlist()
+        with self.assertNumQueries(0):
+            self.assertTrue(_is_internal_phone_allowed('+19255501111', allowlist))
+            self.assertTrue(_is_internal_phone_allowed('+14155557070', allowlist))
+            self.assertTrue(_is_internal_phone_allowed('+19255503333', allowlist))
+            self.assertFalse(_is_internal_phone_allowed('+19255509999', allowlist))
+        self.assertTrue(_is_internal_phone_allowed('(925) 550-3333'))
+        self.assertFalse(_is_internal_phone_allowed('(925) 550-9999'))
+        with override_settings(SMS_INTERNAL_ONLY=False):
+            self.assertIsNone(internal_phone_allowlist())
+
 
 class StaffClassManagementTests(TestCase):
     def setUp(self):
@@ -771,6 +901,182 @@ class StaffClientCreateTests(TestCase):
         self.assertEqual(Client.objects.count(), 2)
 
 
+class _FakeBlobPages(list):
+    def __init__(self, blobs, page_size):
+        super().__init__(blobs)
+        self.page_size = page_size
+
+    def by_page(self):
+        return iter([self[start:start + self.page_size] for start in range(0, len(self), self.page_size)])
+
+
+class _FakeBlobContainer:
+    def __init__(self, names):
+        self.names = names
+        self.list_calls = 0
+        self.head_calls = []
+
+    def list_blobs(self, results_per_page=None):
+        from types import SimpleNamespace
+        self.list_calls += 1
+        blobs = [
+            SimpleNamespace(name=name, size=len(name), etag=f'"etag-{name}"', last_modified=timezone.now())
+            for name in sorted(self.names)
+        ]
+        return _FakeBlobPages(blobs, results_per_page or len(blobs) or 1)
+
+    def get_blob_client(self, path):
+        from types import SimpleNamespace
+        def exists():
+            self.head_calls.append(path)
+            return path in self.names
+        return SimpleNamespace(exists=exists)
+
+
+class FakeAzureContainerMixin:
+    def setUp(self):
+        from types import SimpleNamespace
+        from clients import storage
+        storage.reset_container_index()
+        storage.clear_blob_exists_cache()
+        self.addCleanup(storage.reset_container_index)
+        self.container = _FakeBlobContainer({'resumes/a.pdf', 'resumes/b.pdf', 'documents/c.pdf'})
+        service = SimpleNamespace(get_container_client=lambda name: self.container)
+        azure_env = {'AZURE_ACCOUNT_NAME': 'mhhtest', 'AZURE_ACCOUNT_KEY': TEST_SSN_KEY}
+        # Index loads are queued instead of threaded; load_container_index() runs them.
+        self.index_loads = []
+        for patcher in (
+            patch.dict('os.environ', azure_env),
+            patch('clients.storage._pooled_blob_service', return_value=service),
+            patch('clients.storage._start_index_refresh', side_effect=lambda: self.index_loads.append(True)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def load_container_index(self):
+        from clients import storage
+        self.index_loads.clear()
+        storage.refresh_container_index()
+
+
+@override_settings(BLOB_INDEX_TTL_SECONDS=300)
+class BlobContainerIndexTests(FakeAzureContainerMixin, TestCase):
+    def test_serializing_clients_signs_urls_from_index_without_head_calls(self):
+        from clients.serializers import ClientSerializer
+        self.load_container_index()
+        for index, resume in enumerate(['resumes/a.pdf', 'documents/b.pdf', 'c.pdf']):
+            Client.objects.create(
+                first_name='Blob', last_name=f'Client{index}', phone=f'41555506{index:02d}', gender='P', resume=resume,
+            )
+        data = ClientSerializer(Client.objects.order_by('pk'), many=True).data
+        urls = [row['resume_download_url'] for row in data]
+        self.assertEqual(self.container.list_calls, 1)
+        self.assertEqual(self.container.head_calls, [])
+        self.assertIn('/client-docs/resumes/a.pdf?', urls[0])
+        self.assertIn('/client-docs/resumes/b.pdf?', urls[1])
+        self.assertIn('/client-docs/documents/c.pdf?', urls[2])
+        self.assertTrue(all('sig=' in url for url in urls))
+
+    def test_first_lookup_loads_the_index_in_the_background(self):
+        from clients.storage import blob_exists
+        self.assertEqual(blob_exists('resumes/a.pdf'), 'resumes/a.pdf')
+        self.assertEqual(blob_exists('documents/c.pdf'), 'documents/c.pdf')
+        self.assertEqual(self.container.list_calls, 0)
+        self.assertEqual(self.container.head_calls, ['resumes/a.pdf', 'documents/c.pdf'])
+        self.assertEqual(len(self.index_loads), 1)
+
+        self.load_container_index()
+        self.assertEqual(blob_exists('resumes/b.pdf'), 'resumes/b.pdf')
+        self.assertEqual(self.container.head_calls, ['resumes/a.pdf', 'documents/c.pdf'])
+
+    def test_miss_in_a_fresh_index_is_missing_unless_recorded_since(self):
+        from clients.blob_inventory import record_blob
+        from clients.storage import blob_exists, clear_blob_exists_cache
+        self.load_container_index()
+        self.container.names.update({'documents/new.pdf', 'documents/other.pdf'})
+        self.assertIsNone(blob_exists('documents/missing.pdf'))
+        self.assertIsNone(blob_exists('documents/new.pdf'))
+
+        # Uploaded through another process since the snapshot.
+        record_blob('documents/new.pdf')
+        clear_blob_exists_cache()
+        self.assertEqual(blob_exists('documents/new.pdf'), 'documents/new.pdf')
+        self.assertEqual(self.container.head_calls, [])
+
+        # An expired snapshot is reloaded in the background; misses meanwhile are probed and remembered.
+        with override_settings(BLOB_INDEX_TTL_SECONDS=0):
+            self.assertEqual(blob_exists('documents/other.pdf'), 'documents/other.pdf')
+            self.assertEqual(self.container.head_calls, ['documents/other.pdf'])
+            clear_blob_exists_cache()
+            self.assertEqual(blob_exists('documents/other.pdf'), 'documents/other.pdf')
+            self.assertEqual(self.container.head_calls, ['documents/other.pdf'])
+        self.assertEqual(len(self.index_loads), 1)
+
+
+class BlobInventoryTests(FakeAzureContainerMixin, TestCase):
+    def test_sweep_builds_inventory_and_reconciles_with_set_difference(self):
+        from clients.models import BlobInventoryItem
+        self.container.names.add('resumes/orphan.pdf')
+        BlobInventoryItem.objects.create(name='documents/deleted.pdf', seen_at=timezone.now() - timedelta(days=1))
+        client = Client.objects.create(
+            first_name='Inventory', last_name='Client', phone='4155550700', gender='P', resume='resumes/a.pdf',
+        )
+        present = Document.objects.create(client=client, title='C', doc_type='other', file='documents/c.pdf')
+        moved = Document.objects.create(client=client, title='B', doc_type='other', file='documents/b.pdf')
+        gone = Document.objects.create(client=client, title='Gone', doc_type='other', file='documents/gone.pdf')
+
+        out = StringIO()
+        call_command('sync_blob_inventory', '--page-size', '2', '--report', stdout=out)
+        output = out.getvalue()
+        self.assertIn('Inventoried 4 blobs; removed 1 stale rows.', output)
+        self.assertIn('1 rows with missing blobs; 1 orphaned blobs.', output)
+        self.assertIn(f'missing  clients.Document {gone.pk}: documents/gone.pdf', output)
+        self.assertIn('orphaned resumes/orphan.pdf', output)
+        self.assertEqual(BlobInventoryItem.objects.get(name='documents/c.pdf').etag, 'etag-documents/c.pdf')
+
+        from clients.storage import blob_exists
+        self.load_container_index()
+        self.assertEqual(blob_exists(moved.file.name), 'resumes/b.pdf')
+        self.assertEqual(blob_exists(present.file.name), 'documents/c.pdf')
+        self.assertEqual(self.container.list_calls, 1)
+        self.assertEqual(self.container.head_calls, [])
+
+
+class PhoneDigitsLookupTests(TestCase):
+    def setUp(self):
+        self.client_record = Client.objects.create(
+            first_name='Phone',
+            last_name='Lookup',
+            phone='+1 (415) 555-2301',
+            gender='P',
+        )
+
+    def test_phone_digits_kept_in_sync_and_used_for_lookup(self):
+        from clients.phone_utils import find_all_by_normalized_phone, find_by_normalized_phone
+        self.assertEqual(self.client_record.phone_digits, '4155552301')
+
+        self.client_record.phone = '415.555.2302'
+        self.client_record.save(update_fields=['phone'])
+        self.client_record.refresh_from_db()
+        self.assertEqual(self.client_record.phone_digits, '4155552302')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(find_by_normalized_phone(Client.objects.all(), '(415) 555-2302'), self.client_record)
+        self.assertEqual(list(find_all_by_normalized_phone(Client.objects.all(), '14155552302')), [self.client_record])
+        self.assertIsNone(find_by_normalized_phone(Client.objects.all(), '4155552301'))
+
+        staff = get_user_model().objects.create_user(username='phone_staff', password='x', phone='415-555-2303')
+        self.assertEqual(staff.phone_digits, '4155552303')
+
+    def test_backfill_command_repairs_rows_written_without_save(self):
+        Client.objects.filter(pk=self.client_record.pk).update(phone='415 555 2399', phone_digits='')
+        out = StringIO()
+        call_command('backfill_phone_digits', stdout=out)
+        self.assertIn('updated 1', out.getvalue())
+        self.client_record.refresh_from_db()
+        self.assertEqual(self.client_record.phone_digits, '4155552399')
+
+
 @override_settings(
     MEDIA_ROOT=UPLOAD_TEST_MEDIA_ROOT,
     PUBLIC_APP_BASE_URL='https://public.example.test',
@@ -1188,10 +1494,69 @@ class ClientOutcomesReportTests(TestCase):
         url = reverse('client-outcomes-report-csv')
         response = self.django_client.get(url)
         self.assertEqual(response.status_code, 200)
-        body = response.content.decode()
+        body = response.getvalue().decode()
         rows = [line for line in body.strip().split('\n') if line]
         self.assertEqual(len(rows), Client.objects.count() + 1)
 
+    def test_csv_exports_stream_rows(self):
+        old = Client.objects.get(first_name='Old')
+        CaseNote.objects.create(client=old, staff_member='Maria', content='First')
+        CaseNote.objects.create(client=old, staff_member='Maria', content='Second')
+
+        response = self.django_client.get('/api/clients/export_csv/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="clients_export_', response['Content-Disposition'])
+        rows = response.getvalue().decode().strip().splitlines()
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1].split(',')[17], '2')
+
+        response = self.django_client.get(reverse('client-outcomes-report-csv'))
+        self.assertTrue(response.streaming)
+
+    def _outcomes_rows(self):
+        from django.test import RequestFactory
+        from clients.reports import _client_outcomes_csv_rows, _clients_for_outcomes_report
+
+        request = RequestFactory().get('/api/reports/client-outcomes.csv')
+        request.user = self.staff
+        return list(_client_outcomes_csv_rows(_clients_for_outcomes_report(request)))
+
+    def _add_clients_with_notes(self, count):
+        for index in range(count):
+            client = Client.objects.create(
+                first_name='Noted',
+                last_name=f'Client{index}',
+                phone=f'41555520{index:02d}',
+                gender='F',
+            )
+            for day in (3, 9):
+                CaseNote.objects.create(
+                    client=client,
+                    staff_member='Maria',
+                    content='Check-in',
+                    note_date=date(2026, 1, day),
+                )
+
+    def test_outcomes_rows_use_constant_queries_and_last_note_date(self):
+        self._add_clients_with_notes(2)
+        with self.assertNumQueries(1):
+            rows = self._outcomes_rows()
+        self._add_clients_with_notes(6)
+        with self.assertNumQueries(1):
+            rows = self._outcomes_rows()
+        self.assertEqual(len(rows), 9)
+        noted = [row for row in rows if row[1].startswith('Noted')]
+        self.assertTrue(all(row[17] == 2 and row[18] == '2026-01-09' for row in noted))
+
+    @override_settings(CSV_EXPORT_CHUNK_SIZE=2)
+    def test_outcomes_keyset_pages_cover_every_client_once(self):
+        self._add_clients_with_notes(4)
+        Client.objects.update(updated_at=timezone.now())
+        rows = self._outcomes_rows()
+        ids = [row[0] for row in rows]
+        self.assertEqual(ids, sorted(Client.objects.values_list('id', flat=True), reverse=True))
+
     def test_outcomes_package_zip_downloads(self):
         url = reverse('client-outcomes-package')
         response = self.django_client.get(url)
@@ -1199,6 +1564,133 @@ class ClientOutcomesReportTests(TestCase):
         self.assertEqual(response['Content-Type'], 'application/zip')
 
 
+class ClientMetricsSnapshotTests(TestCase):
+    """The grouped SQL rollup must match the per-row loop it replaced."""
+
+    REFERENCE_DATE = date(2024, 2, 29)
+
+    def setUp(self):
+        rows = [
+            ('F', date(2006, 2, 28), 'asian', '94110', 'capsa', 'active'),
+            ('F', date(2006, 3, 1), 'latinx', ' 94110 ', 'citybuild', 'active'),
+            ('M', date(1999, 2, 28), 'black', '94103', 'pit_stop', 'inactive'),
+            ('M', date(1999, 3, 1), 'white', None, 'guard_card', 'completed'),
+            ('NB', date(1969, 2, 28), 'multiracial', '', 'general', 'active'),
+            ('O', date(1969, 3, 1), 'decline_state', '94124', 'general', 'pending'),
+            ('P', None, 'other', '94124', 'capsa', 'active'),
+            ('', date(2030, 1, 1), 'native', '94103', 'citybuild', 'active'),
+            ('X', date(1950, 6, 1), 'unmapped', '94110', 'general', 'inactive'),
+        ]
+        for index, (gender, dob, demographic, zip_code, program, status) in enumerate(rows):
+            Client.objects.create(
+                first_name='Metric',
+                last_name=f'Client{index}',
+                phone=f'41555530{index:02d}',
+                gender=gender,
+                dob=dob,
+                demographic_info=demographic,
+                zip_code=zip_code,
+                training_interest=program,
+                status=status,
+            )
+
+    def _loop_snapshot(self, clients, today):
+        """Row-by-row rollup the SQL engine replaced, kept as the parity oracle."""
+        gender_labels = {
+            'F': 'Female',
+            'M': 'Male',
+            'NB': 'Genderqueer or Gender Non-binary',
+            'O': 'Not listed, specified',
+            'P': 'Declined to state',
+        }
+        race_labels = {
+            'american_indian': 'American Indian or Alaska Native, alone',
+            'native': 'American Indian or Alaska Native, alone',
+            'asian': 'Asian, alone',
+            'black': 'Black or African-American, alone',
+            'hispanic_latinx': 'Hispanic, Latino, or Spanish',
+            'latinx': 'Hispanic, Latino, or Spanish',
+            'middle_eastern': 'Middle Eastern or North African, alone',
+            'pacific_islander': 'Native Hawaiian or Other Pacific Islander, alone',
+            'white': 'White, alone',
+            'multiracial': 'Two or More Races',
+            'mixed': 'Two or More Races',
+            'decline_state': 'Declined to state',
+            'prefer_not': 'Declined to state',
+            'other': 'Other Race, alone',
+        }
+        unknown = 'Data Unknown or Unavailable.'
+        gender_counts, age_counts, race_counts, zip_counts = {}, {}, {}, {}
+        for c in clients:
+            gender = gender_labels.get(c.gender, unknown)
+            gender_counts[gender] = gender_counts.get(gender, 0) + 1
+            if not c.dob:
+                band = unknown
+            else:
+                age = today.year - c.dob.year - ((today.month, today.day) < (c.dob.month, c.dob.day))
+                if age <= 17:
+                    band = 'Youth (17 and under)'
+                elif age <= 24:
+                    band = 'TAY (age 18 to 24)'
+                elif age <= 54:
+                    band = 'Adults (age 25 to 54)'
+                else:
+                    band = 'Older Adults (age 55 and over)'
+            age_counts[band] = age_counts.get(band, 0) + 1
+            race = race_labels.get(c.demographic_info, unknown)
+            race_counts[race] = race_counts.get(race, 0) + 1
+            zip_code = (c.zip_code or '').strip()
+            if zip_code:
+                zip_counts[zip_code] = zip_counts.get(zip_code, 0) + 1
+        program_counts = {
+            label: sum(1 for c in clients if c.training_interest == key)
+            for key, label in Client.TRAINING_INTEREST_CHOICES
+        }
+        return {
+            'total_clients': len(clients),
+            'active_clients': sum(1 for c in clients if c.status == 'active'),
+            'program_counts': program_counts,
+            'gender_counts': gender_counts,
+            'age_counts': age_counts,
+            'race_counts': race_counts,
+            'zip_counts': zip_counts,
+        }
+
+    def _nonzero(self, snapshot):
+        return {
+            key: {label: count for label, count in value.items() if count}
+            if isinstance(value, dict) else value
+            for key, value in snapshot.items()
+            if key != 'generated_at'
+        }
+
+    def test_grouped_rollup_matches_row_loop_in_one_query(self):
+        from clients.reports import _client_metrics_snapshot_for_queryset
+
+        with self.assertNumQueries(1):
+            snapshot = _client_metrics_snapshot_for_queryset(
+                Client.objects.all(), reference_date=self.REFERENCE_DATE
+            )
+        expected = self._loop_snapshot(list(Client.objects.all()), self.REFERENCE_DATE)
+        self.assertEqual(self._nonzero(snapshot), self._nonzero(expected))
+        self.assertEqual(list(snapshot['gender_counts'])[-1], 'Data Unknown or Unavailable.')
+        self.assertEqual(snapshot['age_counts']['Declined to state'], 0)
+        self.assertEqual(snapshot['zip_counts']['94110'], 3)
+
+    def test_annotated_outcomes_queryset_is_not_inflated_by_joins(self):
+        from django.db.models import Count
+        from clients.reports import _client_metrics_snapshot_for_queryset
+
+        first = Client.objects.order_by('pk').first()
+        for _ in range(3):
+            CaseNote.objects.create(client=first, staff_member='Maria', content='Check-in')
+        clients = Client.objects.annotate(case_notes_total=Count('casenotes')).filter(status='active')
+        snapshot = _client_metrics_snapshot_for_queryset(clients, reference_date=self.REFERENCE_DATE)
+        expected = self._loop_snapshot(list(Client.objects.filter(status='active')), self.REFERENCE_DATE)
+        self.assertEqual(self._nonzero(snapshot), self._nonzero(expected))
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
 class CityBuildMissingDocsReportTests(TestCase):
     def setUp(self):
         User = get_user_model()
@@ -1247,7 +1739,7 @@ class CityBuildMissingDocsReportTests(TestCase):
         url = reverse('citybuild-missing-docs-report-csv')
         response = self.django_client.get(url)
         self.assertEqual(response.status_code, 200)
-        body = response.content.decode()
+        body = response.getvalue().decode()
         rows = [line for line in body.strip().split('\n') if line]
         self.assertEqual(len(rows), 2)
         self.assertIn('Build Candidate', body)
@@ -1279,11 +1771,117 @@ class CityBuildMissingDocsReportTests(TestCase):
         url = reverse('citybuild-missing-docs-report-csv') + '?only_incomplete=1'
         response = self.django_client.get(url)
         self.assertEqual(response.status_code, 200)
-        body = response.content.decode()
+        body = response.getvalue().decode()
         rows = [line for line in body.strip().split('\n') if line]
         self.assertEqual(len(rows), 1)
 
 
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ClientRollupTests(TestCase):
+    def setUp(self):
+        self.client_record = Client.objects.create(
+            first_name='Rollup',
+            last_name='Client',
+            phone='4155552101',
+            gender='F',
+        )
+
+    def _rollup(self):
+        from clients.models import ClientRollup
+        return ClientRollup.objects.get(client=self.client_record)
+
+    def test_note_and_document_writes_keep_rollup_current(self):
+        first = CaseNote.objects.create(
+            client=self.client_record,
+            staff_member='Maria',
+            note_type='general',
+            content='Intake',
+            note_date=date(2024, 3, 1),
+        )
+        CaseNote.objects.create(
+            client=self.client_record,
+            staff_member='Maria',
+            note_type='general',
+            content='Follow up',
+            note_date=date(2024, 4, 2),
+        )
+        document = Document.objects.create(
+            client=self.client_record,
+            title='TABE',
+            doc_type='cb_tabe',
+            file=SimpleUploadedFile('tabe.pdf', b'%PDF'),
+            uploaded_by='admin',
+        )
+        rollup = self._rollup()
+        self.assertEqual(rollup.case_notes_count, 2)
+        self.assertEqual(rollup.last_note_date, date(2024, 4, 2))
+        self.assertEqual(rollup.documents_count, 1)
+        self.assertEqual(rollup.doc_types, ['cb_tabe'])
+
+        first.delete()
+        document.delete()
+        rollup = self._rollup()
+        self.assertEqual(rollup.case_notes_count, 1)
+        self.assertEqual(rollup.documents_count, 0)
+        self.assertEqual(rollup.doc_types, [])
+
+        self.client_record.delete()
+        from clients.models import ClientRollup
+        self.assertFalse(ClientRollup.objects.exists())
+
+    def test_rebuild_command_reports_and_repairs_drift(self):
+        CaseNote.objects.create(
+            client=self.client_record,
+            staff_member='Maria',
+            note_type='general',
+            content='Intake',
+        )
+        call_command('rebuild_client_rollups', '--check', stdout=StringIO())
+
+        CaseNote.objects.filter(client=self.client_record).delete()
+        from clients.models import ClientRollup
+        ClientRollup.objects.filter(client=self.client_record).update(case_notes_count=5)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_client_rollups', '--check', stdout=StringIO())
+
+        call_command('rebuild_client_rollups', stdout=StringIO())
+        self.assertEqual(self._rollup().case_notes_count, 0)
+        call_command('rebuild_client_rollups', '--check', stdout=StringIO())
+
+    def test_moving_a_note_or_document_refreshes_both_clients(self):
+        other = Client.objects.create(first_name='Other', last_name='Client', phone='4155552102', gender='M')
+        note = CaseNote.objects.create(
+            client=self.client_record,
+            staff_member='Maria',
+            note_type='general',
+            content='Filed on the wrong client',
+        )
+        document = Document.objects.create(
+            client=self.client_record,
+            title='TABE',
+            doc_type='cb_tabe',
+            file=SimpleUploadedFile('tabe.pdf', b'%PDF'),
+            uploaded_by='admin',
+        )
+
+        note = CaseNote.objects.get(pk=note.pk)
+        note.client = other
+        note.save()
+        document = Document.objects.get(pk=document.pk)
+        document.client = other
+        document.save()
+
+        rollup = self._rollup()
+        self.assertEqual((rollup.case_notes_count, rollup.documents_count, rollup.doc_types), (0, 0, []))
+        other.refresh_from_db()
+        self.assertEqual((other.rollup.case_notes_count, other.rollup.documents_count), (1, 1))
+
+    def test_client_without_rollup_counts_nothing_without_querying(self):
+        client_record = Client.objects.select_related('rollup').get(pk=self.client_record.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual((client_record.case_notes_count, client_record.documents_count), (0, 0))
+
+
 class StaffSpaApiTests(TestCase):
     def setUp(self):
         User = get_user_model()
@@ -1547,6 +2145,7 @@ class StaffPitStopPromoteTests(TestCase):
     AZURE_COMMUNICATION_CONNECTION_STRING='endpoint=https://example.test/;accesskey=fake',
     AZURE_COMMUNICATION_SMS_FROM='+15555550123',
     SMS_CLASS_CONFIRMATION_ENABLED=True,
+    JOB_QUEUE_EAGER=True,
 )
 class ClassConfirmationSmsTests(TestCase):
     def setUp(self):
@@ -1669,6 +2268,25 @@ class ClassConfirmationSmsTests(TestCase):
         self.assertEqual(ClientTextMessage.objects.count(), 1)
         self.assertEqual(sms_client_mock.return_value.send.call_count, 1)
 
+    @patch('clients.notifications._sms_client')
+    def test_enrollment_queues_the_text_for_the_job_worker(self, sms_client_mock):
+        sms_client_mock.return_value.send.return_value = self._sent_result()
+
+        with override_settings(JOB_QUEUE_EAGER=False):
+            response = self.http.post(
+                self.url,
+                data={'client_id': self.client_record.pk},
+                content_type='application/json',
+            )
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.json()['text_outcome'], 'queued')
+            sms_client_mock.assert_not_called()
+
+            call_command('run_jobs', '--once', stdout=StringIO())
+
+        self.assertEqual(ClientTextMessage.objects.get().status, ClientTextMessage.STATUS_SENT)
+        self.assertEqual(BackgroundJob.objects.get().status, BackgroundJob.STATUS_SUCCEEDED)
+
     @patch('clients.notifications._sms_client')
     def test_enrollment_still_succeeds_when_sms_provider_fails(self, sms_client_mock):
         sms_client_mock.side_effect = RuntimeError('Azure unreachable')
@@ -1739,6 +2357,1007 @@ class ClassConfirmationSmsTests(TestCase):
         self.assertIn(response.status_code, (401, 403))
 
 
+def failing_job_task(**kwargs):
+    raise RuntimeError('provider down')
+
+
+@override_settings(
+    PITSTOP_APPLICATION_ALERT_EMAILS='pitstop@example.com, lead@example.com',
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    JOB_RETRY_BASE_SECONDS=30,
+)
+class BackgroundJobQueueTests(TestCase):
+    def test_pitstop_submit_queues_one_alert_per_recipient(self):
+        client_record = Client.objects.create(first_name='Dana', last_name='Ruiz', phone='(628) 555-0142')
+        response = APIClient().post(
+            '/api/pitstop-applications/',
+            {'client': client_record.pk, 'position_applied_for': 'Pit Stop Attendant'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(BackgroundJob.objects.filter(status=BackgroundJob.STATUS_PENDING).count(), 2)
+
+        out = StringIO()
+        call_command('run_jobs', '--once', stdout=out)
+        self.assertIn('Ran 2 jobs', out.getvalue())
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['lead@example.com', 'pitstop@example.com'])
+
+    def test_idempotency_key_returns_the_existing_job(self):
+        first, created = enqueue('clients.tests.failing_job_task', idempotency_key='once-only')
+        again, created_again = enqueue('clients.tests.failing_job_task', idempotency_key='once-only')
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(first.pk, again.pk)
+        self.assertEqual(BackgroundJob.objects.count(), 1)
+
+    def test_failures_back_off_then_give_up(self):
+        job, _ = enqueue('clients.tests.failing_job_task', max_attempts=2)
+
+        before = timezone.now()
+        self.assertEqual(run_due_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.STATUS_PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('provider down', job.last_error)
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=30))
+        # Not due again until the backoff has passed.
+        self.assertEqual(run_due_jobs(), 0)
+
+        BackgroundJob.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.assertEqual(run_due_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.STATUS_FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_expired_lease_is_reclaimed(self):
+        job, _ = enqueue(
+            'clients.notifications.deliver_pitstop_application_alert',
+            {'application_id': 0, 'recipient': 'nobody@example.com'},
+        )
+        # A worker that died mid-job leaves it running with a lapsed lease.
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            status=BackgroundJob.STATUS_RUNNING,
+            attempts=1,
+            locked_until=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(run_due_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.STATUS_SUCCEEDED)
+        self.assertEqual(job.attempts, 2)
+
+
+class _FixedWindowTestThrottle(SharedAnonRateThrottle):
+    rate = '10/min'
+    timer = staticmethod(lambda: 600.0)
+
+
+def _hammer_shared_cache(path, rounds):
+    """Child process: bump one counter and race for one add()."""
+    cache = SQLiteCache(path, {})
+    cache.add('counter', 0)
+    for _ in range(rounds):
+        cache.incr('counter')
+    return cache.add('leader', os.getpid())
+
+
+def _punch_from_one_worker(attempts):
+    """Child process: one gunicorn worker's view of the same iPad's requests."""
+    request = SimpleNamespace(user=AnonymousUser(), META={'REMOTE_ADDR': '10.0.0.9'})
+    throttle = _FixedWindowTestThrottle()
+    return sum(1 for _ in range(attempts) if throttle.allow_request(request, None))
+
+
+class SharedCacheTests(SimpleTestCase):
+    """The SQLite fallback cache is shared, and atomic, across processes."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cache.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _in_four_processes(self, func, args):
+        # Forked after any override_settings, like gunicorn workers after boot.
+        with multiprocessing.get_context('fork').Pool(4) as pool:
+            return pool.starmap(func, [args] * 4), {process.pid for process in pool._pool}
+
+    def test_counters_and_add_are_atomic_across_processes(self):
+        won, pids = self._in_four_processes(_hammer_shared_cache, (self.path, 250))
+        cache = SQLiteCache(self.path, {})
+        self.assertEqual(cache.get('counter'), 1000)
+        self.assertEqual(won.count(True), 1)
+        self.assertIn(cache.get('leader'), pids)
+
+    def test_values_round_trip_and_expire(self):
+        cache = SQLiteCache(self.path, {})
+        cache.set('stats', {'clients': 3, 'labels': ['a']}, timeout=60)
+        self.assertEqual(cache.get('stats'), {'clients': 3, 'labels': ['a']})
+        cache.set('gone', 'x', timeout=0)
+        self.assertIsNone(cache.get('gone'))
+        self.assertTrue(cache.add('gone', 'y'))
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+
+    def test_throttle_limit_holds_across_worker_processes(self):
+        caches_setting = {'default': {'BACKEND': 'clients.cache_backends.SQLiteCache', 'LOCATION': self.path}}
+        with override_settings(CACHES=caches_setting):
+            allowed, _pids = self._in_four_processes(_punch_from_one_worker, (8,))
+        # 32 attempts from four workers, one 10/min budget between them.
+        self.assertEqual(sum(allowed), 10)
+
+
+class DashboardStatsTests(TestCase):
+    """Dashboard numbers come from per-day buckets, cached behind an ETag."""
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        User.objects.create_user(
+            username='stats_mgr',
+            password='staffpass123',
+            email='stats@example.com',
+            role='case_manager',
+        )
+        self.http = DjangoTestClient()
+        self.http.login(username='stats_mgr', password='staffpass123')
+        self.maria = Client.objects.create(first_name='Maria', last_name='Lopez', phone='4155550101', status='active')
+        Client.objects.create(first_name='Ana', last_name='Silva', phone='4155550102', status='pending')
+
+    def test_usage_windows_are_summed_from_daily_buckets(self):
+        self.maria.additional_notes = 'Updated twice today, counted once.'
+        self.maria.save()
+        DashboardDailyCounter.objects.create(
+            day=timezone.localdate() - timedelta(days=10),
+            metric='documents_uploaded',
+            value=3,
+        )
+
+        body = self.http.get('/api/staff/dashboard/usage-stats/').json()
+
+        self.assertEqual(body['total_active_clients'], 1)
+        self.assertEqual(body['clients_updated_7d'], 2)
+        self.assertEqual(body['staff_active_7d'], 1)
+        self.assertEqual(body['documents_uploaded_7d'], 0)
+        self.assertEqual(body['documents_uploaded_30d'], 3)
+
+    def test_unchanged_stats_answer_304_until_something_is_written(self):
+        first = self.http.get('/api/staff/dashboard/usage-stats/')
+        etag = first['ETag']
+
+        again = self.http.get('/api/staff/dashboard/usage-stats/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        with self.assertNumQueries(0):
+            dashboard_snapshot()
+
+        CaseNote.objects.create(
+            client=self.maria,
+            note_type='general',
+            content='Called about jobs.',
+            staff_member='stats_mgr',
+        )
+        after_write = self.http.get('/api/dashboard/stats/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(after_write.status_code, 200)
+        self.assertEqual(after_write.json()['total_case_notes'], 1)
+        self.assertEqual(after_write.json()['total_clients'], 2)
+
+    def test_totals_follow_writes_and_only_counted_changes_bust_the_snapshot(self):
+        _payload, etag = dashboard_snapshot()
+        with self.assertNumQueries(3):
+            build_snapshot()
+
+        # Already counted as updated today, status and resume unchanged.
+        self.maria.additional_notes = 'First save today.'
+        self.maria.save()
+        _payload, etag = dashboard_snapshot()
+        self.maria.additional_notes = 'Second save today.'
+        self.maria.save()
+        self.assertEqual(dashboard_snapshot()[1], etag)
+
+        self.maria.status = 'completed'
+        self.maria.save()
+        payload, moved_etag = dashboard_snapshot()
+        self.assertNotEqual(moved_etag, etag)
+        self.assertEqual((payload['active_clients'], payload['completed_clients']), (0, 1))
+
+        Document.objects.create(client=self.maria, title='ID', doc_type='id', file='documents/id.pdf')
+        CaseNote.objects.create(client=self.maria, note_type='general', content='Done.', staff_member='stats_mgr')
+        self.assertEqual(dashboard_snapshot()[0]['total_documents'], 1)
+        self.maria.delete()
+        payload = dashboard_snapshot()[0]
+        self.assertEqual(
+            (payload['total_clients'], payload['completed_clients'], payload['total_documents'], payload['total_case_notes']),
+            (1, 0, 0, 0),
+        )
+
+    def test_admin_bulk_status_change_recounts_totals(self):
+        admin = ClientAdmin(Client, AdminSite())
+        request = type('Req', (), {'user': None})()
+        with patch.object(admin, 'message_user'):
+            admin.mark_active(request, Client.objects.all())
+        self.assertEqual(dashboard_snapshot()[0]['active_clients'], 2)
+
+    def test_compaction_drops_aged_out_members_and_rebuild_restores_buckets(self):
+        DashboardDailyMember.objects.create(
+            day=timezone.localdate() - timedelta(days=45),
+            metric='clients_updated',
+            member_id=self.maria.pk,
+        )
+        DashboardDailyCounter.objects.all().delete()
+
+        call_command('compact_dashboard_stats', '--rebuild', stdout=StringIO())
+
+        self.assertFalse(DashboardDailyMember.objects.filter(day__lt=timezone.localdate() - timedelta(days=29)).exists())
+        self.assertEqual(
+            DashboardDailyCounter.objects.get(day=timezone.localdate(), metric='clients_created').value,
+            2,
+        )
+        self.assertEqual(dashboard_snapshot()[0]['total_clients'], 2)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ClientSearchTests(TestCase):
+    """Staff and admin client search: ranked, typo-tolerant, kept current on save."""
+
+    def setUp(self):
+        client_index.clear()
+        self.john = Client.objects.create(first_name='John', last_name='Smith', phone='4155550111', gender='M')
+        self.johnson = Client.objects.create(first_name='Alma', last_name='Johnson', phone='4155550112', gender='F')
+        self.jose = Client.objects.create(
+            first_name='José', last_name='Ramírez', phone='(510) 555-0113', email='jramirez@example.com', gender='M',
+        )
+
+    def test_typos_and_accents_find_the_client_exact_matches_first(self):
+        self.assertEqual(search_clients(Client.objects.all(), 'Jonh', 40), [self.john])
+        self.assertEqual(search_clients(Client.objects.all(), 'jose ramirez', 40), [self.jose])
+        self.assertEqual(search_clients(Client.objects.all(), 'john', 40), [self.john, self.johnson])
+        self.assertEqual(search_clients(Client.objects.all(), '510-555', 40), [self.jose])
+
+    def test_index_follows_saves_and_deletes(self):
+        search_clients(Client.objects.all(), 'smith', 40)
+        self.john.last_name = 'Smythe'
+        self.john.save(update_fields=['last_name'])
+        self.john.refresh_from_db()
+        self.assertEqual(self.john.search_text, 'john smythe')
+        self.assertEqual(search_clients(Client.objects.all(), 'smythe', 40), [self.john])
+
+        self.johnson.delete()
+        self.assertEqual(search_clients(Client.objects.all(), 'alma', 40), [])
+
+    def test_admin_search_uses_the_same_matching(self):
+        from django.test import RequestFactory
+
+        admin = ClientAdmin(Client, AdminSite())
+        request = RequestFactory().get('/admin/clients/client/', {'q': 'Jonh Smiht'})
+        queryset, use_distinct = admin.get_search_results(request, Client.objects.all(), 'Jonh Smiht')
+        self.assertEqual(list(queryset), [self.john])
+        self.assertFalse(use_distinct)
+
+
+class KeysetPaginationTests(TestCase):
+    """Staff lists and the API page with opaque (updated_at/created_at, id) cursors."""
+
+    def setUp(self):
+        User = get_user_model()
+        User.objects.create_user(
+            username='pager_mgr',
+            password='staffpass123',
+            email='pager@example.com',
+            role='case_manager',
+        )
+        self.http = DjangoTestClient()
+        self.http.login(username='pager_mgr', password='staffpass123')
+        self.clients = [
+            Client.objects.create(first_name=f'Page{index}', last_name='Walker', phone=f'415555030{index}', gender='F')
+            for index in range(5)
+        ]
+
+    def test_staff_client_list_walks_every_row_once(self):
+        seen = []
+        url = '/api/staff/clients/?limit=2'
+        while url:
+            response = self.http.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['id'] for row in response.json())
+            cursor = response.get('X-Next-Cursor')
+            url = f'/api/staff/clients/?limit=2&cursor={cursor}' if cursor else None
+        self.assertEqual(seen, [client.pk for client in reversed(self.clients)])
+
+        tampered = self.http.get('/api/staff/clients/?limit=2&cursor=not-a-cursor')
+        self.assertEqual(tampered.status_code, 400)
+
+    def test_message_threads_page_by_latest_activity(self):
+        for client in self.clients[:3]:
+            for body in ('first', 'second'):
+                ClientTextMessage.objects.create(client=client, body=f'{client.first_name} {body}')
+
+        first = self.http.get('/api/staff/messages/?limit=2').json()
+        self.assertEqual([thread['client_id'] for thread in first['threads']], [self.clients[2].pk, self.clients[1].pk])
+        self.assertEqual([m['body'] for m in first['threads'][0]['messages']], ['Page2 first', 'Page2 second'])
+
+        second = self.http.get(f"/api/staff/messages/?limit=2&cursor={first['next_cursor']}").json()
+        self.assertEqual([thread['client_id'] for thread in second['threads']], [self.clients[0].pk])
+        self.assertIsNone(second['next_cursor'])
+
+    def test_api_viewsets_return_next_links_instead_of_offsets(self):
+        for client in self.clients:
+            CaseNote.objects.create(client=client, staff_member='pager_mgr', note_type='general', content='Check-in')
+
+        first = self.http.get('/api/case-notes/?page_size=3').json()
+        self.assertEqual(len(first['results']), 3)
+        self.assertNotIn('count', first)
+        second = self.http.get(first['next']).json()
+        self.assertEqual(len(second['results']), 2)
+        self.assertIsNone(second['next'])
+        ids = [note['id'] for note in first['results'] + second['results']]
+        self.assertEqual(len(set(ids)), 5)
+        self.assertEqual(self.http.get('/api/case-notes/?cursor=bogus').status_code, 404)
+
+
+class WorkerOfflinePunchSyncTests(TestCase):
+    def setUp(self):
+        # Sync POSTs share the per-iPad punch throttle with the live endpoint.
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.api = APIClient()
+        client_record = Client.objects.create(
+            first_name='Offline',
+            last_name='Worker',
+            phone='4155553434',
+            email='offline@example.com',
+            gender='F',
+            training_interest='pit_stop',
+            status='active',
+        )
+        self.worker = WorkerAccount(client=client_record, phone='4155553434', worker_status=WorkerAccount.STATUS_ACTIVE)
+        self.worker.set_pin('3434')
+        self.worker.save()
+        self.token = WorkerSession.create_session(self.worker)
+        self.api.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+        self.start = (timezone.now() - timedelta(hours=9)).replace(microsecond=0)
+
+    def _event(self, action, minutes, **extra):
+        event = {
+            'action': action,
+            'at': (self.start + timedelta(minutes=minutes)).isoformat(),
+            'latitude': 37.7749,
+            'longitude': -122.4194,
+            'accuracy': 12,
+        }
+        event.update(extra)
+        return event
+
+    def _sync(self, events, signature=None):
+        payload = json.dumps(events)
+        return self.api.post(
+            '/api/worker/time-punch/sync/',
+            {'events': payload, 'signature': signature or punch_batch_signature(self.token, payload)},
+            format='json',
+        )
+
+    def test_full_shift_applies_once_and_replays_as_duplicates(self):
+        shift = [
+            self._event('clock_in', 0),
+            self._event('start_lunch', 240),
+            self._event('end_lunch', 270),
+            self._event('clock_out', 510),
+        ]
+        response = self._sync(shift)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['status'] for row in response.data['results']], ['applied'] * 4)
+        self.assertIsNone(response.data['active_punch'])
+        punch = WorkerTimePunch.objects.get(worker_account=self.worker)
+        self.assertEqual(punch.clock_in_at, self.start)
+        self.assertEqual(punch.clock_out_at, self.start + timedelta(minutes=510))
+        self.assertEqual(punch.lunch_minutes, 30)
+        self.assertEqual(BackgroundJob.objects.filter(task='clients.worker_views.store_punch_map_snapshot').count(), 2)
+        self.assertEqual(ClientRollup.objects.get(client=self.worker.client).last_punch_at, punch.clock_out_at)
+
+        sheet = WorkerDailyTimesheet.objects.get(worker_account=self.worker)
+        self.assertEqual((sheet.shifts, sheet.lunch_minutes, float(sheet.net_hours)), (1, 30, 8.0))
+
+        replay = self._sync(shift)
+        self.assertEqual([row['status'] for row in replay.data['results']], ['duplicate'] * 4)
+        self.assertEqual(WorkerTimePunch.objects.filter(worker_account=self.worker).count(), 1)
+
+    def test_invalid_events_are_rejected_individually(self):
+        response = self._sync([
+            self._event('start_lunch', 0),
+            self._event('clock_in', 5, latitude=None),
+            self._event('clock_in', 10),
+            self._event('clock_in', 20),
+        ])
+        self.assertEqual(response.status_code, 200)
+        statuses = [row['status'] for row in response.data['results']]
+        self.assertEqual(statuses, ['rejected', 'rejected', 'applied', 'rejected'])
+        self.assertEqual(response.data['results'][0]['error'], 'No active clock-in found.')
+        self.assertEqual(response.data['active_punch']['id'], response.data['results'][2]['punch_id'])
+
+    def test_signature_and_order_are_checked_before_anything_applies(self):
+        events = [self._event('clock_in', 0)]
+        self.assertEqual(self._sync(events, signature='0' * 64).status_code, 400)
+        out_of_order = self._sync([self._event('clock_in', 30), self._event('clock_out', 0)])
+        self.assertEqual(out_of_order.status_code, 400)
+        self.assertFalse(WorkerTimePunch.objects.filter(worker_account=self.worker).exists())
+
+
+class WorkerSessionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.api = APIClient()
+        client_record = Client.objects.create(
+            first_name='Ticker',
+            last_name='Worker',
+            phone='4155555656',
+            email='ticker@example.com',
+            gender='M',
+            training_interest='pit_stop',
+            status='active',
+        )
+        self.worker = WorkerAccount(client=client_record, phone='4155555656', worker_status=WorkerAccount.STATUS_ACTIVE)
+        self.worker.set_pin('5656')
+        self.worker.save()
+        self.token = WorkerSession.create_session(self.worker)
+        self.api.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def test_warm_ticker_poll_makes_no_queries(self):
+        self.assertFalse(self.api.get('/api/worker/dashboard-summary/').data['is_clocked_in'])
+        with self.assertNumQueries(0):
+            response = self.api.get('/api/worker/dashboard-summary/')
+        self.assertEqual(response.status_code, 200)
+
+        WorkerTimePunch.objects.create(worker_account=self.worker, clock_in_at=timezone.now())
+        self.assertTrue(self.api.get('/api/worker/dashboard-summary/').data['is_clocked_in'])
+
+    def test_portal_access_and_logout_take_effect_before_the_ttl(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.api.get('/api/worker/profile/').status_code, 200)
+        self.assertEqual(self.api.get('/api/worker/dashboard-summary/').status_code, 200)
+
+        self.worker.is_active = False
+        self.worker.save()
+        self.assertEqual(self.api.get('/api/worker/dashboard-summary/').status_code, 403)
+
+        self.worker.is_active = True
+        self.worker.save()
+        self.assertEqual(self.api.post('/api/worker/logout/').status_code, 200)
+        self.assertEqual(self.api.get('/api/worker/dashboard-summary/').status_code, 401)
+
+    def test_admin_bulk_disable_takes_effect_before_the_ttl(self):
+        self.assertEqual(self.api.get('/api/worker/dashboard-summary/').status_code, 200)
+
+        admin = WorkerAccountAdmin(WorkerAccount, AdminSite())
+        request = type('Req', (), {'user': None})()
+        with patch.object(admin, 'message_user'):
+            admin.disable_portal(request, WorkerAccount.objects.filter(pk=self.worker.pk))
+        self.assertEqual(self.api.get('/api/worker/dashboard-summary/').status_code, 403)
+
+    def test_expired_tokens_are_purged_by_one_queued_job(self):
+        WorkerSessionToken.objects.create(
+            token='expired-token',
+            worker_account=self.worker,
+            expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        WorkerSession.create_session(self.worker)
+        purge_jobs = BackgroundJob.objects.filter(task='clients.worker_sessions.purge_expired_sessions')
+        self.assertEqual(purge_jobs.count(), 1)
+
+        self.assertEqual(purge_expired_sessions(), {'deleted': 1})
+        self.assertEqual(WorkerSessionToken.objects.filter(worker_account=self.worker).count(), 2)
+
+
+class WorkerHoursEngineTests(TestCase):
+    def setUp(self):
+        self.workers = []
+        for index in range(2):
+            client_record = Client.objects.create(
+                first_name=f'Hours{index}',
+                last_name='Worker',
+                phone=f'415555700{index}',
+                email=f'hours{index}@example.com',
+                gender='M',
+                training_interest='pit_stop',
+                status='active',
+            )
+            worker = WorkerAccount(client=client_record, phone=f'415555700{index}')
+            worker.set_pin('7000')
+            worker.save()
+            self.workers.append(worker)
+        self.now = timezone.now().replace(microsecond=0)
+
+    def _punch(self, worker, start_hours_ago, length_hours=None, lunch_minutes=0):
+        clock_in = self.now - timedelta(hours=start_hours_ago)
+        punch = WorkerTimePunch(worker_account=worker, clock_in_at=clock_in)
+        if length_hours is not None:
+            punch.clock_out_at = clock_in + timedelta(hours=length_hours)
+        if lunch_minutes:
+            punch.lunch_start_at = clock_in + timedelta(hours=1)
+            punch.lunch_end_at = punch.lunch_start_at + timedelta(minutes=lunch_minutes)
+        punch.save()
+        return punch
+
+    def test_all_windows_come_from_one_query_with_net_of_lunch(self):
+        worker = self.workers[0]
+        self._punch(worker, 10, 8, lunch_minutes=30)
+        self._punch(worker, 72, 4)
+        self._punch(worker, 1)
+        windows = {'recent': (self.now - timedelta(hours=24), None), 'all': ALL_TIME}
+        with self.assertNumQueries(1):
+            hours = hours_for_worker(worker, windows)
+        self.assertEqual(hours['recent']['gross_hours'], 8.0)
+        self.assertEqual(hours['recent']['net_hours'], 7.5)
+        self.assertEqual(hours['recent']['open_shifts'], 1)
+        self.assertEqual(hours['all']['net_hours'], 11.5)
+        self.assertEqual(hours['all']['lunch_minutes'], 30)
+        self.assertEqual(hours['all']['shifts'], 2)
+
+    def test_batch_lookup_groups_by_worker_and_fills_missing(self):
+        self._punch(self.workers[0], 5, 2)
+        self._punch(self.workers[1], 5, 3, lunch_minutes=60)
+        with self.assertNumQueries(1):
+            hours = hours_by_worker({'all': ALL_TIME}, [worker.pk for worker in self.workers] + [0])
+        self.assertEqual(hours[self.workers[0].pk]['all']['net_hours'], 2.0)
+        self.assertEqual(hours[self.workers[1].pk]['all']['net_hours'], 2.0)
+        self.assertEqual(hours[0]['all']['shifts'], 0)
+
+        admin_user = get_user_model().objects.create_superuser('hoursadmin', 'hoursadmin@example.com', 'pw-12345')
+        http = DjangoTestClient()
+        http.force_login(admin_user)
+        response = http.get(reverse('admin:clients_workeraccount_changelist'))
+        self.assertContains(response, 'hrs', count=2)
+
+
+class WorkerDailyTimesheetTests(TestCase):
+    def setUp(self):
+        client_record = Client.objects.create(
+            first_name='Sheet',
+            last_name='Worker',
+            phone='4155558080',
+            email='sheet@example.com',
+            gender='F',
+            training_interest='pit_stop',
+            status='active',
+        )
+        self.worker = WorkerAccount(client=client_record, phone='4155558080')
+        self.worker.set_pin('8080')
+        self.worker.save()
+        self.day = timezone.localdate() - timedelta(days=2)
+
+    def _at(self, day, hour, minute=0):
+        return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+    def test_punch_writes_keep_the_day_current(self):
+        punch = WorkerTimePunch.objects.create(worker_account=self.worker, clock_in_at=self._at(self.day, 8))
+        sheet = WorkerDailyTimesheet.objects.get(worker_account=self.worker, work_date=self.day)
+        self.assertEqual((sheet.shifts, sheet.open_shifts), (0, 1))
+
+        punch.lunch_start_at = self._at(self.day, 12)
+        punch.lunch_end_at = self._at(self.day, 12, 30)
+        punch.clock_out_at = self._at(self.day, 16)
+        punch.save()
+        sheet.refresh_from_db()
+        self.assertEqual((sheet.shifts, sheet.open_shifts, sheet.lunch_minutes), (1, 0, 30))
+        self.assertEqual(float(sheet.net_hours), 7.5)
+
+        earlier = self.day - timedelta(days=1)
+        punch.clock_in_at = self._at(earlier, 8)
+        punch.clock_out_at = self._at(earlier, 10)
+        punch.lunch_start_at = punch.lunch_end_at = None
+        punch.save()
+        self.assertEqual(list(WorkerDailyTimesheet.objects.values_list('work_date', 'net_hours')), [(earlier, 2)])
+
+        punch.delete()
+        self.assertFalse(WorkerDailyTimesheet.objects.exists())
+
+    def test_reports_read_the_prerolled_days(self):
+        WorkerTimePunch.objects.create(
+            worker_account=self.worker,
+            clock_in_at=self._at(self.day, 9),
+            clock_out_at=self._at(self.day, 13),
+        )
+        # Reports read the table, not the punches: a corrected row shows up as is.
+        WorkerDailyTimesheet.objects.filter(worker_account=self.worker).update(net_hours=3.75)
+        staff = get_user_model().objects.create_superuser('sheetadmin', 'sheetadmin@example.com', 'pw-12345')
+        http = DjangoTestClient()
+        http.force_login(staff)
+
+        daily = http.get(reverse('pitstop-hours-report-csv') + '?group=day').getvalue().decode('utf-8')
+        self.assertIn(f'Sheet Worker,{self.day.isoformat()},1,,4.00,,3.75,Yes,{self.worker.pk}', daily)
+        printable = http.get(reverse('pitstop-hours-printable')).content.decode('utf-8')
+        self.assertIn('Daily detail', printable)
+        self.assertIn('3.75', printable)
+
+        self.assertEqual(call_command('rebuild_worker_timesheets', stdout=StringIO()), None)
+        self.assertEqual(float(WorkerDailyTimesheet.objects.get().net_hours), 4.0)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, JOB_QUEUE_EAGER=True)
+class MapSnapshotCacheTests(StaticMapStandInMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        client_record = Client.objects.create(
+            first_name='Map',
+            last_name='Worker',
+            phone='4155559090',
+            email='map@example.com',
+            gender='M',
+            training_interest='pit_stop',
+            status='active',
+        )
+        self.worker = WorkerAccount(client=client_record, phone='4155559090')
+        self.worker.set_pin('9090')
+        self.worker.save()
+
+    def _punch_at(self, latitude, longitude):
+        punch = WorkerTimePunch.objects.create(worker_account=self.worker, clock_in_at=timezone.now())
+        store_punch_map_snapshot(punch.pk, 'clock_in', latitude, longitude)
+        punch.refresh_from_db()
+        return punch
+
+    def test_coordinates_snap_to_the_grid_cell_centre(self):
+        self.assertEqual(map_grid_cell(37.77491, -122.41944), ('37.775000', '-122.419500'))
+        self.assertEqual(map_grid_cell('37.77474', '-122.41920'), ('37.774500', '-122.419000'))
+        self.assertIsNone(map_grid_cell('north', 0))
+
+    def test_one_download_and_one_file_per_cell(self):
+        first = self._punch_at(37.77491, -122.41944)
+        second = self._punch_at(37.77502, -122.41961)
+        elsewhere = self._punch_at(37.76000, -122.41000)
+
+        self.assertEqual(first.clock_in_map_image.name, second.clock_in_map_image.name)
+        self.assertEqual(elsewhere.clock_in_map_image.name, first.clock_in_map_image.name)
+        self.assertEqual(len(self.map_server.requests), 2)
+        self.assertEqual(self.map_server.requests[0]['center'], ['37.775,-122.4195'])
+        self.assertEqual(MapSnapshotAsset.objects.count(), 2)
+        with first.clock_in_map_image.open('rb') as image:
+            self.assertEqual(image.read(), _StaticMapStandIn.PNG)
+
+
+class ClassSessionSchedulerTests(TestCase):
+    def setUp(self):
+        self.today = date(2026, 10, 1)
+        self.weekly = ClassTemplate.objects.create(
+            name='Orientation',
+            start_time=time(9, 0),
+            end_time=time(10, 0),
+            recurrence='weekly',
+            recurrence_weekday=1,
+        )
+        self.monthly = ClassTemplate.objects.create(
+            name='Resume Workshop',
+            start_time=time(13, 0),
+            end_time=time(15, 0),
+            recurrence='monthly',
+            recurrence_weekday=3,
+            recurrence_week_of_month=2,
+        )
+        ClassTemplate.objects.create(
+            name='Retired Class',
+            start_time=time(9, 0),
+            end_time=time(10, 0),
+            recurrence='weekly',
+            recurrence_weekday=4,
+            is_active=False,
+        )
+        # Already on the calendar, at a time staff moved by hand.
+        ClassSession.objects.create(
+            template=self.weekly,
+            session_date=date(2026, 10, 6),
+            start_time=time(10, 0),
+            end_time=time(11, 0),
+        )
+
+    def test_year_of_sessions_for_every_class_in_three_queries(self):
+        with self.assertNumQueries(3):
+            created = generate_sessions(horizon_days=365, today=self.today)
+
+        self.assertEqual(len(created), 52 + 12 - 1)
+        weekly_dates = list(
+            self.weekly.sessions.order_by('session_date').values_list('session_date', flat=True)
+        )
+        self.assertEqual(len(weekly_dates), 52)
+        self.assertTrue(all(day.weekday() == 1 for day in weekly_dates))
+        monthly_dates = list(
+            self.monthly.sessions.order_by('session_date').values_list('session_date', flat=True)
+        )
+        self.assertEqual(monthly_dates[:2], [date(2026, 10, 8), date(2026, 11, 12)])
+        self.assertEqual(len(monthly_dates), 12)
+        self.assertEqual(ClassSession.objects.filter(template__is_active=False).count(), 0)
+
+        self.assertEqual(generate_sessions(horizon_days=365, today=self.today), [])
+        self.assertEqual(self.monthly.upcoming_dates(horizon_days=45, today=self.today), monthly_dates[:2])
+
+    def test_command_reports_created_sessions(self):
+        out = StringIO()
+        call_command('generate_class_sessions', '--horizon-days', '30', '--today', '2026-10-01', stdout=out)
+
+        self.assertIn('Created 4 class session(s) across 2 class(es).', out.getvalue())
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ClassSession.objects.create(
+                template=self.monthly,
+                session_date=date(2026, 10, 8),
+                start_time=time(13, 0),
+                end_time=time(15, 0),
+            )
+
+
+class FakeSmsTransport:
+    """Stands in for the Azure SmsClient: records every recipient, takes `latency` per call."""
+
+    def __init__(self, latency=0.0, fail_numbers=()):
+        self.latency = latency
+        self.fail_numbers = set(fail_numbers)
+        self.recipients = []
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def send(self, from_, to, message, enable_delivery_report=False):
+        sleep(self.latency)
+        results = []
+        with self._lock:
+            self.calls.append((list(to), message))
+            for number in to:
+                self.recipients.append(number)
+                failed = number in self.fail_numbers
+                results.append(SimpleNamespace(
+                    to=number,
+                    successful=not failed,
+                    message_id='' if failed else f'msg-{len(self.recipients)}',
+                    http_status_code=400 if failed else 202,
+                    error_message='Carrier rejected' if failed else None,
+                ))
+        return results
+
+
+@override_settings(
+    SMS_FOLLOWUP_ENABLED=True,
+    SMS_FOLLOWUP_CHECKPOINT_DAYS=[30],
+    SMS_FOLLOWUP_WINDOW_DAYS=1,
+    AZURE_COMMUNICATION_SMS_FROM='+18005550100',
+    SMS_DISPATCH_MAX_WORKERS=16,
+    SMS_DISPATCH_RATE_PER_SECOND=0,
+)
+class ProgressFollowupDispatchTests(TestCase):
+    def _create_clients(self, count, today):
+        Client.objects.bulk_create(
+            Client(
+                first_name=f'Client{n}',
+                last_name='Due',
+                phone=f'415{n:07d}',
+                gender='F',
+                training_interest='pit_stop',
+                status='active',
+            )
+            for n in range(count)
+        )
+        intake = timezone.make_aware(datetime.combine(today - timedelta(days=30), time(12, 0)))
+        Client.objects.update(created_at=intake)
+
+    def test_five_thousand_followups_send_concurrently_and_once(self):
+        today = date(2026, 9, 1)
+        self._create_clients(5000, today)
+        transport = FakeSmsTransport(latency=0.002, fail_numbers={'+14150000007'})
+
+        started = monotonic()
+        with patch('clients.notifications._sms_client', return_value=transport) as sms_client_mock:
+            result = send_due_progress_followups(today=today)
+        elapsed = monotonic() - started
+
+        sms_client_mock.assert_called_once()
+        self.assertLess(elapsed, 120)
+        self.assertEqual((result['sent'], result['failed'], result['skipped']), (4999, 1, 0))
+        self.assertEqual(len(transport.recipients), 5000)
+        self.assertEqual(len(set(transport.recipients)), 5000)
+        self.assertEqual(ClientTextMessage.objects.filter(status=ClientTextMessage.STATUS_SENT).count(), 4999)
+        failed = ClientTextMessage.objects.get(status=ClientTextMessage.STATUS_FAILED)
+        self.assertEqual(failed.error_message, 'Carrier rejected')
+
+        # A second run only retries the failure.
+        transport.fail_numbers.clear()
+        with patch('clients.notifications._sms_client', return_value=transport):
+            with self.assertNumQueries(7):
+                result = send_due_progress_followups(today=today)
+        self.assertEqual((result['sent'], result['failed'], result['total_due']), (1, 0, 1))
+        self.assertEqual(len(transport.recipients), 5001)
+        self.assertEqual(transport.recipients[-1], '+14150000007')
+
+    def test_unexpected_dispatch_error_marks_rows_failed(self):
+        today = date(2026, 9, 1)
+        self._create_clients(3, today)
+
+        with patch('clients.notifications._sms_client', side_effect=ValueError('bad connection string')):
+            with self.assertLogs('clients', level='ERROR'):
+                result = send_due_progress_followups(today=today)
+        self.assertEqual((result['sent'], result['failed']), (0, 3))
+        self.assertFalse(ClientTextMessage.objects.filter(status=ClientTextMessage.STATUS_PENDING).exists())
+
+        # Nothing was left pending, so the next run retries all three.
+        transport = FakeSmsTransport()
+        with patch('clients.notifications._sms_client', return_value=transport):
+            result = send_due_progress_followups(today=today)
+        self.assertEqual(result['sent'], 3)
+
+    def test_key_inserted_by_a_concurrent_run_is_skipped(self):
+        today = date(2026, 9, 1)
+        self._create_clients(2, today)
+        first, second = Client.objects.order_by('pk')
+        # Another run logged this key after our lookup.
+        ClientTextMessage.objects.create(client=first, body='Hi', dedupe_key='race:1')
+
+        ready, failed, skipped = prepare_text_messages(
+            [
+                ClientTextMessage(client=first, body='Hi', dedupe_key='race:1'),
+                ClientTextMessage(client=second, body='Hi', dedupe_key='race:2'),
+            ],
+            existing={},
+        )
+        self.assertEqual(([log.dedupe_key for log in ready], failed, skipped), (['race:2'], [], 1))
+        self.assertIsNotNone(ready[0].pk)
+        self.assertEqual(ClientTextMessage.objects.filter(dedupe_key__startswith='race:').count(), 2)
+
+    def test_rate_limiter_spaces_sends(self):
+        now = [0.0]
+        sleeps = []
+
+        def fake_sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        limiter = RateLimiter(4, clock=lambda: now[0], sleep=fake_sleep)
+        for _ in range(5):
+            limiter.wait()
+        self.assertEqual(sleeps, [0.25, 0.25, 0.25, 0.25])
+
+
+@override_settings(CASE_NOTE_ALERT_EMAIL='followups@example.com')
+class FollowupAlertDigestTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        User.objects.create_user(username='jsmith', password='pw12345678', email='jsmith@example.com')
+        User.objects.create_user(
+            username='mlopez', password='pw12345678', email='maria@example.com', first_name='Maria', last_name='Lopez'
+        )
+        self.client_record = Client.objects.create(
+            first_name='Digest', last_name='Client', phone='4155553030', email='digest@example.com', gender='F'
+        )
+        today = date.today()
+        for staff_member, days_overdue in [
+            ('JSmith', 5), ('jsmith', 45), ('jsmith', -1), ('Maria Lopez', 95), ('Maria A. Lopez', 2), ('Ghost Writer', 1),
+        ]:
+            CaseNote.objects.create(
+                client=self.client_record,
+                staff_member=staff_member,
+                note_type='follow_up',
+                content='Call back',
+                follow_up_date=today - timedelta(days=days_overdue),
+            )
+
+    def test_one_digest_per_recipient_in_constant_queries(self):
+        with self.assertNumQueries(2):
+            result = check_and_send_followup_alerts(days_before=1)
+
+        self.assertEqual(result['total_notes'], 6)
+        self.assertEqual(result['emails_sent'], 3)
+        self.assertEqual(result['errors'], 0)
+        self.assertEqual(result['bucket_counts']['overdue_30_plus'], 1)
+        self.assertEqual(result['bucket_counts']['overdue_90_plus'], 1)
+        self.assertEqual(result['bucket_counts']['current'], 1)
+        by_recipient = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(set(by_recipient), {'jsmith@example.com', 'maria@example.com', 'followups@example.com'})
+
+        digest = by_recipient['jsmith@example.com']
+        self.assertEqual(digest.subject, 'Follow-up digest: 3 case notes (2 overdue)')
+        body = digest.body
+        self.assertLess(body.index('30-59 DAYS OVERDUE'), body.index('OVERDUE (UNDER 30 DAYS)'))
+        self.assertLess(body.index('OVERDUE (UNDER 30 DAYS)'), body.index('DUE SOON'))
+        self.assertIn('45 days overdue', body)
+        self.assertEqual(by_recipient['maria@example.com'].body.count('Digest Client'), 2)
+
+
+class RecordingEmailBackend(BaseEmailBackend):
+    """Counts connection handshakes; addresses in `flaky` drop the connection once, `refused` are rejected."""
+
+    opened = 0
+    delivered = []
+    flaky = set()
+    refused = set()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.is_open = False
+
+    def open(self):
+        if self.is_open:
+            return False
+        RecordingEmailBackend.opened += 1
+        self.is_open = True
+        return True
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            recipient = message.to[0]
+            if recipient in self.refused:
+                raise smtplib.SMTPRecipientsRefused({recipient: (550, b'No such user')})
+            if recipient in self.flaky:
+                self.flaky.discard(recipient)
+                self.is_open = False
+                raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+            self.delivered.append(recipient)
+        return len(email_messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='clients.tests.RecordingEmailBackend',
+    EMAIL_RETRY_BACKOFF_SECONDS=0,
+)
+class PooledNotificationMailTests(TestCase):
+    def setUp(self):
+        RecordingEmailBackend.opened = 0
+        RecordingEmailBackend.delivered = []
+        RecordingEmailBackend.flaky = set()
+        RecordingEmailBackend.refused = set()
+
+    def test_batch_shares_one_connection_and_retries_transient_failures(self):
+        RecordingEmailBackend.flaky = {'b@example.com'}
+        RecordingEmailBackend.refused = {'gone@example.com'}
+        recipients = ['a@example.com', 'b@example.com', 'gone@example.com', 'c@example.com']
+
+        outcomes = send_emails(build_email('Hello', 'Body', '<p>Body</p>', to) for to in recipients)
+
+        self.assertEqual(outcomes[:2], [None, None])
+        self.assertIsInstance(outcomes[2], smtplib.SMTPRecipientsRefused)
+        self.assertIsNone(outcomes[3])
+        self.assertEqual(RecordingEmailBackend.delivered, ['a@example.com', 'b@example.com', 'c@example.com'])
+        # One handshake, plus one reconnect after the dropped connection.
+        self.assertEqual(RecordingEmailBackend.opened, 2)
+
+    @override_settings(
+        AZURE_COMMUNICATION_CONNECTION_STRING='endpoint=https://example.test/;accesskey=fake',
+        AZURE_COMMUNICATION_SMS_FROM='+15555550123',
+        SMS_FORCE_EMAIL_BACKUP=True,
+        SMS_FOLLOWUP_ENABLED=True,
+        SMS_DISPATCH_RATE_PER_SECOND=0,
+    )
+    def test_bulk_admin_email_backups_use_one_handshake(self):
+        Client.objects.bulk_create(
+            Client(first_name=f'Mail{n}', last_name='Backup', phone=f'707{n:07d}', email=f'c{n}@example.com', gender='F')
+            for n in range(25)
+        )
+        client_admin = ClientAdmin(Client, AdminSite())
+        request = type('Req', (), {'user': None})()
+        with patch.object(client_admin, 'message_user') as message_user, \
+                patch('clients.notifications._sms_client', return_value=FakeSmsTransport()):
+            client_admin.text_missing_documents(request, Client.objects.filter(last_name='Backup'))
+
+        self.assertEqual(len(RecordingEmailBackend.delivered), 25)
+        self.assertEqual(RecordingEmailBackend.opened, 1)
+        self.assertIn('Email backup sent: 25.', message_user.call_args.args[1])
+
+    def test_welcome_emails_skip_workers_without_an_email(self):
+        accounts = []
+        for n, email in enumerate(['welcome@example.com', '']):
+            client_record = Client.objects.create(
+                first_name=f'Welcome{n}', last_name='Worker', phone=f'415555810{n}', email=email, gender='M',
+            )
+            accounts.append(WorkerAccount.objects.create(client=client_record, phone=f'415555810{n}', is_active=False))
+        worker_admin = WorkerAccountAdmin(WorkerAccount, AdminSite())
+        request = type('Req', (), {'user': None})()
+
+        with self.assertLogs('clients', 'WARNING'):
+            self.assertFalse(send_worker_welcome_email(accounts[1]))
+            with patch.object(worker_admin, 'message_user') as message_user:
+                worker_admin.enable_portal_welcome(request, WorkerAccount.objects.filter(pk__in=[a.pk for a in accounts]))
+
+        self.assertEqual(WorkerAccount.objects.filter(pk__in=[a.pk for a in accounts], is_active=True).count(), 2)
+        self.assertEqual(RecordingEmailBackend.delivered, ['welcome@example.com'])
+        self.assertIn('1 welcome email(s) sent.', message_user.call_args.args[1])
+
 @override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
 class PublicClientRegistrationTests(TestCase):
     @classmethod
@@ -1868,6 +3487,111 @@ class SSNEncryptionBackfillTests(TestCase):
             self.assertTrue(cursor.fetchone()[0].startswith('enc:v1:'))
 
 
+@override_settings(
+    SSN_ACTIVE_KEY_ID='v1',
+    SSN_ENCRYPTION_KEYS={'v1': TEST_SSN_KEY},
+)
+class SSNKeyringAndLazyDecryptTests(TestCase):
+    def test_keyring_is_reused_until_keys_setting_changes(self):
+        from clients.encrypted_fields import _configured_fernet_keys
+        keyring = _configured_fernet_keys()
+        self.assertIs(_configured_fernet_keys(), keyring)
+        rotated_key = 'MTExMTExMTExMTExMTExMTExMTExMTExMTExMTExMTE='
+        with self.settings(SSN_ENCRYPTION_KEYS={'v1': TEST_SSN_KEY, 'v2': rotated_key}):
+            rotated = _configured_fernet_keys()
+            self.assertIsNot(rotated, keyring)
+            self.assertEqual(set(rotated), {'v1', 'v2'})
+        self.assertIs(_configured_fernet_keys(), keyring)
+
+    def test_ssn_is_decrypted_only_when_read(self):
+        Client.objects.create(
+            first_name='Lazy',
+            last_name='Client',
+            phone='4155550102',
+            gender='P',
+            ssn='123-45-6789',
+        )
+        with patch('clients.encrypted_fields.decrypt_sensitive_value') as decrypt:
+            client = Client.objects.get(last_name='Client', first_name='Lazy')
+            self.assertEqual(client.full_name, 'Lazy Client')
+            decrypt.assert_not_called()
+        self.assertEqual(client.ssn, '123-45-6789')
+
+        client.first_name = 'Still'
+        client.save()
+        client = Client.objects.get(pk=client.pk)
+        self.assertEqual(client.ssn, '123-45-6789')
+        self.assertEqual(client.ssn_last4, '6789')
+
+
+ROTATED_SSN_KEY = 'MTExMTExMTExMTExMTExMTExMTExMTExMTExMTExMTE='
+
+
+@override_settings(
+    SSN_ACTIVE_KEY_ID='v1',
+    SSN_ENCRYPTION_KEYS={'v1': TEST_SSN_KEY, 'v2': ROTATED_SSN_KEY},
+)
+class SSNKeyRotationTests(TestCase):
+    def setUp(self):
+        self.checkpoint_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.checkpoint_dir, ignore_errors=True)
+        self.checkpoint = f'{self.checkpoint_dir}/rotation.json'
+        self.clients = [
+            Client.objects.create(
+                first_name='Rotate',
+                last_name=f'Client{index}',
+                phone=f'41555504{index:02d}',
+                gender='P',
+                ssn=f'123-45-67{index:02d}',
+            )
+            for index in range(5)
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE clients_client SET ssn = %s, ssn_last4 = %s, ssn_key_id = %s WHERE id = %s',
+                ['987-65-4321', '', '', self.clients[0].pk],
+            )
+
+    def _stored(self, client):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT ssn, ssn_key_id, ssn_last4 FROM clients_client WHERE id = %s', [client.pk])
+            return cursor.fetchone()
+
+    def test_rotation_reencrypts_in_batches_and_resumes_from_checkpoint(self):
+        from clients.ssn_rotation import plan_id_ranges, save_checkpoint
+        # An interrupted earlier run finished the first id range only.
+        low, high = self.clients[0].pk, self.clients[-1].pk
+        save_checkpoint(self.checkpoint, 'v2', {plan_id_ranges(low, high, 2)[0]})
+        out = StringIO()
+        call_command(
+            'rotate_ssn_encryption', '--key', 'v2', '--chunk-size', '2', '--batch-size', '2',
+            '--checkpoint', self.checkpoint, stdout=out,
+        )
+        self.assertIn('Resuming: 1 of 3 id ranges already done.', out.getvalue())
+        self.assertIn('Rotated 3 of 3', out.getvalue())
+        self.assertIn('2 remaining', out.getvalue())
+
+        # A finished run leaves no checkpoint, so the next one covers every range again.
+        self.assertFalse(os.path.exists(self.checkpoint))
+        out = StringIO()
+        call_command(
+            'rotate_ssn_encryption', '--key', 'v2', '--chunk-size', '2', '--batch-size', '2',
+            '--checkpoint', self.checkpoint, stdout=out,
+        )
+        self.assertNotIn('Resuming', out.getvalue())
+        self.assertIn('Rotated 2 of 2', out.getvalue())
+        self.assertIn('0 remaining', out.getvalue())
+        self.assertFalse(os.path.exists(self.checkpoint))
+        for index, client in enumerate(self.clients):
+            stored_ssn, key_id, last4 = self._stored(client)
+            self.assertTrue(stored_ssn.startswith('enc:v2:'))
+            self.assertEqual(key_id, 'v2')
+            expected = '987-65-4321' if index == 0 else f'123-45-67{index:02d}'
+            self.assertEqual(Client.objects.get(pk=client.pk).ssn, expected)
+            self.assertEqual(last4, expected[-4:])
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
 class PitStopApplicationReviewTests(TestCase):
     """The review pipeline that replaced the paper application stack."""
 
@@ -1,27 +1,62 @@
 from rest_framework.throttling import AnonRateThrottle
 
 
-class PublicClientCreateThrottle(AnonRateThrottle):
+class SharedAnonRateThrottle(AnonRateThrottle):
+    """
+    AnonRateThrottle counted with atomic add()/incr() in the shared cache.
+
+    DRF's default keeps a request-history list per key and rewrites it with
+    get()/set(), so gunicorn workers hitting the same key overwrite each
+    other's history. A fixed-window counter is atomic on Redis and on the
+    SQLite fallback, so the limit holds across every worker on the box (a
+    client can burst up to twice the rate across a window boundary).
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.window_ends_at = (window + 1) * self.duration
+        counter_key = f'{self.key}:{window}'
+        self.cache.add(counter_key, 0, self.duration)
+        try:
+            count = self.cache.incr(counter_key)
+        except ValueError:
+            # The window expired between add() and incr().
+            self.cache.add(counter_key, 1, self.duration)
+            count = 1
+        return count <= self.num_requests
+
+    def wait(self):
+        return max(0.0, self.window_ends_at - self.timer())
+
+
+class PublicClientCreateThrottle(SharedAnonRateThrottle):
     scope = 'public_client_create'
 
 
-class KioskLookupThrottle(AnonRateThrottle):
+class KioskLookupThrottle(SharedAnonRateThrottle):
     scope = 'kiosk_lookup'
 
 
-class KioskSubmitThrottle(AnonRateThrottle):
+class KioskSubmitThrottle(SharedAnonRateThrottle):
     scope = 'kiosk_submit'
 
 
-class KioskUploadThrottle(AnonRateThrottle):
+class KioskUploadThrottle(SharedAnonRateThrottle):
     scope = 'kiosk_upload'
 
 
-class UploadInviteThrottle(AnonRateThrottle):
+class UploadInviteThrottle(SharedAnonRateThrottle):
     scope = 'upload_invite'
 
 
-class WorkerPunchThrottle(AnonRateThrottle):
+class WorkerPunchThrottle(SharedAnonRateThrottle):
     """
     Per-iPad rate limit on worker clock in/out POSTs.
 
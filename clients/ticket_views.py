@@ -9,6 +9,7 @@ from rest_framework.response import Response
 
 from .dashboard_views import _compress_image_if_needed, _staff_guard
 from .models_extensions import StaffTicket, StaffTicketAttachment
+from .pagination import InvalidCursor, keyset_page, page_params
 from .staff_auth import StaffSessionAuthentication
 from .staff_utils import staff_display_name
 from .storage import generate_document_sas_url
@@ -20,6 +21,7 @@ VALID_TAGS = {value for value, _ in StaffTicket.TAG_CHOICES}
 VALID_PRIORITIES = {value for value, _ in StaffTicket.PRIORITY_CHOICES}
 VALID_STATUSES = {value for value, _ in StaffTicket.STATUS_CHOICES}
 VALID_RESOLUTIONS = {value for value, _ in StaffTicket.RESOLUTION_CHOICES}
+TICKET_LIST_ORDERING = ('-updated_at', '-id')
 
 
 def _user_label(user):
@@ -223,10 +225,14 @@ def staff_tickets(request):
                 return Response({'status': ['Invalid status filter.']}, status=status.HTTP_400_BAD_REQUEST)
             qs = qs.filter(status=status_filter)
 
-        limit = min(int(request.GET.get('limit') or 40), 100)
-        tickets = list(qs.order_by('-updated_at')[:limit])
+        cursor, limit = page_params(request, 40, 100)
+        try:
+            tickets, next_cursor = keyset_page(qs, TICKET_LIST_ORDERING, cursor, limit)
+        except InvalidCursor:
+            return Response({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
         return Response({
             'results': [_ticket_payload(t) for t in tickets],
+            'next_cursor': next_cursor,
             'meta': {
                 'statuses': [{'value': v, 'label': l} for v, l in StaffTicket.STATUS_CHOICES],
                 'resolutions': [{'value': v, 'label': l} for v, l in StaffTicket.RESOLUTION_CHOICES],
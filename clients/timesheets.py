@@ -0,0 +1,126 @@
+"""
+Per-worker, per-day timesheets for PitStop payroll.
+
+WorkerDailyTimesheet holds a worker's gross, lunch and net hours and shift
+counts for one local day, keyed by the day the punch clocked in (the day the
+hours reports file it under). Writing a punch re-aggregates just that
+worker's punches for the affected day; an edit that moves a punch to another
+day or worker refreshes the old day too. The offline punch sync writes with
+bulk_create/bulk_update, which skip signals, and calls refresh_timesheets
+itself. The hours CSV, printable and package then read pre-rolled days, so a
+quarter-long export is an indexed range scan instead of re-deriving hours
+from every punch.
+
+`manage.py rebuild_worker_timesheets` recomputes a date range from the
+punches (e.g. after an import or a raw SQL fix).
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Client
+from .models_extensions import WorkerAccount, WorkerDailyTimesheet, WorkerTimePunch
+from .time_display import display_tz
+from .worker_hours import hours_by_worker_day
+
+TIMESHEET_FIELDS = ('shifts', 'open_shifts', 'gross_hours', 'lunch_minutes', 'net_hours')
+
+
+def local_work_date(value):
+    return value.astimezone(display_tz()).date()
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min), display_tz())
+
+
+def _timesheet(row):
+    return WorkerDailyTimesheet(
+        worker_account_id=row['worker_account_id'],
+        work_date=row['work_date'],
+        **{field: row[field] for field in TIMESHEET_FIELDS},
+    )
+
+
+def refresh_timesheets(worker_account_id, days):
+    """Recompute one worker's rows for `days` (local dates) with one grouped query and one upsert."""
+    days = {day for day in days if day}
+    if not worker_account_id or not days:
+        return
+    punches = WorkerTimePunch.objects.filter(
+        worker_account_id=worker_account_id,
+        clock_in_at__gte=_day_start(min(days)),
+        clock_in_at__lt=_day_start(max(days) + timedelta(days=1)),
+    )
+    rows = [row for row in hours_by_worker_day(punches) if row['work_date'] in days]
+    with transaction.atomic():
+        if rows:
+            WorkerDailyTimesheet.objects.bulk_create(
+                [_timesheet(row) for row in rows],
+                update_conflicts=True,
+                unique_fields=['worker_account', 'work_date'],
+                update_fields=[*TIMESHEET_FIELDS, 'updated_at'],
+            )
+        empty_days = days - {row['work_date'] for row in rows}
+        if empty_days:
+            WorkerDailyTimesheet.objects.filter(
+                worker_account_id=worker_account_id,
+                work_date__in=empty_days,
+            ).delete()
+
+
+def rebuild_timesheets(start_date=None, end_date=None):
+    """Recompute every row in [start_date, end_date] (local dates, both optional) from the punches."""
+    punches = WorkerTimePunch.objects.all()
+    timesheets = WorkerDailyTimesheet.objects.all()
+    if start_date:
+        punches = punches.filter(clock_in_at__gte=_day_start(start_date))
+        timesheets = timesheets.filter(work_date__gte=start_date)
+    if end_date:
+        punches = punches.filter(clock_in_at__lt=_day_start(end_date + timedelta(days=1)))
+        timesheets = timesheets.filter(work_date__lte=end_date)
+    rows = [_timesheet(row) for row in hours_by_worker_day(punches)]
+    with transaction.atomic():
+        timesheets.delete()
+        WorkerDailyTimesheet.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def _punch_day(worker_account_id, clock_in_at):
+    return (worker_account_id, local_work_date(clock_in_at)) if worker_account_id and clock_in_at else None
+
+
+def _owner_is_being_deleted(origin):
+    """Deleting the worker (or their client) cascades to the timesheets as well."""
+    owners = (WorkerAccount, Client)
+    if isinstance(origin, owners):
+        return True
+    return isinstance(origin, QuerySet) and issubclass(origin.model, owners)
+
+
+@receiver(post_init, sender=WorkerTimePunch, dispatch_uid='timesheets_punch_loaded')
+def _punch_loaded(sender, instance, **kwargs):
+    # Remember where the punch was filed so an edit that moves it refreshes both days.
+    instance._timesheet_day = _punch_day(instance.worker_account_id, instance.clock_in_at)
+
+
+@receiver(post_save, sender=WorkerTimePunch, dispatch_uid='timesheets_punch_saved')
+def _punch_saved(sender, instance, **kwargs):
+    current = _punch_day(instance.worker_account_id, instance.clock_in_at)
+    for worker_day in {instance._timesheet_day, current} - {None}:
+        worker_account_id, day = worker_day
+        refresh_timesheets(worker_account_id, {day})
+    instance._timesheet_day = current
+
+
+@receiver(post_delete, sender=WorkerTimePunch, dispatch_uid='timesheets_punch_deleted')
+def _punch_deleted(sender, instance, origin=None, **kwargs):
+    if _owner_is_being_deleted(origin):
+        return
+    worker_day = _punch_day(instance.worker_account_id, instance.clock_in_at)
+    if worker_day:
+        refresh_timesheets(worker_day[0], {worker_day[1]})
@@ -30,6 +30,7 @@ from .worker_views import (
     worker_profile_update,
     worker_work_sites,
     worker_time_punch,
+    worker_time_punch_sync,
     worker_incident_report,
     worker_daily_feedback,
     worker_dashboard_summary,
@@ -132,6 +133,7 @@ urlpatterns = [
     path('worker/profile/update/', worker_profile_update, name='worker-profile-update'),
     path('worker/work-sites/', worker_work_sites, name='worker-work-sites'),
     path('worker/time-punch/', worker_time_punch, name='worker-time-punch'),
+    path('worker/time-punch/sync/', worker_time_punch_sync, name='worker-time-punch-sync'),
     path('worker/incident-report/', worker_incident_report, name='worker-incident-report'),
     path('worker/daily-feedback/', worker_daily_feedback, name='worker-daily-feedback'),
     path('worker/dashboard-summary/', worker_dashboard_summary, name='worker-dashboard-summary'),
@@ -3,13 +3,15 @@ import io
 from datetime import datetime
 from pathlib import Path
 
-from django.http import HttpResponse, JsonResponse, Http404
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, Http404
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
 from django.template.loader import render_to_string
 from django.utils.decorators import method_decorator
 from django.views import View
+from django.db.models import F
+from django.db.models.functions import Coalesce
 
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
@@ -27,6 +29,8 @@ from .serializers import (
     PitStopApplicationSerializer,
 )
 from .throttles import PublicClientCreateThrottle
+from .csv_streaming import iter_queryset, streaming_csv_response
+from .dashboard_stats import dashboard_snapshot, etag_matches, stats_etag
 from .storage import generate_document_sas_url
 import logging
 
@@ -63,7 +67,7 @@ class ClientViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing clients with full CRUD operations
     """
-    queryset = Client.objects.all()
+    queryset = Client.objects.select_related('rollup')
     serializer_class = ClientSerializer
     permission_classes = [IsAuthenticated]
     authentication_classes = [SessionAuthentication, BasicAuthentication]
@@ -221,23 +225,19 @@ class ClientViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def export_csv(self, request):
         """Export all clients to CSV format"""
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="clients_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-        
-        writer = csv.writer(response)
-        
-        # CSV Headers
-        writer.writerow([
+        clients = self.get_queryset().annotate(
+            case_notes_total=Coalesce(F('rollup__case_notes_count'), 0),
+            documents_total=Coalesce(F('rollup__documents_count'), 0),
+        )
+        header = [
             'ID', 'First Name', 'Last Name', 'Date of Birth', 'Phone', 'Gender',
             'SF Resident', 'Neighborhood', 'Demographic Info', 'Language',
             'Education Level', 'Employment Status', 'Training Interest',
             'Referral Source', 'Status', 'Staff Name', 'Has Resume',
             'Case Notes Count', 'Documents Count', 'Created At', 'Updated At'
-        ])
-        
-        # Client data rows
-        for client in self.get_queryset():
-            writer.writerow([
+        ]
+        rows = (
+            [
                 client.id,
                 client.first_name,
                 client.last_name,
@@ -259,13 +259,18 @@ class ClientViewSet(viewsets.ModelViewSet):
                 client.get_status_display(),
                 client.staff_name or '',
                 'Yes' if client.has_resume else 'No',
-                client.case_notes_count,
-                client.documents_count,
+                client.case_notes_total,
+                client.documents_total,
                 client.created_at.strftime('%Y-%m-%d %H:%M:%S'),
                 client.updated_at.strftime('%Y-%m-%d %H:%M:%S')
-            ])
-        
-        return response
+            ]
+            for client in iter_queryset(clients)
+        )
+        return streaming_csv_response(
+            f'clients_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
+            header,
+            rows,
+        )
     
     @action(detail=True, methods=['get'])
     def summary_pdf(self, request, pk=None):
@@ -404,23 +409,31 @@ class ResumeDownloadView(View):
             )
 
 
+CLIENT_DASHBOARD_STAT_KEYS = (
+    'total_clients',
+    'active_clients',
+    'pending_clients',
+    'completed_clients',
+    'total_case_notes',
+    'total_documents',
+    'clients_with_resume',
+)
+
+
 @require_http_methods(["GET"])
 @login_required
 def client_dashboard_stats(request):
     """
-    API endpoint for dashboard statistics
+    API endpoint for dashboard statistics (materialized; see clients.dashboard_stats)
     """
-    stats = {
-        'total_clients': Client.objects.count(),
-        'active_clients': Client.objects.filter(status='active').count(),
-        'pending_clients': Client.objects.filter(status='pending').count(),
-        'completed_clients': Client.objects.filter(status='completed').count(),
-        'total_case_notes': CaseNote.objects.count(),
-        'total_documents': Document.objects.count(),
-        'clients_with_resume': Client.objects.exclude(resume='').count(),
-    }
-    
-    return JsonResponse(stats)
+    etag = stats_etag()
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        snapshot, etag = dashboard_snapshot()
+        response = JsonResponse({key: snapshot[key] for key in CLIENT_DASHBOARD_STAT_KEYS})
+    response['ETag'] = etag
+    return response
 
     def overdue_followups(self, request):
         """Get case notes with overdue follow-ups"""
@@ -458,8 +471,8 @@ class PitStopApplicationViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         app = serializer.save()
         try:
-            from .notifications import send_pitstop_application_alert
-            send_pitstop_application_alert(app)
+            from .notifications import queue_pitstop_application_alert
+            queue_pitstop_application_alert(app)
         except Exception:
             pass
 
@@ -0,0 +1,134 @@
+"""
+Worker hours engine.
+
+Gross, lunch and net (paid) time for punches is summed in SQL: each window
+("today", "last 7 days", "this week", all time...) becomes a set of
+conditional aggregates over the same rows, so any number of windows costs one
+query, for one worker or grouped by worker for a whole changelist page or pay
+period. Net is computed per punch in SQL (worked time minus a completed
+lunch, floored at zero) rather than by subtracting two sums in Python, so a
+negative or lunch-only punch cannot drag a total down.
+
+A window is (start, end) on clock_in_at, half-open; None leaves that side
+unbounded. Hours and shift counts cover completed punches; `open_shifts`
+counts the window's punches still clocked in.
+"""
+from datetime import timedelta
+
+from django.db.models import Case, Count, DurationField, ExpressionWrapper, F, Q, Sum, Value, When
+from django.db.models.functions import Greatest, TruncDate
+
+from .models_extensions import WorkerTimePunch
+from .time_display import display_tz
+
+ALL_TIME = (None, None)
+
+_ZERO = Value(timedelta(0), output_field=DurationField())
+GROSS_DURATION = Greatest(
+    ExpressionWrapper(F('clock_out_at') - F('clock_in_at'), output_field=DurationField()),
+    _ZERO,
+    output_field=DurationField(),
+)
+LUNCH_DURATION = Case(
+    When(
+        lunch_start_at__isnull=False,
+        lunch_end_at__isnull=False,
+        then=Greatest(
+            ExpressionWrapper(F('lunch_end_at') - F('lunch_start_at'), output_field=DurationField()),
+            _ZERO,
+            output_field=DurationField(),
+        ),
+    ),
+    default=_ZERO,
+    output_field=DurationField(),
+)
+NET_DURATION = Greatest(
+    ExpressionWrapper(GROSS_DURATION - LUNCH_DURATION, output_field=DurationField()),
+    _ZERO,
+    output_field=DurationField(),
+)
+COMPLETED = Q(clock_out_at__isnull=False)
+
+
+def _window_q(window):
+    start, end = window
+    condition = Q()
+    if start is not None:
+        condition &= Q(clock_in_at__gte=start)
+    if end is not None:
+        condition &= Q(clock_in_at__lt=end)
+    return condition
+
+
+def _aggregates(windows):
+    aggregates = {}
+    for name, window in windows.items():
+        in_window = _window_q(window)
+        done = in_window & COMPLETED
+        aggregates[f'{name}__gross'] = Sum(GROSS_DURATION, filter=done)
+        aggregates[f'{name}__lunch'] = Sum(LUNCH_DURATION, filter=done)
+        aggregates[f'{name}__net'] = Sum(NET_DURATION, filter=done)
+        aggregates[f'{name}__shifts'] = Count('pk', filter=done)
+        aggregates[f'{name}__open'] = Count('pk', filter=in_window & ~COMPLETED)
+        aggregates[f'{name}__days'] = Count(
+            TruncDate('clock_in_at', tzinfo=display_tz()), filter=in_window, distinct=True
+        )
+    return aggregates
+
+
+def _hours(duration):
+    return round(duration.total_seconds() / 3600, 2) if duration else 0
+
+
+def _totals(row, name):
+    lunch = row[f'{name}__lunch']
+    return {
+        'gross_hours': _hours(row[f'{name}__gross']),
+        'lunch_minutes': int(lunch.total_seconds() // 60) if lunch else 0,
+        'net_hours': _hours(row[f'{name}__net']),
+        'shifts': row[f'{name}__shifts'],
+        'open_shifts': row[f'{name}__open'],
+        'days': row[f'{name}__days'],
+    }
+
+
+def empty_totals():
+    return {'gross_hours': 0, 'lunch_minutes': 0, 'net_hours': 0, 'shifts': 0, 'open_shifts': 0, 'days': 0}
+
+
+def hours_for_worker(worker_account, windows):
+    """{window name: totals} for one worker in one query. `windows` maps names to (start, end)."""
+    row = WorkerTimePunch.objects.filter(worker_account=worker_account).aggregate(**_aggregates(windows))
+    return {name: _totals(row, name) for name in windows}
+
+
+def hours_by_worker_day(queryset):
+    """
+    One row per (worker, local clock-in date) in `queryset`, in one grouped
+    query: {'worker_account_id', 'work_date', **totals}.
+    """
+    rows = (
+        queryset.annotate(work_date=TruncDate('clock_in_at', tzinfo=display_tz()))
+        .order_by()
+        .values('worker_account_id', 'work_date')
+        .annotate(**_aggregates({'day': ALL_TIME}))
+    )
+    for row in rows:
+        yield {'worker_account_id': row['worker_account_id'], 'work_date': row['work_date'], **_totals(row, 'day')}
+
+
+def hours_by_worker(windows, worker_account_ids=None, queryset=None):
+    """
+    {worker_account_id: {window name: totals}} in one grouped query, over
+    `queryset` (default: all punches) narrowed to `worker_account_ids` when
+    given. Requested workers without punches get empty totals.
+    """
+    punches = WorkerTimePunch.objects.all() if queryset is None else queryset
+    if worker_account_ids is not None:
+        worker_account_ids = list(worker_account_ids)
+        punches = punches.filter(worker_account_id__in=worker_account_ids)
+    rows = punches.order_by().values('worker_account_id').annotate(**_aggregates(windows))
+    results = {row['worker_account_id']: {name: _totals(row, name) for name in windows} for row in rows}
+    for account_id in worker_account_ids or ():
+        results.setdefault(account_id, {name: empty_totals() for name in windows})
+    return results
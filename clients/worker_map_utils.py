@@ -1,13 +1,32 @@
-"""Static map snapshots for worker clock in/out (no geofence validation)."""
+"""
+Static map snapshots for worker clock in/out (no geofence validation).
+
+Snapshots are a visual reference, not evidence, so coordinates are snapped to
+a grid cell (WORKER_MAP_GRID_DEGREES, about 50 m by default) and each cell is
+rendered once per zoom and size: the PNG is stored under the SHA-256 of its
+bytes and indexed by MapSnapshotAsset, and every later punch in that cell
+points its map field at the same file. Downloads run in the background job
+worker, never on the punch request.
+"""
+import hashlib
 import logging
+from decimal import ROUND_HALF_UP, Decimal
 from urllib.parse import urlencode
 from urllib.request import Request, urlopen
 
+from django.conf import settings
 from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
 
 logger = logging.getLogger(__name__)
 
 OSM_STATIC_MAP_URL = 'https://staticmap.openstreetmap.de/staticmap.php'
+DEFAULT_GRID_DEGREES = '0.0005'
+MAP_CELL_PREFIX = 'worker_maps/cells'
+
+
+def _static_map_url():
+    return getattr(settings, 'WORKER_STATIC_MAP_URL', OSM_STATIC_MAP_URL)
 
 
 def fetch_static_map_image(latitude, longitude, *, width=400, height=200, zoom=16):
@@ -24,7 +43,7 @@ def fetch_static_map_image(latitude, longitude, *, width=400, height=200, zoom=1
         'size': f'{width}x{height}',
         'markers': f'{lat},{lng}',
     })
-    url = f'{OSM_STATIC_MAP_URL}?{params}'
+    url = f'{_static_map_url()}?{params}'
     request = Request(url, headers={'User-Agent': 'mhhClient-worker-clock/1.0'})
     try:
         with urlopen(request, timeout=8) as response:
@@ -37,3 +56,58 @@ def fetch_static_map_image(latitude, longitude, *, width=400, height=200, zoom=1
     except Exception as exc:
         logger.warning('Static map fetch failed: %s', exc)
         return None
+
+
+def map_grid_cell(latitude, longitude):
+    """(lat, lng) of the centre of the grid cell holding the point, as 6-place strings; None if invalid."""
+    grid = Decimal(str(getattr(settings, 'WORKER_MAP_GRID_DEGREES', DEFAULT_GRID_DEGREES)))
+    try:
+        lat = Decimal(str(latitude))
+        lng = Decimal(str(longitude))
+    except (ArithmeticError, ValueError):
+        return None
+    if not (lat.is_finite() and lng.is_finite()) or abs(lat) > 90 or abs(lng) > 180:
+        return None
+
+    def snap(value):
+        return str(((value / grid).quantize(Decimal('1'), rounding=ROUND_HALF_UP) * grid).quantize(Decimal('0.000001')))
+
+    return snap(lat), snap(lng)
+
+
+def map_cell_key(cell, *, width=400, height=200, zoom=16):
+    return f'z{zoom}/{width}x{height}/{cell[0]},{cell[1]}'
+
+
+def cached_map_snapshot(latitude, longitude, *, storage, width=400, height=200, zoom=16):
+    """
+    Storage name of the snapshot for the point's grid cell, downloading and
+    storing it only the first time the cell is seen. None if the point is
+    invalid or the download failed.
+    """
+    from .models_extensions import MapSnapshotAsset
+
+    cell = map_grid_cell(latitude, longitude)
+    if cell is None:
+        return None
+    cell_key = map_cell_key(cell, width=width, height=height, zoom=zoom)
+    existing = MapSnapshotAsset.objects.filter(cell_key=cell_key).values_list('image', flat=True).first()
+    if existing:
+        return existing
+
+    content = fetch_static_map_image(cell[0], cell[1], width=width, height=height, zoom=zoom)
+    if not content:
+        return None
+    data = content.read()
+    content_hash = hashlib.sha256(data).hexdigest()
+    name = f'{MAP_CELL_PREFIX}/{content_hash}.png'
+    if not storage.exists(name):
+        # Identical renders (neighbouring cells over open water, say) share one blob.
+        name = storage.save(name, ContentFile(data))
+    try:
+        with transaction.atomic():
+            MapSnapshotAsset.objects.create(cell_key=cell_key, content_hash=content_hash, image=name)
+    except IntegrityError:
+        # Another job rendered the same cell first; use its asset.
+        return MapSnapshotAsset.objects.filter(cell_key=cell_key).values_list('image', flat=True).first()
+    return name
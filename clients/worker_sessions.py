@@ -0,0 +1,179 @@
+"""
+Worker portal session resolution.
+
+Every worker API call authenticates its token. Resolving one costs a single
+query (token joined to account and client), and the result, a small snapshot
+of the account (id, client id, name, portal access), is kept in the shared
+cache for SESSION_CACHE_SECONDS. Saving or deleting a WorkerAccount and
+logging out drop the cached snapshots, so turning portal access off takes
+effect on the next request rather than after the TTL.
+
+The header ticker payload is cached per worker and local day the same way and
+dropped when the worker's punches, daily feedback or incident notes change, so
+a warm ticker poll never touches the database.
+
+Expired WorkerSessionToken rows are deleted in one statement by a background
+job that logins queue at most once an hour, to run at the end of that hour.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import CaseNote
+from .models_extensions import WorkerAccount, WorkerDailyFeedback, WorkerSessionToken, WorkerTimePunch
+from .time_display import display_tz
+
+SESSION_CACHE_SECONDS = 60
+SUMMARY_CACHE_SECONDS = 60
+PURGE_INTERVAL_SECONDS = 3600
+INCIDENT_NOTE_PREFIX = 'Worker Incident Report'
+
+
+def session_cache_key(token):
+    # Hashed so raw tokens never sit in the cache's key space.
+    return 'worker-session:' + hashlib.sha256(token.encode()).hexdigest()
+
+
+def summary_cache_key(worker_account_id, local_date):
+    return f'worker-summary:{worker_account_id}:{local_date.isoformat()}'
+
+
+def _remember(token, snapshot, now):
+    ttl = min(SESSION_CACHE_SECONDS, int((snapshot['expires_at'] - now).total_seconds()))
+    if ttl > 0:
+        cache.set(session_cache_key(token), snapshot, ttl)
+
+
+def resolve_session(token):
+    """
+    Snapshot of the live session for `token`, or None: worker_account_id,
+    client_id, is_active, first_name, last_name, created_at, expires_at.
+    A cache hit costs no queries; a miss costs one.
+    """
+    if not token:
+        return None
+    now = timezone.now()
+    snapshot = cache.get(session_cache_key(token))
+    if snapshot and snapshot['expires_at'] > now:
+        return snapshot
+    snapshot = (
+        WorkerSessionToken.objects.filter(token=token, expires_at__gt=now)
+        .values(
+            'worker_account_id',
+            'created_at',
+            'expires_at',
+            client_id=F('worker_account__client_id'),
+            is_active=F('worker_account__is_active'),
+            first_name=F('worker_account__client__first_name'),
+            last_name=F('worker_account__client__last_name'),
+        )
+        .first()
+    )
+    if snapshot:
+        _remember(token, snapshot, now)
+    return snapshot
+
+
+def load_session_account(token):
+    """(WorkerAccount with its client, snapshot) for a live `token` in one query, or (None, None)."""
+    if not token:
+        return None, None
+    now = timezone.now()
+    session = (
+        WorkerSessionToken.objects.select_related('worker_account__client')
+        .filter(token=token, expires_at__gt=now)
+        .first()
+    )
+    if session is None:
+        return None, None
+    account = session.worker_account
+    snapshot = {
+        'worker_account_id': account.pk,
+        'created_at': session.created_at,
+        'expires_at': session.expires_at,
+        'client_id': account.client_id,
+        'is_active': account.is_active,
+        'first_name': account.client.first_name,
+        'last_name': account.client.last_name,
+    }
+    _remember(token, snapshot, now)
+    return account, snapshot
+
+
+def forget_session(token):
+    if token:
+        cache.delete(session_cache_key(token))
+
+
+def forget_account_sessions(worker_account_id):
+    forget_accounts_sessions([worker_account_id])
+
+
+def forget_accounts_sessions(worker_account_ids):
+    """Drop cached snapshots for every token of these accounts (for bulk .update() callers, which skip post_save)."""
+    tokens = WorkerSessionToken.objects.filter(worker_account_id__in=worker_account_ids).values_list('token', flat=True)
+    keys = [session_cache_key(token) for token in tokens]
+    if keys:
+        cache.delete_many(keys)
+
+
+def invalidate_summary(worker_account_id):
+    cache.delete(summary_cache_key(worker_account_id, timezone.now().astimezone(display_tz()).date()))
+
+
+def purge_expired_sessions():
+    """Background task: delete every expired session token in one statement."""
+    deleted, _ = WorkerSessionToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return {'deleted': deleted}
+
+
+def schedule_session_purge():
+    """
+    Queue one purge per PURGE_INTERVAL_SECONDS slot, however many logins
+    there are, to run when the slot ends.
+    """
+    now = int(timezone.now().timestamp())
+    slot = now // PURGE_INTERVAL_SECONDS
+    if not cache.add(f'worker-session-purge:{slot}', 1, PURGE_INTERVAL_SECONDS):
+        return
+    from .jobs import enqueue
+
+    enqueue(
+        'clients.worker_sessions.purge_expired_sessions',
+        idempotency_key=f'worker-session-purge:{slot}',
+        delay_seconds=(slot + 1) * PURGE_INTERVAL_SECONDS - now,
+        max_attempts=3,
+    )
+
+
+@receiver(post_save, sender=WorkerAccount, dispatch_uid='worker_sessions_account_saved')
+def _account_saved(sender, instance, created, **kwargs):
+    if not created:
+        forget_account_sessions(instance.pk)
+
+
+@receiver(pre_delete, sender=WorkerAccount, dispatch_uid='worker_sessions_account_deleted')
+def _account_deleted(sender, instance, **kwargs):
+    # pre_delete: the cascade is about to remove the tokens the keys are derived from.
+    forget_account_sessions(instance.pk)
+
+
+@receiver(post_save, sender=WorkerTimePunch, dispatch_uid='worker_sessions_punch_saved')
+@receiver(post_delete, sender=WorkerTimePunch, dispatch_uid='worker_sessions_punch_deleted')
+@receiver(post_save, sender=WorkerDailyFeedback, dispatch_uid='worker_sessions_feedback_saved')
+@receiver(post_delete, sender=WorkerDailyFeedback, dispatch_uid='worker_sessions_feedback_deleted')
+def _summary_source_changed(sender, instance, **kwargs):
+    invalidate_summary(instance.worker_account_id)
+
+
+@receiver(post_save, sender=CaseNote, dispatch_uid='worker_sessions_note_saved')
+@receiver(post_delete, sender=CaseNote, dispatch_uid='worker_sessions_note_deleted')
+def _incident_note_changed(sender, instance, **kwargs):
+    if not (instance.content or '').startswith(INCIDENT_NOTE_PREFIX):
+        return
+    for account_id in WorkerAccount.objects.filter(client_id=instance.client_id).values_list('pk', flat=True):
+        invalidate_summary(account_id)
@@ -1,11 +1,16 @@
 """
 Worker Portal API — worker clock in/out with optional map snapshot reference.
 """
+import hashlib
+import hmac
 import json
 from datetime import timedelta
 from django.conf import settings
-from django.db.models import DurationField, ExpressionWrapper, F, Sum
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import status
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication
 from rest_framework.decorators import (
@@ -36,10 +41,20 @@ from .serializers import (
 )
 from .throttles import WorkerPunchThrottle
 from .time_display import display_tz
-from .worker_map_utils import fetch_static_map_image
+from .worker_hours import hours_for_worker
+from .worker_map_utils import cached_map_snapshot
+from .worker_sessions import (
+    SUMMARY_CACHE_SECONDS,
+    forget_session,
+    invalidate_summary,
+    load_session_account,
+    resolve_session,
+    schedule_session_purge,
+    summary_cache_key,
+)
 
 class WorkerSession:
-    """DB-backed worker portal session (multi-process safe)."""
+    """DB-backed worker portal session (multi-process safe), resolved through the shared cache."""
 
     @classmethod
     def create_session(cls, worker_account):
@@ -52,31 +67,18 @@ class WorkerSession:
             worker_account=worker_account,
             expires_at=expires_at,
         )
+        schedule_session_purge()
         return token
 
     @classmethod
     def get_session(cls, token):
-        if not token:
-            return None
-        try:
-            session = WorkerSessionToken.objects.select_related(
-                'worker_account', 'worker_account__client'
-            ).get(
-                token=token,
-                expires_at__gt=timezone.now(),
-            )
-            return {
-                'worker_account_id': session.worker_account_id,
-                'client_id': session.worker_account.client_id,
-                'created_at': session.created_at,
-            }
-        except WorkerSessionToken.DoesNotExist:
-            return None
+        return resolve_session(token)
 
     @classmethod
     def delete_session(cls, token):
         if not token:
             return
+        forget_session(token)
         WorkerSessionToken.objects.filter(token=token).delete()
 
 
@@ -85,27 +87,39 @@ def _worker_token(request):
 
 
 def _require_worker(request):
-    session = WorkerSession.get_session(_worker_token(request))
+    """(WorkerAccount, None) for the request's session in one query, or (None, error response)."""
+    account, session = load_session_account(_worker_token(request))
     if not session:
         return None, Response(
             {'error': 'Invalid or expired session'},
             status=status.HTTP_401_UNAUTHORIZED,
         )
-    try:
-        account = WorkerAccount.objects.select_related('client').get(
-            id=session['worker_account_id']
+    if not account.is_active:
+        return None, Response(
+            {'error': 'Portal access is turned off'},
+            status=status.HTTP_403_FORBIDDEN,
         )
-    except WorkerAccount.DoesNotExist:
+    return account, None
+
+
+def _require_worker_session(request):
+    """
+    Like _require_worker, but returns the cached session snapshot instead of
+    the account: no queries on a cache hit. For read-only polls that only
+    need the worker's ids.
+    """
+    session = resolve_session(_worker_token(request))
+    if not session:
         return None, Response(
-            {'error': 'Worker account not found'},
-            status=status.HTTP_404_NOT_FOUND,
+            {'error': 'Invalid or expired session'},
+            status=status.HTTP_401_UNAUTHORIZED,
         )
-    if not account.is_active:
+    if not session['is_active']:
         return None, Response(
             {'error': 'Portal access is turned off'},
             status=status.HTTP_403_FORBIDDEN,
         )
-    return account, None
+    return session, None
 
 
 def _parse_optional_coordinates(request):
@@ -202,7 +216,10 @@ def _parse_location_reference(request):
 
 
 def _attach_location_snapshot(punch, prefix, location_ref):
-    """Save label and map image on clock-in or clock-out (no validation)."""
+    """
+    Set the label and any uploaded map image on clock-in or clock-out (no
+    validation). Returns the fields changed, for the caller's save().
+    """
     label_field = f'{prefix}_location_label'
     map_field = f'{prefix}_map_image'
     setattr(punch, label_field, location_ref.get('label') or '')
@@ -210,15 +227,46 @@ def _attach_location_snapshot(punch, prefix, location_ref):
     uploaded = location_ref.get('map_file')
     if uploaded:
         getattr(punch, map_field).save(uploaded.name, uploaded, save=False)
-        return
+        return [label_field, map_field]
+    return [label_field]
 
+
+def _queue_map_snapshot(punch, prefix, location_ref):
+    """
+    Without an uploaded image, fetch an OSM snapshot for the coordinates in the
+    job worker; the download can take seconds and must not hold up the punch.
+    Call after the punch is saved so the job never races the request's save.
+    """
     lat = location_ref.get('latitude')
     lng = location_ref.get('longitude')
-    if lat is None or lng is None:
+    if location_ref.get('map_file') or lat is None or lng is None:
         return
-    content = fetch_static_map_image(lat, lng)
-    if content:
-        getattr(punch, map_field).save(content.name, content, save=False)
+    from .jobs import enqueue
+
+    enqueue(
+        'clients.worker_views.store_punch_map_snapshot',
+        {'punch_id': punch.pk, 'prefix': prefix, 'latitude': lat, 'longitude': lng},
+        idempotency_key=f'punch-map:{punch.pk}:{prefix}',
+        max_attempts=3,
+    )
+
+
+def store_punch_map_snapshot(punch_id, prefix, latitude, longitude):
+    """
+    Background task: point the punch at its grid cell's cached map, rendering
+    the cell first if no punch has been there; raising makes the queue retry.
+    """
+    map_field = f'{prefix}_map_image'
+    without_map = Q(**{map_field: ''}) | Q(**{f'{map_field}__isnull': True})
+    if not WorkerTimePunch.objects.filter(without_map, pk=punch_id).exists():
+        return None
+    storage = WorkerTimePunch._meta.get_field(map_field).storage
+    name = cached_map_snapshot(latitude, longitude, storage=storage)
+    if not name:
+        raise RuntimeError(f'Static map fetch failed for punch {punch_id}')
+    # A plain UPDATE: the image is shared, and a map is not a punch edit for the timesheet signals.
+    WorkerTimePunch.objects.filter(without_map, pk=punch_id).update(**{map_field: name})
+    return name
 
 
 WORKER_LOCAL_TZ = display_tz()
@@ -237,44 +285,6 @@ def _local_day_bounds(now=None):
     return start_today, start_tomorrow
 
 
-def _completed_hours_in_range(account, start_dt, end_dt):
-    """Net paid hours for completed punches in [start_dt, end_dt) for this worker.
-
-    Net = worked time minus the unpaid lunch. Two SQL aggregates (gross worked
-    and total lunch), subtracted in Python — keeps it DB-agnostic and avoids
-    nested null-duration arithmetic. Open punches are excluded; the frontend
-    adds the live in-progress duration on top of these completed totals.
-    """
-    aggregates = (
-        WorkerTimePunch.objects.filter(
-            worker_account=account,
-            clock_in_at__gte=start_dt,
-            clock_in_at__lt=end_dt,
-            clock_out_at__isnull=False,
-        )
-        .aggregate(
-            worked=Sum(
-                ExpressionWrapper(
-                    F('clock_out_at') - F('clock_in_at'),
-                    output_field=DurationField(),
-                )
-            ),
-            lunch=Sum(
-                ExpressionWrapper(
-                    F('lunch_end_at') - F('lunch_start_at'),
-                    output_field=DurationField(),
-                )
-            ),
-        )
-    )
-    worked = aggregates['worked']
-    lunch = aggregates['lunch']
-    worked_seconds = worked.total_seconds() if worked else 0
-    lunch_seconds = lunch.total_seconds() if lunch else 0
-    net_seconds = max(worked_seconds - lunch_seconds, 0)
-    return round(net_seconds / 3600, 2)
-
-
 def _resolve_optional_work_site(work_site_id):
     """Look up an optional WorkSite.
 
@@ -416,43 +426,51 @@ def worker_daily_feedback(request):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def worker_dashboard_summary(request):
-    """Compact status payload for the worker header ticker."""
-    worker_account, err = _require_worker(request)
+    """Compact status payload for the worker header ticker; warm polls are served from the cache."""
+    session, err = _require_worker_session(request)
     if err:
         return err
 
+    today = _worker_local_today()
+    cache_key = summary_cache_key(session['worker_account_id'], today)
+    payload = cache.get(cache_key)
+    if payload is None:
+        payload = _dashboard_summary_payload(session['worker_account_id'], session['client_id'], today)
+        cache.set(cache_key, payload, SUMMARY_CACHE_SECONDS)
+    return Response(payload)
+
+
+def _dashboard_summary_payload(worker_account_id, client_id, today):
     today_start, tomorrow_start = _worker_local_day_bounds()
     week_start = today_start - timedelta(days=6)
     incident_notes = CaseNote.objects.filter(
-        client=worker_account.client,
+        client_id=client_id,
         staff_member='Worker Portal',
         content__startswith='Worker Incident Report',
     )
     last_incident = incident_notes.order_by('-created_at').first()
     has_open_punch = WorkerTimePunch.objects.filter(
-        worker_account=worker_account,
+        worker_account_id=worker_account_id,
         clock_out_at__isnull=True,
     ).exists()
     has_feedback_today = WorkerDailyFeedback.objects.filter(
-        worker_account=worker_account,
-        feedback_date=_worker_local_today(),
+        worker_account_id=worker_account_id,
+        feedback_date=today,
     ).exists()
 
-    return Response(
-        {
-            'is_clocked_in': has_open_punch,
-            'incident_reports_today': incident_notes.filter(
-                created_at__gte=today_start,
-                created_at__lt=tomorrow_start,
-            ).count(),
-            'incident_reports_week': incident_notes.filter(
-                created_at__gte=week_start,
-                created_at__lt=tomorrow_start,
-            ).count(),
-            'last_incident_at': last_incident.created_at if last_incident else None,
-            'has_feedback_today': has_feedback_today,
-        }
-    )
+    return {
+        'is_clocked_in': has_open_punch,
+        'incident_reports_today': incident_notes.filter(
+            created_at__gte=today_start,
+            created_at__lt=tomorrow_start,
+        ).count(),
+        'incident_reports_week': incident_notes.filter(
+            created_at__gte=week_start,
+            created_at__lt=tomorrow_start,
+        ).count(),
+        'last_incident_at': last_incident.created_at if last_incident else None,
+        'has_feedback_today': has_feedback_today,
+    }
 
 
 @api_view(['GET'])
@@ -606,16 +624,19 @@ def worker_time_punch(request):
 
         today_start, tomorrow_start = _local_day_bounds()
         # "Last 7 days" includes today, so window is 7 calendar days back.
+        # Completed punches only; the frontend adds the live in-progress duration.
         week_start = today_start - timedelta(days=6)
-        today_hours = _completed_hours_in_range(account, today_start, tomorrow_start)
-        week_hours = _completed_hours_in_range(account, week_start, tomorrow_start)
+        hours = hours_for_worker(
+            account,
+            {'today': (today_start, tomorrow_start), 'week': (week_start, tomorrow_start)},
+        )
 
         return Response(
             {
                 'active_punch': WorkerTimePunchSerializer(open_punch).data if open_punch else None,
                 'punches': WorkerTimePunchSerializer(punches, many=True).data,
-                'today_hours': today_hours,
-                'week_hours': week_hours,
+                'today_hours': hours['today']['net_hours'],
+                'week_hours': hours['week']['net_hours'],
             }
         )
 
@@ -668,10 +689,8 @@ def worker_time_punch(request):
             clock_in_geo_basic_note='Location captured',
         )
         if location_ref:
-            _attach_location_snapshot(punch, 'clock_in', location_ref)
-            punch.save(
-                update_fields=['clock_in_location_label', 'clock_in_map_image'],
-            )
+            punch.save(update_fields=_attach_location_snapshot(punch, 'clock_in', location_ref))
+            _queue_map_snapshot(punch, 'clock_in', location_ref)
         clock_in_message = f'Clocked in at {site.name}.' if site else 'Clocked in.'
         return Response(
             {
@@ -719,9 +738,10 @@ def worker_time_punch(request):
         'clock_out_geo_basic_note',
     ]
     if location_ref:
-        _attach_location_snapshot(open_punch, 'clock_out', location_ref)
-        update_fields.extend(['clock_out_location_label', 'clock_out_map_image'])
+        update_fields.extend(_attach_location_snapshot(open_punch, 'clock_out', location_ref))
     open_punch.save(update_fields=update_fields)
+    if location_ref:
+        _queue_map_snapshot(open_punch, 'clock_out', location_ref)
     clock_out_message = (
         f'Clocked out from {open_punch.work_site.name}.'
         if open_punch.work_site
@@ -735,6 +755,257 @@ def worker_time_punch(request):
     )
 
 
+PUNCH_ACTIONS = ('clock_in', 'start_lunch', 'end_lunch', 'clock_out')
+OFFLINE_PUNCH_MAX_EVENTS = 50
+# How old a queued punch may be, and how far ahead of the server clock an iPad may run.
+OFFLINE_PUNCH_MAX_AGE = timedelta(days=3)
+OFFLINE_PUNCH_CLOCK_SKEW = timedelta(minutes=5)
+# Where each action records its device time; a retried flush is recognized by it.
+OFFLINE_EVENT_TIME_FIELDS = {
+    'clock_in': 'clock_in_client_reported_at',
+    'start_lunch': 'lunch_start_at',
+    'end_lunch': 'lunch_end_at',
+    'clock_out': 'clock_out_client_reported_at',
+}
+
+
+def punch_batch_signature(token, payload):
+    """HMAC-SHA256 (hex) of the exact `events` string, keyed by the worker's session token."""
+    return hmac.new(token.encode(), payload.encode(), hashlib.sha256).hexdigest()
+
+
+def _float_or_none(value):
+    try:
+        return float(value) if value is not None and value != '' else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_offline_events(payload):
+    """(events, error): the queued punches, validated as a well-formed, time-ordered list."""
+    try:
+        raw_events = json.loads(payload)
+    except (TypeError, json.JSONDecodeError):
+        return None, 'events must be a JSON list.'
+    if not isinstance(raw_events, list) or not raw_events:
+        return None, 'events must be a non-empty JSON list.'
+    if len(raw_events) > OFFLINE_PUNCH_MAX_EVENTS:
+        return None, f'Send at most {OFFLINE_PUNCH_MAX_EVENTS} events per sync.'
+
+    events = []
+    for index, raw in enumerate(raw_events):
+        if not isinstance(raw, dict):
+            return None, f'Event {index} must be an object.'
+        action = str(raw.get('action') or '').strip().lower()
+        if action not in PUNCH_ACTIONS:
+            return None, f'Event {index}: use "clock_in", "start_lunch", "end_lunch", or "clock_out".'
+        at = parse_datetime(str(raw.get('at') or ''))
+        if at is None or timezone.is_naive(at):
+            return None, f'Event {index}: "at" must be an ISO 8601 time with a UTC offset.'
+        if events and at < events[-1]['at']:
+            return None, 'Events must be listed in the order they happened.'
+        latitude = _float_or_none(raw.get('latitude'))
+        longitude = _float_or_none(raw.get('longitude'))
+        events.append({
+            'action': action,
+            'at': at,
+            'latitude': latitude,
+            'longitude': longitude,
+            'accuracy': _float_or_none(raw.get('accuracy')),
+            'label': str(raw.get('location_label') or '').strip()[:300],
+            'has_coordinates': latitude is not None and longitude is not None,
+        })
+    return events, None
+
+
+def _offline_event_error(event, current, floor, now):
+    """Why `event` cannot apply on top of `current` (the open punch, if any), or None."""
+    action, at = event['action'], event['at']
+    if not event['has_coordinates']:
+        return f"Turn on location services to {action.replace('_', ' ')}."
+    if at > now + OFFLINE_PUNCH_CLOCK_SKEW:
+        return 'Event time is in the future; check the iPad clock.'
+    if at < now - OFFLINE_PUNCH_MAX_AGE:
+        return 'Event is too old to sync; ask staff to enter it.'
+    if floor and at < floor:
+        return "Event is earlier than the worker's last recorded punch."
+    if action == 'clock_in':
+        return 'You are already clocked in. Clock out first.' if current else None
+    if current is None:
+        return 'No active clock-in found.'
+    if action == 'start_lunch':
+        return 'Lunch already recorded for this shift.' if current.lunch_start_at else None
+    if action == 'end_lunch':
+        if current.lunch_start_at is None:
+            return 'Start lunch before ending it.'
+        return 'Lunch already ended.' if current.lunch_end_at else None
+    return 'End your lunch before clocking out.' if current.is_on_lunch else None
+
+
+def _apply_offline_event(account, event, current, now):
+    """Apply one validated event; returns (punch, changed field names)."""
+    at, action = event['at'], event['action']
+    if action == 'clock_in':
+        punch = WorkerTimePunch(
+            worker_account=account,
+            clock_in_at=at,
+            clock_in_client_reported_at=at,
+            clock_in_latitude=event['latitude'],
+            clock_in_longitude=event['longitude'],
+            clock_in_accuracy_meters=event['accuracy'],
+            clock_in_geo_status=WorkerTimePunch.GEO_STATUS_CAPTURED,
+            clock_in_geo_basic_ok=True,
+            clock_in_geo_basic_note='Location captured (offline sync)',
+            clock_in_location_label=event['label'],
+        )
+        return punch, set()
+    if action in ('start_lunch', 'end_lunch'):
+        prefix = 'lunch_start' if action == 'start_lunch' else 'lunch_end'
+        setattr(current, f'{prefix}_at', at)
+        setattr(current, f'{prefix}_latitude', event['latitude'])
+        setattr(current, f'{prefix}_longitude', event['longitude'])
+        return current, {f'{prefix}_at', f'{prefix}_latitude', f'{prefix}_longitude'}
+    current.clock_out_at = at
+    current.clock_out_client_reported_at = at
+    current.clock_out_server_received_at = now
+    current.clock_out_latitude = event['latitude']
+    current.clock_out_longitude = event['longitude']
+    current.clock_out_accuracy_meters = event['accuracy']
+    current.clock_out_geo_status = WorkerTimePunch.GEO_STATUS_CAPTURED
+    current.clock_out_geo_basic_ok = True
+    current.clock_out_geo_basic_note = 'Location captured (offline sync)'
+    current.clock_out_location_label = event['label']
+    return current, {
+        'clock_out_at',
+        'clock_out_client_reported_at',
+        'clock_out_server_received_at',
+        'clock_out_latitude',
+        'clock_out_longitude',
+        'clock_out_accuracy_meters',
+        'clock_out_geo_status',
+        'clock_out_geo_basic_ok',
+        'clock_out_geo_basic_note',
+        'clock_out_location_label',
+    }
+
+
+def apply_offline_punches(account, events, now=None):
+    """
+    Replay queued punches in order, in one transaction: one read of the
+    worker's recent punches, then bulk_create for new shifts and bulk_update
+    for the shift that was already open. Invalid events are skipped with an
+    error and later ones are checked against the state as it then stands;
+    events already recorded (a retried flush) come back as "duplicate".
+    Returns (results, open punch or None, [(punch, prefix, event)] needing maps).
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        recent = list(
+            WorkerTimePunch.objects.select_for_update()
+            .filter(worker_account=account)
+            .filter(Q(clock_out_at__isnull=True) | Q(clock_out_at__gte=events[0]['at'] - timedelta(days=1)))
+            .order_by('clock_in_at')
+        )
+        current = already_open = next((punch for punch in reversed(recent) if punch.clock_out_at is None), None)
+        recorded = {
+            (action, getattr(punch, field))
+            for punch in recent
+            for action, field in OFFLINE_EVENT_TIME_FIELDS.items()
+            if getattr(punch, field)
+        }
+        floor = max(
+            (moment for punch in recent for moment in (
+                punch.clock_in_at, punch.lunch_start_at, punch.lunch_end_at, punch.clock_out_at,
+            ) if moment),
+            default=None,
+        )
+
+        created, changed_fields, outcomes, maps = [], set(), [], []
+        for index, event in enumerate(events):
+            if (event['action'], event['at']) in recorded:
+                outcomes.append((index, event, 'duplicate', None, None))
+                continue
+            error = _offline_event_error(event, current, floor, now)
+            if error:
+                outcomes.append((index, event, 'rejected', error, None))
+                continue
+            punch, fields = _apply_offline_event(account, event, current, now)
+            if event['action'] == 'clock_in':
+                created.append(punch)
+            elif punch.pk:
+                changed_fields |= fields
+            if event['action'] in ('clock_in', 'clock_out'):
+                maps.append((punch, event['action'], event))
+            current = None if event['action'] == 'clock_out' else punch
+            floor = event['at']
+            recorded.add((event['action'], event['at']))
+            outcomes.append((index, event, 'applied', None, punch))
+
+        if created:
+            WorkerTimePunch.objects.bulk_create(created)
+        if changed_fields:
+            WorkerTimePunch.objects.bulk_update([already_open], sorted(changed_fields))
+        if created or changed_fields:
+            # bulk writes skip the post_save receivers that keep the rollup, ticker and timesheets current.
+            from .rollups import refresh_punch_rollup
+            from .timesheets import local_work_date, refresh_timesheets
+
+            refresh_punch_rollup(account.client_id)
+            invalidate_summary(account.pk)
+            touched = created + ([already_open] if changed_fields else [])
+            refresh_timesheets(account.pk, {local_work_date(punch.clock_in_at) for punch in touched})
+
+    results = []
+    for index, event, result, error, punch in outcomes:
+        row = {'index': index, 'action': event['action'], 'at': event['at'].isoformat(), 'status': result}
+        if error:
+            row['error'] = error
+        if punch is not None:
+            row['punch_id'] = punch.pk
+        results.append(row)
+    return results, current, maps
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@parser_classes([JSONParser])
+@throttle_classes([WorkerPunchThrottle])
+def worker_time_punch_sync(request):
+    """
+    Flush punches an iPad queued while offline, in one round trip.
+
+    Body: {"events": "<JSON list>", "signature": "<hex>"}. `events` is sent
+    as the exact string that was signed: HMAC-SHA256 keyed by the session
+    token, so a queued batch cannot be altered or replayed into another
+    worker's session. Each event: {"action", "at" (device time, ISO 8601 with
+    offset), "latitude", "longitude", "accuracy", "location_label"}.
+    """
+    account, err = _require_worker(request)
+    if err:
+        return err
+
+    payload = request.data.get('events')
+    signature = str(request.data.get('signature') or '')
+    if not isinstance(payload, str):
+        return Response({'events': ['Send events as the JSON string that was signed.']}, status=status.HTTP_400_BAD_REQUEST)
+    if not hmac.compare_digest(punch_batch_signature(_worker_token(request), payload), signature):
+        return Response({'error': 'Batch signature does not match.'}, status=status.HTTP_400_BAD_REQUEST)
+    events, parse_error = _parse_offline_events(payload)
+    if parse_error:
+        return Response({'events': [parse_error]}, status=status.HTTP_400_BAD_REQUEST)
+
+    results, open_punch, maps = apply_offline_punches(account, events)
+    for punch, action, event in maps:
+        _queue_map_snapshot(punch, action, {'latitude': event['latitude'], 'longitude': event['longitude']})
+    return Response(
+        {
+            'results': results,
+            'applied': sum(1 for row in results if row['status'] == 'applied'),
+            'active_punch': WorkerTimePunchSerializer(open_punch).data if open_punch else None,
+        }
+    )
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def worker_incident_report(request):
@@ -189,6 +189,33 @@ else:
         }
     }
 
+# Shared cache for throttles, sessions and cached reads. Every gunicorn worker
+# (and the job worker) must see the same counters, so never LocMem: Redis when
+# REDIS_URL is set, otherwise a SQLite file on the box's local disk that all
+# of its processes share.
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'mhh',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'clients.cache_backends.SQLiteCache',
+            'LOCATION': os.getenv('SHARED_CACHE_PATH', '/tmp/mhh-shared-cache.sqlite3'),
+            'KEY_PREFIX': 'mhh',
+            'OPTIONS': {'MAX_ENTRIES': 50000},
+        }
+    }
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Gives every test run its own cache file instead of the shared dev cache.
+TEST_RUNNER = 'config.test_runner.IsolatedCacheTestRunner'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -269,6 +296,11 @@ SUPPORT_EMAIL = os.getenv('SUPPORT_EMAIL', 'info@missionhiringhall.org')
 # Case note alert email (fallback if staff member email not found)
 CASE_NOTE_ALERT_EMAIL = os.getenv('CASE_NOTE_ALERT_EMAIL', None)
 
+# Notification mail (clients/mailer.py): tries per message on transient SMTP
+# errors, and the first retry delay (doubles each retry).
+EMAIL_SEND_ATTEMPTS = int(os.getenv('EMAIL_SEND_ATTEMPTS', '3'))
+EMAIL_RETRY_BACKOFF_SECONDS = float(os.getenv('EMAIL_RETRY_BACKOFF_SECONDS', '1'))
+
 # File upload verification: disable by default for faster concurrent signups.
 # Enable only when diagnosing storage consistency issues.
 VERIFY_UPLOAD_ON_SAVE = os.getenv('VERIFY_UPLOAD_ON_SAVE', 'false').lower() == 'true'
@@ -279,6 +311,12 @@ PITSTOP_APPLICATION_ALERT_EMAILS = os.getenv(
     'pitstop@missionhiringhall.org',
 )
 
+# Background job queue (clients/jobs.py, worked by `manage.py run_jobs`).
+# Eager mode runs jobs inline at enqueue time - local development without a worker.
+JOB_QUEUE_EAGER = os.getenv('JOB_QUEUE_EAGER', 'false').lower() == 'true'
+JOB_RETRY_BASE_SECONDS = int(os.getenv('JOB_RETRY_BASE_SECONDS', '30'))
+JOB_RETRY_MAX_SECONDS = int(os.getenv('JOB_RETRY_MAX_SECONDS', '3600'))
+
 # Azure Communication Services SMS
 AZURE_COMMUNICATION_CONNECTION_STRING = os.getenv('AZURE_COMMUNICATION_CONNECTION_STRING', '')
 AZURE_COMMUNICATION_SMS_FROM = os.getenv('AZURE_COMMUNICATION_SMS_FROM', '')
@@ -297,6 +335,10 @@ SMS_FOLLOWUP_CHECKPOINT_DAYS = [
 ]
 SMS_FOLLOWUP_WINDOW_DAYS = int(os.getenv('SMS_FOLLOWUP_WINDOW_DAYS', '1'))
 SMS_FOLLOWUP_START_FIELD = os.getenv('SMS_FOLLOWUP_START_FIELD', 'created_at')
+# Bulk sends (clients/sms_dispatch.py): concurrent provider calls, and a cap on
+# messages per second across all of them (0 = no cap).
+SMS_DISPATCH_MAX_WORKERS = int(os.getenv('SMS_DISPATCH_MAX_WORKERS', '8'))
+SMS_DISPATCH_RATE_PER_SECOND = float(os.getenv('SMS_DISPATCH_RATE_PER_SECOND', '10'))
 # Worker geofence threshold for clock in/out (200 yards ~= 183 meters).
 WORKER_CLOCK_GEOFENCE_METERS = int(os.getenv('WORKER_CLOCK_GEOFENCE_METERS', '183'))
 # Net paid hours below this flag a shift as "short" (possible early departure).
@@ -348,7 +390,8 @@ LOGGING = {
 
 # REST Framework settings
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Keyset pagination with opaque cursors: {'next': url, 'results': [...]}, no OFFSET scans.
+    'DEFAULT_PAGINATION_CLASS': 'clients.pagination.KeysetCursorPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_AUTHENTICATION_CLASSES': (
         ['rest_framework.authentication.SessionAuthentication']
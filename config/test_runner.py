@@ -0,0 +1,39 @@
+"""
+Test runner that keeps test runs off the shared dev cache.
+
+CACHES['default'] is a SQLite file (or Redis) shared with the dev server and
+job worker, and the test suite clears it between tests. Every run gets its own
+cache file in a temp dir instead, still one file so parallel workers share it
+the way the real processes do, and the dir is removed when the run ends.
+"""
+import os
+import shutil
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class IsolatedCacheTestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        self._cache_dir = tempfile.mkdtemp(prefix='mhh-test-cache-')
+        cache_path = os.path.join(self._cache_dir, 'cache.sqlite3')
+        # Spawned parallel workers re-read settings, so they pick this up too.
+        os.environ['SHARED_CACHE_PATH'] = cache_path
+        os.environ.pop('REDIS_URL', None)
+        self._cache_override = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'clients.cache_backends.SQLiteCache',
+                'LOCATION': cache_path,
+                'KEY_PREFIX': 'mhh',
+                'OPTIONS': {'MAX_ENTRIES': 50000},
+            }
+        })
+        self._cache_override.enable()
+        super().setup_test_environment(**kwargs)
+
+    def teardown_test_environment(self, **kwargs):
+        super().teardown_test_environment(**kwargs)
+        self._cache_override.disable()
+        shutil.rmtree(self._cache_dir, ignore_errors=True)
@@ -97,6 +97,11 @@ fi
 # START APPLICATION
 # ============================================================================
 
+echo ""
+echo "=== Starting background job worker ==="
+# Sends queued emails/SMS and fetches punch map snapshots (clients/jobs.py).
+$PYTHON manage.py run_jobs &
+
 echo ""
 echo "=== Starting Gunicorn on port 8000 ==="
 echo ""
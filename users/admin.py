@@ -2,7 +2,6 @@ from django.contrib import admin
 from django import forms
 from django.contrib import messages
 from django.conf import settings
-from django.core.mail import send_mail
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 from .models import StaffUser
@@ -91,7 +90,8 @@ class StaffUserAdmin(UserAdmin):
 
     @admin.action(description='Text login link and username to selected staff')
     def text_staff_login_help(self, request, queryset):
-        from clients.notifications import send_phone_text_message
+        from clients.mailer import build_email, send_emails
+        from clients.notifications import internal_phone_allowlist, send_phone_text_message
 
         if not getattr(settings, 'AZURE_COMMUNICATION_CONNECTION_STRING', ''):
             self.message_user(
@@ -114,6 +114,8 @@ class StaffUserAdmin(UserAdmin):
         email_backup_sent = 0
         email_backup_failed = 0
         reason_counts = {}
+        backup_emails = []
+        allowlist = internal_phone_allowlist()
 
         for user in queryset:
             phone = (user.phone or '').strip()
@@ -128,7 +130,7 @@ class StaffUserAdmin(UserAdmin):
                 f"Username: {username}\n"
                 "If you cannot log in, contact 9255507522 Matthew Robin."
             )
-            ok, detail = send_phone_text_message(phone=phone, body=message_body[:480])
+            ok, detail = send_phone_text_message(phone=phone, body=message_body[:480], allowlist=allowlist)
             if ok:
                 sent += 1
             else:
@@ -140,19 +142,16 @@ class StaffUserAdmin(UserAdmin):
             if getattr(settings, 'SMS_FORCE_EMAIL_BACKUP', True):
                 email = (user.email or '').strip()
                 if email:
-                    try:
-                        send_mail(
-                            subject='Mission Hiring Hall Admin Login Help',
-                            message=message_body,
-                            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@missionhiringhall.org'),
-                            recipient_list=[email],
-                            fail_silently=False,
-                        )
-                        email_backup_sent += 1
-                    except Exception as exc:
-                        email_backup_failed += 1
-                        reason = f'Email backup failed: {exc}'
-                        reason_counts[reason] = reason_counts.get(reason, 0) + 1
+                    backup_emails.append(build_email('Mission Hiring Hall Admin Login Help', message_body, None, email))
+
+        # Every email backup goes out over one mail connection.
+        for error in send_emails(backup_emails):
+            if error is None:
+                email_backup_sent += 1
+            else:
+                email_backup_failed += 1
+                reason = f'Email backup failed: {error}'
+                reason_counts[reason] = reason_counts.get(reason, 0) + 1
 
         level = messages.SUCCESS if failed == 0 else messages.WARNING
         reason_text = ''
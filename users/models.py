@@ -12,6 +12,14 @@ class StaffUser(AbstractUser):
     
     role = models.CharField(max_length=20, choices=STAFF_ROLE_CHOICES, default='case_manager')
     phone = models.CharField(max_length=15, blank=True, null=True)
+    phone_digits = models.CharField(
+        max_length=15,
+        blank=True,
+        default='',
+        db_index=True,
+        editable=False,
+        help_text='Phone normalized to digits on save; indexed for phone lookups.',
+    )
     nonprofit = models.CharField(max_length=100, blank=True, null=True)
     accent_color = models.CharField(
         max_length=7,
@@ -46,4 +54,6 @@ class StaffUser(AbstractUser):
         # Ensure staff users have is_staff=True by default for admin access
         if self.role in ['admin', 'case_manager', 'counselor'] and not self.is_staff:
             self.is_staff = True
+        from clients.phone_utils import sync_phone_digits
+        sync_phone_digits(self, kwargs)
         super().save(*args, **kwargs)
@@ -89,10 +89,8 @@ class StaffUserAdminTests(TestCase):
         SMS_FORCE_EMAIL_BACKUP=True,
     )
     @patch('clients.notifications.send_phone_text_message')
-    @patch('users.admin.send_mail')
-    def test_text_staff_login_help_action_sends_sms_for_users_with_phone(self, send_mail_mock, send_sms_mock):
+    def test_text_staff_login_help_action_sends_sms_for_users_with_phone(self, send_sms_mock):
         send_sms_mock.return_value = (True, '+19255501234')
-        send_mail_mock.return_value = 1
         staff_user = StaffUser.objects.create_user(
             username='caseworker',
             email='caseworker@example.com',
@@ -111,7 +109,8 @@ class StaffUserAdminTests(TestCase):
         kwargs = send_sms_mock.call_args.kwargs
         self.assertEqual(kwargs['phone'], '9255501234')
         self.assertIn('Username: caseworker', kwargs['body'])
-        send_mail_mock.assert_called_once()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['caseworker@example.com'])
 
 
 @override_settings(